@@ -1,5 +1,9 @@
-from django.contrib import admin
-from .models import TimeSlot, Booking, BookingNote
+from django.contrib import admin, messages
+
+from core.admin_utils import CachedRelatedFieldListFilter, LargeTableAdminMixin
+
+from .models import TimeSlot, Booking, BookingNote, BookingTransition
+from .transitions import transition_bookings
 
 
 @admin.register(TimeSlot)
@@ -15,17 +19,32 @@ class BookingNoteInline(admin.StackedInline):
     extra = 0
 
 
+class BookingTransitionInline(admin.TabularInline):
+    model = BookingTransition
+    fields = ('created_at', 'from_status', 'to_status', 'source', 'actor', 'reason')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Booking)
-class BookingAdmin(admin.ModelAdmin):
+class BookingAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = (
         'student', 'course', 'date', 'start_time',
-        'session_type', 'delivery_mode', 'status', 'price_display'
+        'session_type', 'delivery_mode', 'total_students', 'status', 'price_display'
     )
-    list_filter = ('status', 'session_type', 'delivery_mode', 'date', 'course')
+    list_filter = ('status', 'session_type', 'delivery_mode', 'date', ('course', CachedRelatedFieldListFilter))
     search_fields = ('student__email', 'student__first_name', 'student__last_name', 'notes')
     date_hierarchy = 'date'
+    autocomplete_fields = ('student', 'additional_students', 'course', 'topic')
+    # bookings_date_status_idx is read newest date first, so only the rows of the
+    # dates on the page are sorted by time, not the whole table
+    ordering = ('-date', '-start_time', 'id')
     readonly_fields = ('created_at', 'updated_at', 'price_display')
-    inlines = [BookingNoteInline]
+    inlines = [BookingNoteInline, BookingTransitionInline]
 
     fieldsets = (
         ('Student', {
@@ -51,20 +70,45 @@ class BookingAdmin(admin.ModelAdmin):
 
     actions = ['mark_confirmed', 'mark_completed', 'mark_cancelled']
 
+    def get_queryset(self, request):
+        # The changelist skips list_select_related once a queryset has joins,
+        # so add the level that Course.__str__ needs here
+        return super().get_queryset(request).for_listing().select_related('course__level')
+
+    def total_students(self, obj):
+        return obj.total_students
+    total_students.short_description = "Students"
+    total_students.admin_order_field = 'total_students_count'
+
+    def _transition(self, request, queryset, to_status):
+        moved = transition_bookings(
+            queryset, to_status, BookingTransition.Source.ADMIN, actor=request.user, reason='Admin action',
+        )
+        skipped = queryset.count() - moved
+        label = Booking.Status(to_status).label.lower()
+        self.message_user(request, f"{moved} booking(s) marked as {label}.")
+        if skipped:
+            self.message_user(
+                request, f"{skipped} booking(s) skipped: their status cannot change to {label}.",
+                messages.WARNING,
+            )
+
     def mark_confirmed(self, request, queryset):
-        queryset.update(status='confirmed')
+        self._transition(request, queryset, Booking.Status.CONFIRMED)
     mark_confirmed.short_description = "Mark selected bookings as confirmed"
 
     def mark_completed(self, request, queryset):
-        queryset.update(status='completed')
+        self._transition(request, queryset, Booking.Status.COMPLETED)
     mark_completed.short_description = "Mark selected bookings as completed"
 
     def mark_cancelled(self, request, queryset):
-        queryset.update(status='cancelled')
-    mark_cancelled.short_description = "Mark selected bookings as cancelled"
+        self._transition(request, queryset, Booking.Status.CANCELLED)
+    mark_cancelled.short_description = "Mark selected bookings as cancelled and refund"
 
 
 @admin.register(BookingNote)
 class BookingNoteAdmin(admin.ModelAdmin):
     list_display = ('booking', 'created_at')
+    list_select_related = ('booking__student',)
+    autocomplete_fields = ('booking',)
     search_fields = ('booking__student__email', 'topics_covered', 'homework')
@@ -0,0 +1,189 @@
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+
+from core.cache import bump_tags, invalidate_tags, tag_key, tag_versions
+
+from .models import Booking, TimeSlot
+
+
+# Bookings in these states hold a place in a time slot
+ACTIVE_STATUSES = [Booking.Status.PENDING, Booking.Status.CONFIRMED]
+
+MINUTES_PER_DAY = 24 * 60
+
+# Longest range the availability API will answer in one request (8 weeks)
+MAX_RANGE_DAYS = 56
+
+# Cached days carry this tag's version and are ignored once it moves on.
+# Booking and TimeSlot changes bump it through the core.cache registry.
+CACHE_TAG = 'availability'
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def to_minutes(value):
+    """Convert a time to minutes since midnight."""
+    return value.hour * 60 + value.minute
+
+
+def to_interval(start_time, end_time):
+    """Return a half-open (start, end) interval in minutes.
+
+    An end time at or before the start time is treated as midnight.
+    """
+    start = to_minutes(start_time)
+    end = to_minutes(end_time)
+    if end <= start:
+        end = MINUTES_PER_DAY
+    return start, end
+
+
+def occupancy_profile(intervals):
+    """Build the step function of concurrent bookings for one day.
+
+    Returns parallel sorted lists of breakpoints and the number of bookings
+    running from each breakpoint until the next one.
+    """
+    deltas = defaultdict(int)
+    for start, end in intervals:
+        deltas[start] += 1
+        deltas[end] -= 1
+
+    points, levels = [], []
+    level = 0
+    for minute in sorted(deltas):
+        level += deltas[minute]
+        points.append(minute)
+        levels.append(level)
+    return points, levels
+
+
+def peak_occupancy(profile, start, end):
+    """Return the highest number of concurrent bookings within [start, end)."""
+    points, levels = profile
+    index = bisect_right(points, start) - 1
+    peak = levels[index] if index >= 0 else 0
+    index += 1
+    while index < len(points) and points[index] < end:
+        peak = max(peak, levels[index])
+        index += 1
+    return peak
+
+
+def day_availability(slots, intervals):
+    """Work out capacity for one day's slots given that day's booked intervals."""
+    profile = occupancy_profile(intervals)
+    availability = []
+    for slot in slots:
+        start, end = to_interval(slot.start_time, slot.end_time)
+        booked = peak_occupancy(profile, start, end)
+        availability.append({
+            'start_time': slot.start_time,
+            'end_time': slot.end_time,
+            'capacity': slot.max_students,
+            'booked': booked,
+            'remaining': max(slot.max_students - booked, 0),
+        })
+    return availability
+
+
+def compute_availability(start_date, end_date):
+    """Work out availability for a date range straight from the database.
+
+    The result maps each date to a list of slot dicts in start time order.
+    Exactly two queries are run however many days are requested.
+    """
+    days = (end_date - start_date).days + 1
+    if days <= 0:
+        return {}
+
+    time_slots = TimeSlot.objects.filter(is_available=True).order_by('day_of_week', 'start_time')
+    if days < 7:
+        weekdays = {(start_date + timedelta(days=offset)).weekday() for offset in range(days)}
+        time_slots = time_slots.filter(day_of_week__in=weekdays)
+
+    slots_by_weekday = defaultdict(list)
+    for slot in time_slots:
+        slots_by_weekday[slot.day_of_week].append(slot)
+
+    intervals_by_date = defaultdict(list)
+    bookings = Booking.objects.filter(
+        date__range=(start_date, end_date),
+        status__in=ACTIVE_STATUSES,
+    ).values_list('date', 'start_time', 'end_time')
+    for date, start_time, end_time in bookings:
+        intervals_by_date[date].append(to_interval(start_time, end_time))
+
+    availability = {}
+    for offset in range(days):
+        date = start_date + timedelta(days=offset)
+        availability[date] = day_availability(
+            slots_by_weekday[date.weekday()],
+            intervals_by_date.get(date, ()),
+        )
+    return availability
+
+
+def _date_cache_key(date):
+    return f'bookings:availability:{date.isoformat()}'
+
+
+def bump_version():
+    """Invalidate every cached day of availability."""
+    bump_tags(CACHE_TAG)
+
+
+def invalidate_availability():
+    """Invalidate cached availability once the current transaction commits.
+
+    For bulk updates that bypass the model signals.
+    """
+    invalidate_tags(CACHE_TAG)
+
+
+def availability_for_range(start_date, end_date):
+    """Return availability for every date from start_date to end_date inclusive.
+
+    Days are cached individually alongside the version they were computed at,
+    so a fully cached range costs a single cache read. Missing days are
+    computed together with two queries.
+    """
+    days = (end_date - start_date).days + 1
+    if days <= 0:
+        return {}
+
+    dates = [start_date + timedelta(days=offset) for offset in range(days)]
+    keys = {date: _date_cache_key(date) for date in dates}
+    cached = cache.get_many([tag_key(CACHE_TAG), *keys.values()])
+    version = tag_versions([CACHE_TAG], cached)[CACHE_TAG]
+
+    found = {}
+    missing = []
+    for date in dates:
+        entry = cached.get(keys[date])
+        if entry is not None and entry['version'] == version:
+            found[date] = entry['slots']
+        else:
+            missing.append(date)
+
+    if missing:
+        computed = compute_availability(missing[0], missing[-1])
+        cache.set_many({
+            keys[date]: {'version': version, 'slots': slots}
+            for date, slots in computed.items()
+        }, timeout=CACHE_TIMEOUT)
+        found.update(computed)
+
+    return {date: found[date] for date in dates}
+
+
+def availability_for_date(date):
+    """Return availability for a single date."""
+    return availability_for_range(date, date)[date]
+
+
+def free_slots(slots):
+    """Filter a day's availability down to slots with room left."""
+    return [slot for slot in slots if slot['remaining'] > 0]
@@ -1,7 +1,16 @@
 from django import forms
 from django.conf import settings
+from django.urls import reverse
 from .models import Booking
-from courses.models import Course
+from .services import SlotUnavailable, check_availability
+from courses.models import Course, Topic
+
+
+def topics_for_course(course):
+    """Topics offered for a course (a Course or its pk); none without a course."""
+    if not course:
+        return Topic.objects.none()
+    return Topic.objects.filter(course=course, course__is_published=True).select_related('course')
 
 
 class BookingForm(forms.ModelForm):
@@ -42,7 +51,7 @@ class BookingForm(forms.ModelForm):
             }),
         }
 
-    def __init__(self, *args, user=None, **kwargs):
+    def __init__(self, *args, user=None, course=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.user = user
 
@@ -51,10 +60,26 @@ class BookingForm(forms.ModelForm):
         self.fields['date'].widget.attrs['min'] = timezone.now().date().isoformat()
 
         # Filter courses to published only
-        self.fields['course'].queryset = Course.objects.filter(is_published=True)
+        self.fields['course'].queryset = Course.objects.filter(is_published=True).select_related('level')
         self.fields['course'].required = False
+        self.fields['course'].widget.attrs.update({
+            'hx-get': reverse('bookings:api_topics'),
+            'hx-target': '#id_topic',
+            'hx-trigger': 'change',
+        })
+
+        # Only offer topics from the chosen course; HTMX swaps them in on change
+        self.fields['topic'].queryset = topics_for_course(course or self._selected_course())
+        self.fields['topic'].label_from_instance = lambda topic: topic.title
+        self.fields['topic'].empty_label = 'Any topic'
         self.fields['topic'].required = False
 
+    def _selected_course(self):
+        if self.is_bound:
+            course_id = self.data.get(self.add_prefix('course'), '')
+            return course_id if course_id.isdigit() else None
+        return self.initial.get('course')
+
     def clean(self):
         cleaned_data = super().clean()
         date = cleaned_data.get('date')
@@ -67,6 +92,11 @@ class BookingForm(forms.ModelForm):
             end_time = (start_datetime + timedelta(hours=float(duration))).time()
             cleaned_data['end_time'] = end_time
 
+            try:
+                check_availability(date, start_time, end_time)
+            except SlotUnavailable as e:
+                raise forms.ValidationError(str(e))
+
         return cleaned_data
 
     def save(self, commit=True):
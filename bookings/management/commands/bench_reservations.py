@@ -0,0 +1,97 @@
+import threading
+from datetime import date, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from bookings.models import Booking, TimeSlot
+from bookings.services import SlotUnavailable, reserve_booking
+from core.benchmarks import Timer, throwaway_database
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = 'Fire parallel reservations at one slot and check exactly max_students succeed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20, help='Parallel reservations to fire')
+        parser.add_argument('--capacity', type=int, default=3, help='max_students for the contested slot')
+
+    def handle(self, *args, **options):
+        requests = options['requests']
+        capacity = options['capacity']
+
+        with throwaway_database():
+            students = [
+                User.objects.create_user(f'bench{i}@example.com', 'bench-password')
+                for i in range(requests)
+            ]
+            session_date = date.today() + timedelta(days=28)
+            for offset in range(7):
+                TimeSlot.objects.create(
+                    day_of_week=(session_date + timedelta(days=offset)).weekday(),
+                    start_time=time(16, 0),
+                    end_time=time(17, 0),
+                    max_students=capacity,
+                )
+
+            same_slot = [session_date] * requests
+            with Timer() as contested:
+                succeeded, errors = self._fire(students, same_slot)
+            if errors:
+                raise CommandError(f'Unexpected errors: {errors[:3]}')
+            self.stdout.write(
+                f'Same slot: {succeeded}/{requests} succeeded in {contested.elapsed * 1000:.1f} ms'
+            )
+            if succeeded != capacity:
+                raise CommandError(f'Expected exactly {capacity} reservations, got {succeeded}')
+
+            Booking.objects.all().delete()
+            spread = [session_date + timedelta(weeks=1 + i) for i in range(requests)]
+            with Timer() as uncontested:
+                succeeded, errors = self._fire(students, spread)
+            if errors:
+                raise CommandError(f'Unexpected errors: {errors[:3]}')
+            self.stdout.write(
+                f'Different dates: {succeeded}/{requests} succeeded in {uncontested.elapsed * 1000:.1f} ms'
+            )
+            if succeeded != requests:
+                raise CommandError('Reservations on different dates should all succeed')
+
+        self.stdout.write(self.style.SUCCESS('Reservation benchmark passed'))
+
+    def _fire(self, students, dates):
+        """Reserve one booking per student in parallel threads."""
+        barrier = threading.Barrier(len(students))
+        lock = threading.Lock()
+        results = {'succeeded': 0, 'errors': []}
+
+        def reserve(student, session_date):
+            try:
+                booking = Booking(
+                    student=student,
+                    date=session_date,
+                    start_time=time(16, 0),
+                    end_time=time(17, 0),
+                )
+                barrier.wait()
+                reserve_booking(booking)
+                with lock:
+                    results['succeeded'] += 1
+            except SlotUnavailable:
+                pass
+            except Exception as e:
+                with lock:
+                    results['errors'].append(e)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=reserve, args=(student, session_date))
+            for student, session_date in zip(students, dates)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results['succeeded'], results['errors']
@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bookings.sweep import sweep, sweep_rules
+from bookings.transitions import CHUNK_SIZE
+from core.benchmarks import Timer
+
+
+class Command(BaseCommand):
+    help = 'Complete past bookings, mark unpaid past bookings as no-shows and expire stale pending bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=CHUNK_SIZE, help='Bookings per transaction')
+        parser.add_argument(
+            '--pending-ttl-hours', type=float, default=settings.BOOKING_PENDING_TTL_HOURS,
+            help='Cancel pending bookings created longer ago than this',
+        )
+        parser.add_argument('--max-batches', type=int, help='Stop each sweep after this many batches')
+
+    def handle(self, *args, **options):
+        rules = sweep_rules(pending_ttl=timedelta(hours=options['pending_ttl_hours']))
+        self.stdout.write(f"{'Sweep':<10} {'moved':>8} {'batches':>8} {'seconds':>8} {'rows/s':>8}")
+        total = 0
+        with Timer() as overall:
+            for rule in rules:
+                with Timer() as timer:
+                    moved = list(sweep(rule, options['batch_size'], options['max_batches']))
+                total += sum(moved)
+                rate = sum(moved) / timer.elapsed if timer.elapsed else 0
+                self.stdout.write(
+                    f'{rule[0]:<10} {sum(moved):>8} {len(moved):>8} {timer.elapsed:>8.2f} {rate:>8.0f}'
+                )
+
+        self.stdout.write(self.style.SUCCESS(f'Swept {total} bookings in {overall.elapsed:.2f} s'))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['student', 'status', 'date'], name='bookings_student_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['date', 'status'], name='bookings_date_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(
+                condition=models.Q(('status__in', ['pending', 'confirmed'])),
+                fields=['date', 'start_time', 'end_time'],
+                name='bookings_active_date_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_booking_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['student', '-date', '-start_time', 'id'], name='bookings_student_listing_idx'),
+        ),
+    ]
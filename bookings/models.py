@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.utils import timezone
 
@@ -31,6 +32,31 @@ class TimeSlot(models.Model):
         return f"{self.get_day_of_week_display()} {self.start_time.strftime('%H:%M')} - {self.end_time.strftime('%H:%M')}"
 
 
+class BookingQuerySet(models.QuerySet):
+    def for_listing(self):
+        """Load everything a booking row displays in a single query.
+
+        Joins the student, course and topic, and annotates total_students_count
+        and is_upcoming so the model properties do not query or compute per
+        row. The student count is a correlated subquery rather than a GROUP BY,
+        so ordered, paginated listings can still walk their index.
+        """
+        now = timezone.localtime()
+        additional = (
+            self.model.additional_students.through.objects
+            .filter(booking=models.OuterRef('pk'))
+            .order_by()
+            .values('booking')
+            .annotate(count=models.Count('pk'))
+            .values('count')
+        )
+        upcoming = models.Q(date__gt=now.date()) | models.Q(date=now.date(), start_time__gt=now.time())
+        return self.select_related('student', 'course', 'topic').annotate(
+            total_students_count=models.Value(1) + Coalesce(models.Subquery(additional), 0),
+            is_upcoming=models.ExpressionWrapper(upcoming, output_field=models.BooleanField()),
+        )
+
+
 class Booking(models.Model):
     """A booking for a tutoring session."""
 
@@ -116,8 +142,27 @@ class Booking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BookingQuerySet.as_manager()
+
     class Meta:
         ordering = ['-date', '-start_time']
+        indexes = [
+            # Student dashboards: a student's bookings by status, in date order
+            models.Index(fields=['student', 'status', 'date'], name='bookings_student_status_idx'),
+            # Keyset-paginated booking history, matching BOOKING_ORDERING
+            models.Index(fields=['student', '-date', '-start_time', 'id'], name='bookings_student_listing_idx'),
+            # Availability, capacity and admin lookups by day, and the admin
+            # changelist's newest-first order
+            models.Index(fields=['date', 'status'], name='bookings_date_status_idx'),
+            # Smaller index for availability and capacity checks, which only
+            # count active bookings. SQLite builds it too but cannot match it
+            # against parameterised IN lists, so uses the one above.
+            models.Index(
+                fields=['date', 'start_time', 'end_time'],
+                condition=models.Q(status__in=['pending', 'confirmed']),
+                name='bookings_active_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.student} - {self.date} {self.start_time.strftime('%H:%M')}"
@@ -130,15 +175,24 @@ class Booking(models.Model):
     @property
     def is_upcoming(self):
         """Check if booking is in the future."""
+        if '_is_upcoming' in self.__dict__:
+            return self._is_upcoming
         now = timezone.now()
         booking_datetime = timezone.make_aware(
             timezone.datetime.combine(self.date, self.start_time)
         )
         return booking_datetime > now
 
+    @is_upcoming.setter
+    def is_upcoming(self, value):
+        # Set by the for_listing() annotation
+        self._is_upcoming = value
+
     @property
     def total_students(self):
         """Total number of students in this session."""
+        if 'total_students_count' in self.__dict__:
+            return self.total_students_count
         return 1 + self.additional_students.count()
 
     def calculate_price(self):
@@ -153,6 +207,36 @@ class Booking(models.Model):
         super().save(*args, **kwargs)
 
 
+class BookingTransition(models.Model):
+    """Audit log of booking status changes made through bookings.transitions."""
+
+    class Source(models.TextChoices):
+        ADMIN = 'admin', 'Admin'
+        STUDENT = 'student', 'Student'
+        WEBHOOK = 'webhook', 'Payment Webhook'
+        SYSTEM = 'system', 'Scheduled Job'
+
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='transitions')
+    from_status = models.CharField(max_length=20, choices=Booking.Status.choices)
+    to_status = models.CharField(max_length=20, choices=Booking.Status.choices)
+    source = models.CharField(max_length=20, choices=Source.choices)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    reason = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+
+    def __str__(self):
+        return f"{self.booking_id}: {self.from_status} -> {self.to_status}"
+
+
 class BookingNote(models.Model):
     """Notes and feedback for completed sessions."""
 
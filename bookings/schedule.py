@@ -0,0 +1,136 @@
+from collections import defaultdict
+from datetime import time
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import ExtractIsoWeekDay
+from django.utils import timezone
+
+from .availability import ACTIVE_STATUSES, MINUTES_PER_DAY, invalidate_availability, to_interval
+from .models import Booking, TimeSlot
+
+
+# Weekday evenings and weekend daytimes, one-hour slots for up to three students
+DEFAULT_SCHEDULE = [
+    {'days': [0, 1, 2, 3, 4], 'start': '16:00', 'end': '21:00', 'slot_minutes': 60, 'capacity': 3},
+    {'days': [5, 6], 'start': '09:00', 'end': '18:00', 'slot_minutes': 60, 'capacity': 3},
+]
+
+SLOT_FIELDS = ['end_time', 'max_students', 'is_available']
+
+
+def _parse_minutes(value):
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def _to_time(minutes):
+    return time(minutes // 60, minutes % 60)
+
+
+def expand_schedule(schedule):
+    """Expand schedule blocks into {(day_of_week, start_time): slot fields}.
+
+    Each block gives the days it applies to, the opening and closing times,
+    the slot length and the capacity. Later blocks win where they overlap.
+    """
+    slots = {}
+    for block in schedule:
+        start = _parse_minutes(block['start'])
+        end = _parse_minutes(block['end'])
+        length = int(block.get('slot_minutes', 60))
+        if length <= 0 or not 0 <= start < end <= MINUTES_PER_DAY:
+            raise ValueError(f'Invalid schedule block: {block}')
+
+        for day in block['days']:
+            if day not in TimeSlot.DayOfWeek.values:
+                raise ValueError(f'Invalid day of week {day!r} in schedule block: {block}')
+            for slot_start in range(start, end - length + 1, length):
+                slot_end = slot_start + length
+                slots[(day, _to_time(slot_start))] = {
+                    # A slot ending at midnight is stored as 00:00
+                    'end_time': _to_time(slot_end % MINUTES_PER_DAY),
+                    'max_students': int(block.get('capacity', 3)),
+                    'is_available': block.get('is_available', True),
+                }
+    return slots
+
+
+def _slot_filter(keys):
+    conditions = Q()
+    for day, start_time in keys:
+        conditions |= Q(day_of_week=day, start_time=start_time)
+    return conditions
+
+
+def booked_slots(slots):
+    """Return the keys of slots that an upcoming active booking overlaps.
+
+    slots maps (day_of_week, start_time) to end_time. Bookings are read in
+    one query, reduced to their distinct weekday and times.
+    """
+    intervals = defaultdict(list)
+    bookings = (
+        Booking.objects.filter(date__gte=timezone.localdate(), status__in=ACTIVE_STATUSES)
+        .annotate(weekday=ExtractIsoWeekDay('date'))
+        .values_list('weekday', 'start_time', 'end_time')
+        .distinct()
+    )
+    for weekday, start_time, end_time in bookings:
+        intervals[weekday - 1].append(to_interval(start_time, end_time))
+
+    booked = set()
+    for (day, start_time), end_time in slots.items():
+        start, end = to_interval(start_time, end_time)
+        if any(booked_start < end and start < booked_end for booked_start, booked_end in intervals[day]):
+            booked.add((day, start_time))
+    return booked
+
+
+def apply_schedule(schedule, prune=False):
+    """Bring TimeSlot rows in line with a schedule in a single transaction.
+
+    Existing rows are read in one query and only new or changed slots are
+    written, with one upsert. With prune, slots missing from the schedule are
+    deleted, or only made unavailable while upcoming bookings still use
+    them. Returns (created, updated, pruned) counts.
+    """
+    desired = expand_schedule(schedule)
+
+    with transaction.atomic():
+        existing = {
+            (day, start_time): {'end_time': end_time, 'max_students': max_students, 'is_available': is_available}
+            for day, start_time, end_time, max_students, is_available in TimeSlot.objects.values_list(
+                'day_of_week', 'start_time', *SLOT_FIELDS,
+            )
+        }
+
+        changed = [
+            TimeSlot(day_of_week=day, start_time=start_time, **fields)
+            for (day, start_time), fields in desired.items()
+            if existing.get((day, start_time)) != fields
+        ]
+        created = sum(1 for slot in changed if (slot.day_of_week, slot.start_time) not in existing)
+        TimeSlot.objects.bulk_create(
+            changed,
+            update_conflicts=True,
+            unique_fields=['day_of_week', 'start_time'],
+            update_fields=SLOT_FIELDS,
+        )
+
+        stale = [
+            key for key, fields in existing.items()
+            if key not in desired and fields['is_available']
+        ]
+        if prune and stale:
+            booked = booked_slots({key: existing[key]['end_time'] for key in stale})
+            unused = [key for key in stale if key not in booked]
+            if unused:
+                TimeSlot.objects.filter(_slot_filter(unused)).delete()
+            if booked:
+                TimeSlot.objects.filter(_slot_filter(booked)).update(is_available=False)
+
+        if changed or (prune and stale):
+            invalidate_availability()
+
+    return created, len(changed) - created, len(stale) if prune else 0
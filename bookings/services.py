@@ -0,0 +1,112 @@
+from django.db import connection, transaction
+from django.db.models import F, Q
+
+from .availability import ACTIVE_STATUSES, occupancy_profile, peak_occupancy, to_interval
+from .models import Booking, TimeSlot
+
+
+class SlotUnavailable(Exception):
+    """The requested time is not bookable or has no places left."""
+
+
+def _covering_slots(date, start, end):
+    """Return the available slots that together cover [start, end) on date."""
+    slots = TimeSlot.objects.filter(
+        day_of_week=date.weekday(),
+        is_available=True,
+    ).order_by('start_time')
+
+    covering = []
+    covered_until = start
+    for slot in slots:
+        slot_start, slot_end = to_interval(slot.start_time, slot.end_time)
+        if slot_end <= start or slot_start >= end:
+            continue
+        if slot_start > covered_until:
+            break
+        covering.append(slot)
+        covered_until = max(covered_until, slot_end)
+
+    if not covering or covered_until < end:
+        raise SlotUnavailable('Sessions are not available at that time. Please choose another slot.')
+    return covering
+
+
+def _check_capacity(date, start, end, slots):
+    """Raise SlotUnavailable if any slot would go over its max_students."""
+    intervals = [
+        to_interval(start_time, end_time)
+        for start_time, end_time in Booking.objects.filter(
+            date=date,
+            status__in=ACTIVE_STATUSES,
+        ).values_list('start_time', 'end_time')
+    ]
+    profile = occupancy_profile(intervals)
+
+    for slot in slots:
+        slot_start, slot_end = to_interval(slot.start_time, slot.end_time)
+        booked = peak_occupancy(profile, max(start, slot_start), min(end, slot_end))
+        if booked >= slot.max_students:
+            raise SlotUnavailable('That slot is fully booked. Please choose another time.')
+
+
+def check_availability(date, start_time, end_time):
+    """Check a booking would fit without taking any locks.
+
+    Used for early form validation; reserve_booking repeats the check under a
+    lock before inserting.
+    """
+    start, end = to_interval(start_time, end_time)
+    slots = _covering_slots(date, start, end)
+    _check_capacity(date, start, end, slots)
+    return slots
+
+
+def _lock_slots(date, slots):
+    """Serialize reservations for the given slots on one date.
+
+    PostgreSQL takes a transaction-scoped advisory lock per (slot, date) so
+    bookings for other dates never wait. Other backends with row locks lock
+    the slot rows themselves.
+    """
+    slot_ids = sorted(slot.pk for slot in slots)
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            for slot_id in slot_ids:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [slot_id, date.toordinal()])
+    elif connection.features.has_select_for_update:
+        list(TimeSlot.objects.select_for_update().filter(pk__in=slot_ids).order_by('pk'))
+
+
+def _acquire_sqlite_write_lock(date, start_time, end_time):
+    # SQLite ignores SELECT ... FOR UPDATE and has a single, database-wide
+    # write lock, so writers are serialized whatever rows they touch. Start
+    # the transaction with a no-op write to the slots the booking could
+    # cover: taking the write lock before any read stops two transactions
+    # from both counting the same free place. The overlap test is in SQL,
+    # as reading the slots first would defeat the point.
+    slots = TimeSlot.objects.filter(day_of_week=date.weekday())
+    # Slots ending at midnight store an end time at or before their start
+    slots = slots.filter(Q(end_time__gt=start_time) | Q(end_time__lte=F('start_time')))
+    if end_time > start_time:
+        slots = slots.filter(start_time__lt=end_time)
+    slots.update(max_students=F('max_students'))
+
+
+def reserve_booking(booking):
+    """Atomically check capacity and insert an unsaved booking.
+
+    Raises SlotUnavailable if the booking falls outside the published slots
+    or any slot it covers is already full.
+    """
+    start, end = to_interval(booking.start_time, booking.end_time)
+
+    with transaction.atomic():
+        if connection.vendor == 'sqlite':
+            _acquire_sqlite_write_lock(booking.date, booking.start_time, booking.end_time)
+        slots = _covering_slots(booking.date, start, end)
+        _lock_slots(booking.date, slots)
+        _check_capacity(booking.date, start, end, slots)
+        booking.save()
+
+    return booking
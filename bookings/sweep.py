@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.pagination import KeysetPaginator
+
+from .models import Booking, BookingTransition
+from .transitions import CHUNK_SIZE, transition_bookings
+
+
+# Batches seek on the date indexes. On PostgreSQL that is the partial index
+# on active bookings, which swept rows drop out of.
+SWEEP_ORDERING = ('date', 'id')
+
+
+def ended_before(now):
+    """Match bookings whose session finished before now (local time)."""
+    today = now.date()
+    # An end time at or before the start time means midnight, so never today
+    return Q(date__lt=today) | Q(date=today, end_time__lte=now.time(), end_time__gt=F('start_time'))
+
+
+def sweep_rules(now=None, pending_ttl=None):
+    """Return (name, bookings, to_status, reason) for each sweep, in order.
+
+    Past bookings are settled first, so an unpaid booking whose session has
+    gone is recorded as a no-show rather than an expired reservation.
+    pending_ttl defaults to settings.BOOKING_PENDING_TTL_HOURS.
+    """
+    now = now or timezone.localtime()
+    if pending_ttl is None:
+        pending_ttl = timedelta(hours=settings.BOOKING_PENDING_TTL_HOURS)
+    ended = ended_before(now)
+    cutoff = now - pending_ttl
+    return [
+        (
+            'completed',
+            Booking.objects.filter(ended, status=Booking.Status.CONFIRMED),
+            Booking.Status.COMPLETED, 'Session has finished',
+        ),
+        (
+            'no_show',
+            Booking.objects.filter(ended, status=Booking.Status.PENDING),
+            Booking.Status.NO_SHOW, 'Session finished without payment',
+        ),
+        (
+            'expired',
+            Booking.objects.filter(status=Booking.Status.PENDING, created_at__lt=cutoff),
+            Booking.Status.CANCELLED, f'Unpaid after {pending_ttl.total_seconds() / 3600:g} hours',
+        ),
+    ]
+
+
+def sweep(rule, batch_size=CHUNK_SIZE, max_batches=None):
+    """Apply one sweep rule a batch at a time, yielding the count moved per batch.
+
+    Each batch is a keyset page over SWEEP_ORDERING, so it costs the same
+    however many rows earlier batches moved, and rows another process
+    changed meanwhile are skipped rather than read again. Batches are
+    capped at CHUNK_SIZE, as their ids are passed as query parameters.
+    """
+    _, bookings, to_status, reason = rule
+    per_page = min(batch_size, CHUNK_SIZE)
+    paginator = KeysetPaginator(bookings.only(*SWEEP_ORDERING), SWEEP_ORDERING, per_page=per_page)
+    cursor = None
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        page = paginator.page(cursor)
+        if not page:
+            return
+        yield transition_bookings(
+            Booking.objects.filter(id__in=[booking.id for booking in page]),
+            to_status, BookingTransition.Source.SYSTEM, reason=reason,
+        )
+        batches += 1
+        if not page.has_next:
+            return
+        cursor = page.next_cursor
@@ -1,3 +1,322 @@
-from django.test import TestCase
+from datetime import date, datetime, time, timedelta
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import OutboundEmail, User
+from payments.models import Payment, Refund
+
+from .availability import (
+    availability_for_date, availability_for_range, compute_availability, occupancy_profile, peak_occupancy,
+    to_interval,
+)
+from .models import Booking, BookingTransition, TimeSlot
+from .schedule import apply_schedule
+from .services import SlotUnavailable, reserve_booking
+from .sweep import sweep, sweep_rules
+from .transitions import transition_bookings
+
+# A Monday
+MONDAY = date(2026, 3, 2)
+
+
+class BookingTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('student@example.com', 'password')
+        TimeSlot.objects.bulk_create(
+            TimeSlot(day_of_week=MONDAY.weekday(), start_time=time(hour), end_time=time(hour + 1), max_students=2)
+            for hour in (16, 17, 18)
+        )
+
+    def make_booking(self, start, end, status=Booking.Status.PENDING, day=MONDAY):
+        return Booking.objects.create(
+            student=self.student, date=day, start_time=start, end_time=end, price=6000, status=status,
+        )
+
+
+class IntervalTests(TestCase):
+
+    def test_midnight_end_closes_the_day(self):
+        self.assertEqual(to_interval(time(23), time(0)), (23 * 60, 24 * 60))
+
+    def test_peak_occupancy(self):
+        profile = occupancy_profile([to_interval(time(16), time(18)), to_interval(time(16, 30), time(17, 30))])
+        self.assertEqual(peak_occupancy(profile, 15 * 60, 16 * 60), 0)
+        self.assertEqual(peak_occupancy(profile, 16 * 60, 17 * 60), 2)
+        self.assertEqual(peak_occupancy(profile, 17 * 60, 18 * 60), 2)
+        self.assertEqual(peak_occupancy(profile, 18 * 60, 19 * 60), 0)
+
+    def test_back_to_back_bookings_do_not_overlap(self):
+        profile = occupancy_profile([to_interval(time(16), time(17)), to_interval(time(17), time(18))])
+        self.assertEqual(peak_occupancy(profile, 16 * 60, 17 * 60), 1)
+        self.assertEqual(peak_occupancy(profile, 17 * 60, 18 * 60), 1)
+
+
+class ComputeAvailabilityTests(BookingTestCase):
+
+    def remaining(self, day=MONDAY):
+        with self.assertNumQueries(2):
+            slots = compute_availability(day, day)[day]
+        return [slot['remaining'] for slot in slots]
+
+    def test_two_hour_booking_blocks_both_slots(self):
+        self.make_booking(time(16), time(18))
+        self.assertEqual(self.remaining(), [1, 1, 2])
+
+    def test_off_grid_booking_counts_against_every_slot_it_touches(self):
+        self.make_booking(time(16, 30), time(17, 30))
+        self.make_booking(time(17), time(18))
+        self.assertEqual(self.remaining(), [1, 0, 2])
+
+    def test_only_active_bookings_hold_places(self):
+        for status in (Booking.Status.CANCELLED, Booking.Status.COMPLETED, Booking.Status.CONFIRMED):
+            self.make_booking(time(18), time(19), status=status)
+        self.assertEqual(self.remaining(), [2, 2, 1])
+
+    def test_days_without_slots_are_empty(self):
+        self.assertEqual(self.remaining(date(2026, 3, 3)), [])
+
+
+class AvailabilityCacheTests(BookingTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def remaining(self):
+        return [slot['remaining'] for slot in availability_for_date(MONDAY)]
+
+    def test_cold_range_costs_two_queries_and_warm_none(self):
+        with self.assertNumQueries(2):
+            cold = availability_for_range(MONDAY, date(2026, 3, 15))
+        with self.assertNumQueries(0):
+            warm = availability_for_range(MONDAY, date(2026, 3, 15))
+        self.assertEqual(warm, cold)
+        self.assertEqual(len(warm), 14)
+
+    def test_new_booking_invalidates_on_commit(self):
+        self.assertEqual(self.remaining(), [2, 2, 2])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_booking(time(16), time(17))
+        self.assertEqual(self.remaining(), [1, 2, 2])
+
+    def test_cancelled_booking_frees_its_place(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.make_booking(time(16), time(17))
+        self.assertEqual(self.remaining(), [1, 2, 2])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status = Booking.Status.CANCELLED
+            booking.save()
+        self.assertEqual(self.remaining(), [2, 2, 2])
+
+    def test_time_slot_change_invalidates(self):
+        self.remaining()
+        with self.captureOnCommitCallbacks(execute=True):
+            TimeSlot.objects.filter(start_time=time(18)).get().delete()
+        self.assertEqual(self.remaining(), [2, 2])
+
+
+class ReserveBookingTests(BookingTestCase):
+
+    def reserve(self, start, end):
+        return reserve_booking(Booking(
+            student=self.student, date=MONDAY, start_time=start, end_time=end, price=6000,
+        ))
+
+    def test_rejected_once_capacity_is_reached(self):
+        self.reserve(time(16), time(17))
+        self.reserve(time(16), time(17))
+        with self.assertRaisesMessage(SlotUnavailable, 'fully booked'):
+            self.reserve(time(16), time(17))
+        self.assertEqual(Booking.objects.count(), 2)
+
+    def test_long_booking_needs_room_in_every_slot(self):
+        self.make_booking(time(17), time(18))
+        self.make_booking(time(17), time(18))
+        with self.assertRaises(SlotUnavailable):
+            self.reserve(time(16), time(18))
+        self.reserve(time(18), time(19))
+
+    def test_off_grid_booking_is_checked_against_both_slots(self):
+        self.make_booking(time(17), time(18))
+        self.make_booking(time(17), time(18))
+        with self.assertRaises(SlotUnavailable):
+            self.reserve(time(16, 30), time(17, 30))
+
+    def test_cancelled_bookings_free_their_place(self):
+        self.make_booking(time(16), time(17), status=Booking.Status.CANCELLED)
+        self.make_booking(time(16), time(17))
+        self.assertIsNotNone(self.reserve(time(16), time(17)).pk)
+
+    def test_outside_published_slots(self):
+        with self.assertRaisesMessage(SlotUnavailable, 'not available'):
+            self.reserve(time(18), time(20))
+        with self.assertRaisesMessage(SlotUnavailable, 'not available'):
+            self.reserve(time(9), time(10))
+
+
+class ApplyScheduleTests(TestCase):
+
+    SCHEDULE = [
+        {'days': [0, 1], 'start': '16:00', 'end': '19:00', 'slot_minutes': 60, 'capacity': 2},
+    ]
+
+    def test_second_run_writes_nothing(self):
+        self.assertEqual(apply_schedule(self.SCHEDULE), (6, 0, 0))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(apply_schedule(self.SCHEDULE), (0, 0, 0))
+        self.assertEqual([query['sql'].split()[0] for query in queries], ['SAVEPOINT', 'SELECT', 'RELEASE'])
+
+    def test_changed_slots_are_updated(self):
+        apply_schedule(self.SCHEDULE)
+        schedule = [{**self.SCHEDULE[0], 'capacity': 4}]
+        self.assertEqual(apply_schedule(schedule), (0, 6, 0))
+        self.assertEqual(set(TimeSlot.objects.values_list('max_students', flat=True)), {4})
+
+    def test_prune_only_deletes_slots_without_upcoming_bookings(self):
+        apply_schedule(self.SCHEDULE)
+        # Next Monday's 18:00 slot is still booked when Mondays shrink to 16:00-18:00
+        today = timezone.localdate()
+        monday = today + timedelta(days=7 - today.weekday())
+        Booking.objects.create(
+            student=User.objects.create_user('student@example.com', 'password'),
+            date=monday, start_time=time(18), end_time=time(19), price=6000,
+        )
+        schedule = [
+            {'days': [0], 'start': '16:00', 'end': '18:00'},
+            {'days': [1], 'start': '16:00', 'end': '19:00', 'capacity': 2},
+        ]
+
+        self.assertEqual(apply_schedule(schedule), (0, 2, 0))
+        self.assertEqual(apply_schedule(schedule, prune=True), (0, 0, 1))
+        slot = TimeSlot.objects.get(day_of_week=0, start_time=time(18))
+        self.assertFalse(slot.is_available)
+
+        Booking.objects.update(status=Booking.Status.CANCELLED)
+        self.assertEqual(apply_schedule(schedule, prune=True), (0, 0, 0))
+        self.assertTrue(TimeSlot.objects.filter(pk=slot.pk).exists())
+
+
+class TransitionTests(BookingTestCase):
+
+    def test_allowed_moves_are_applied_and_logged(self):
+        pending = self.make_booking(time(16), time(17))
+        completed = self.make_booking(time(17), time(18), status=Booking.Status.COMPLETED)
+
+        moved = transition_bookings(
+            Booking.objects.all(), Booking.Status.CONFIRMED, BookingTransition.Source.ADMIN, reason='Checked by hand',
+        )
+
+        self.assertEqual(moved, 1)
+        pending.refresh_from_db()
+        completed.refresh_from_db()
+        self.assertEqual(pending.status, Booking.Status.CONFIRMED)
+        # Completed bookings cannot be confirmed again
+        self.assertEqual(completed.status, Booking.Status.COMPLETED)
+
+        log = BookingTransition.objects.get()
+        self.assertEqual(
+            (log.booking_id, log.from_status, log.to_status, log.reason),
+            (pending.id, Booking.Status.PENDING, Booking.Status.CONFIRMED, 'Checked by hand'),
+        )
+
+    def test_status_emails_are_queued_in_the_outbox(self):
+        for hour in (16, 17):
+            self.make_booking(time(hour), time(hour + 1))
+
+        # Queued in the same transaction, without waiting for the commit or the email provider
+        transition_bookings(Booking.objects.all(), Booking.Status.CONFIRMED, BookingTransition.Source.ADMIN)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(list(OutboundEmail.objects.values_list('to', flat=True)), [[self.student.email]] * 2)
+        self.assertEqual(OutboundEmail.objects.filter(subject__contains='booking confirmed').count(), 2)
+
+    def test_nothing_to_move(self):
+        self.make_booking(time(16), time(17), status=Booking.Status.CANCELLED)
+        moved = transition_bookings(Booking.objects.all(), Booking.Status.CONFIRMED, BookingTransition.Source.ADMIN)
+        self.assertEqual(moved, 0)
+        self.assertFalse(BookingTransition.objects.exists())
+
+    def test_cancelling_a_paid_booking_queues_its_refund(self):
+        booking = self.make_booking(time(16), time(17), status=Booking.Status.CONFIRMED)
+        payment = Payment.objects.create(
+            user=self.student, booking=booking, amount=6000, status=Payment.Status.COMPLETED,
+        )
+
+        transition_bookings(
+            Booking.objects.filter(pk=booking.pk), Booking.Status.CANCELLED,
+            BookingTransition.Source.STUDENT, actor=self.student, reason='Cannot make it',
+        )
+
+        refund = payment.refunds.get()
+        self.assertEqual((refund.status, refund.amount, refund.reason), (Refund.Status.PENDING, 6000, 'Cannot make it'))
+
+    def test_notify_false_sends_no_email(self):
+        self.make_booking(time(16), time(17))
+        transition_bookings(
+            Booking.objects.all(), Booking.Status.CANCELLED, BookingTransition.Source.SYSTEM, notify=False,
+        )
+        self.assertFalse(OutboundEmail.objects.exists())
+
+
+class SweepTests(BookingTestCase):
+    # Monday 17:30, part way through the day's sessions
+    NOW = timezone.make_aware(datetime(2026, 3, 2, 17, 30))
+
+    def make_booking(self, start, end, status=Booking.Status.PENDING, day=MONDAY, age=timedelta(hours=1)):
+        booking = super().make_booking(start, end, status, day)
+        Booking.objects.filter(pk=booking.pk).update(created_at=self.NOW - age)
+        return booking
+
+    def run_sweeps(self, **kwargs):
+        return {rule[0]: sum(sweep(rule, **kwargs)) for rule in sweep_rules(self.NOW)}
+
+    def status(self, booking):
+        booking.refresh_from_db()
+        return booking.status
+
+    def test_finished_confirmed_bookings_are_completed(self):
+        finished = self.make_booking(time(16), time(17), status=Booking.Status.CONFIRMED)
+        yesterday = self.make_booking(
+            time(18), time(19), status=Booking.Status.CONFIRMED, day=MONDAY - timedelta(days=1),
+        )
+        later = self.make_booking(time(18), time(19), status=Booking.Status.CONFIRMED)
+        running = self.make_booking(time(17), time(18), status=Booking.Status.CONFIRMED)
+
+        self.assertEqual(self.run_sweeps(), {'completed': 2, 'no_show': 0, 'expired': 0})
+        self.assertEqual(
+            [self.status(booking) for booking in (finished, yesterday, later, running)],
+            [Booking.Status.COMPLETED, Booking.Status.COMPLETED, Booking.Status.CONFIRMED, Booking.Status.CONFIRMED],
+        )
+        self.assertEqual(
+            set(BookingTransition.objects.values_list('source', 'reason')),
+            {(BookingTransition.Source.SYSTEM, 'Session has finished')},
+        )
+
+    @override_settings(BOOKING_PENDING_TTL_HOURS=48)
+    def test_stale_pending_bookings_are_cancelled_after_the_ttl(self):
+        next_week = MONDAY + timedelta(days=7)
+        stale = self.make_booking(time(16), time(17), day=next_week, age=timedelta(hours=49))
+        fresh = self.make_booking(time(17), time(18), day=next_week, age=timedelta(hours=47))
+
+        self.assertEqual(self.run_sweeps(), {'completed': 0, 'no_show': 0, 'expired': 1})
+        self.assertEqual(self.status(stale), Booking.Status.CANCELLED)
+        self.assertEqual(self.status(fresh), Booking.Status.PENDING)
+        self.assertEqual(BookingTransition.objects.get().reason, 'Unpaid after 48 hours')
+
+    def test_finished_unpaid_bookings_are_no_shows_not_expired(self):
+        booking = self.make_booking(time(16), time(17), age=timedelta(days=7))
+        self.assertEqual(self.run_sweeps(), {'completed': 0, 'no_show': 1, 'expired': 0})
+        self.assertEqual(self.status(booking), Booking.Status.NO_SHOW)
+
+    def test_sweeps_run_in_batches(self):
+        for days in range(1, 6):
+            self.make_booking(time(16), time(17), status=Booking.Status.CONFIRMED, day=MONDAY - timedelta(days=days))
+        rule = sweep_rules(self.NOW)[0]
+        self.assertEqual(list(sweep(rule, batch_size=2)), [2, 2, 1])
+        self.assertEqual(list(sweep(rule)), [])
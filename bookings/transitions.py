@@ -0,0 +1,105 @@
+import logging
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from core.context_processors import site_settings
+from payments.refunds import queue_refunds
+
+from .availability import invalidate_availability
+from .models import Booking, BookingTransition
+
+
+logger = logging.getLogger(__name__)
+
+# Allowed moves, from status to the statuses it may become
+TRANSITIONS = {
+    Booking.Status.PENDING: {Booking.Status.CONFIRMED, Booking.Status.CANCELLED, Booking.Status.NO_SHOW},
+    Booking.Status.CONFIRMED: {Booking.Status.COMPLETED, Booking.Status.CANCELLED, Booking.Status.NO_SHOW},
+}
+
+# Students are emailed when their booking moves to one of these
+NOTIFY_STATUSES = {Booking.Status.CONFIRMED, Booking.Status.CANCELLED}
+
+# Rows per UPDATE and per email batch. Kept under the database's bound
+# parameter limit (999 on SQLite) with room for the other parameters.
+CHUNK_SIZE = min(5000, (connection.features.max_query_params or 5000) - 10)
+
+
+def chunks(items, size=CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def allowed_from(to_status):
+    """Return the statuses a booking may move to to_status from."""
+    return [status for status, targets in TRANSITIONS.items() if to_status in targets]
+
+
+def transition_bookings(bookings, to_status, source, actor=None, reason='', notify=True):
+    """Move every booking in the queryset that may become to_status, in bulk.
+
+    Bookings whose current status does not allow the move are left alone.
+    The moved rows are updated a chunk at a time, logged with one
+    bulk_create, and their side effects batched: refunds and status emails
+    are queued in the same transaction, while cache bumps wait for the
+    commit. Returns the number of bookings moved.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            bookings.filter(status__in=allowed_from(to_status))
+            .select_for_update(of=('self',))
+            .order_by('id')
+            .values_list('id', 'status')
+        )
+        if not rows:
+            return 0
+
+        ids = [booking_id for booking_id, _ in rows]
+        for chunk in chunks(ids):
+            Booking.objects.filter(id__in=chunk).update(status=to_status, updated_at=now)
+            if to_status == Booking.Status.CANCELLED:
+                queue_refunds(chunk, reason or 'Booking cancelled')
+        BookingTransition.objects.bulk_create(
+            (
+                BookingTransition(
+                    booking_id=booking_id, from_status=from_status, to_status=to_status,
+                    source=source, actor=actor, reason=reason[:200],
+                )
+                for booking_id, from_status in rows
+            ),
+            batch_size=CHUNK_SIZE,
+        )
+
+        invalidate_availability()
+        if notify and to_status in NOTIFY_STATUSES:
+            send_status_emails(ids)
+
+    return len(ids)
+
+
+def send_status_emails(booking_ids):
+    """Queue an email to each student with the new status of their booking.
+
+    Always written to the outbox, whatever EMAIL_BACKEND is, so a bulk admin
+    action never waits on the email provider; send_outbox delivers them.
+    """
+    site = site_settings(None)
+    sent = 0
+    with get_connection('core.email_backend.OutboxEmailBackend') as mail:
+        for chunk in chunks(booking_ids):
+            bookings = Booking.objects.filter(id__in=chunk).select_related('student', 'course')
+            sent += mail.send_messages([
+                EmailMessage(
+                    subject=f"{site['SITE_NAME']}: booking {booking.get_status_display().lower()}",
+                    body=render_to_string('bookings/emails/status_changed.txt', {'booking': booking, **site}),
+                    to=[booking.student.email],
+                )
+                for booking in bookings
+            ]) or 0
+    if sent < len(booking_ids):
+        logger.warning('Queued %d of %d booking status emails', sent, len(booking_ids))
+    return sent
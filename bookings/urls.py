@@ -11,4 +11,6 @@ urlpatterns = [
     path('<int:pk>/cancel/', views.booking_cancel, name='cancel'),
     path('calendar/', views.availability_calendar, name='calendar'),
     path('api/slots/', views.available_slots, name='api_slots'),
+    path('api/slots/range/', views.available_slots_range, name='api_slots_range'),
+    path('api/topics/', views.topic_options, name='api_topics'),
 ]
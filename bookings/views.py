@@ -6,25 +6,31 @@ from django.http import JsonResponse
 from django.utils import timezone
 from datetime import datetime, timedelta
 
-from .models import Booking, TimeSlot
-from .forms import BookingForm
+from .availability import (
+    MAX_RANGE_DAYS, availability_for_date, availability_for_range, free_slots,
+)
+from .models import Booking, BookingTransition
+from .forms import BookingForm, topics_for_course
+from .services import SlotUnavailable, reserve_booking
+from .transitions import transition_bookings
+from core.pagination import BOOKING_ORDERING, paginate, render_paginated
 from courses.models import Course
 
 
 @login_required
 def booking_list(request):
-    """List user's bookings."""
-    bookings = Booking.objects.filter(student=request.user)
+    """List user's bookings, a page at a time."""
+    bookings = Booking.objects.for_listing().filter(student=request.user)
 
     status = request.GET.get('status')
     if status:
         bookings = bookings.filter(status=status)
 
     context = {
-        'bookings': bookings,
+        'bookings': paginate(request, bookings, BOOKING_ORDERING),
         'current_status': status,
     }
-    return render(request, 'bookings/list.html', context)
+    return render_paginated(request, 'bookings/list.html', 'bookings/partials/booking_rows.html', context)
 
 
 @login_required
@@ -35,26 +41,29 @@ def booking_create(request, course_slug=None):
         course = get_object_or_404(Course, slug=course_slug, is_published=True)
 
     if request.method == 'POST':
-        form = BookingForm(request.POST, user=request.user)
+        form = BookingForm(request.POST, user=request.user, course=course)
         if form.is_valid():
             booking = form.save(commit=False)
             booking.student = request.user
             if course:
                 booking.course = course
-            booking.save()
-            if settings.PAYMENTS_ENABLED:
-                messages.success(request, 'Booking created! Please proceed to payment.')
-                return redirect('payments:checkout', booking_id=booking.id)
-            else:
+            if not settings.PAYMENTS_ENABLED:
                 booking.status = 'confirmed'
-                booking.save()
+            try:
+                reserve_booking(booking)
+            except SlotUnavailable as e:
+                form.add_error(None, str(e))
+            else:
+                if settings.PAYMENTS_ENABLED:
+                    messages.success(request, 'Booking created! Please proceed to payment.')
+                    return redirect('payments:checkout', booking_id=booking.id)
                 messages.success(request, 'Booking confirmed!')
                 return redirect('bookings:detail', pk=booking.id)
     else:
         initial = {}
         if course:
             initial['course'] = course
-        form = BookingForm(user=request.user, initial=initial)
+        form = BookingForm(user=request.user, course=course, initial=initial)
 
     context = {
         'form': form,
@@ -66,53 +75,70 @@ def booking_create(request, course_slug=None):
 @login_required
 def booking_detail(request, pk):
     """View booking details."""
-    booking = get_object_or_404(Booking, pk=pk, student=request.user)
+    booking = get_object_or_404(Booking.objects.select_related('course'), pk=pk, student=request.user)
     return render(request, 'bookings/detail.html', {'booking': booking})
 
 
 @login_required
 def booking_cancel(request, pk):
     """Cancel a booking."""
-    booking = get_object_or_404(Booking, pk=pk, student=request.user)
+    booking = get_object_or_404(Booking.objects.select_related('course'), pk=pk, student=request.user)
 
     if booking.status not in ['pending', 'confirmed']:
         messages.error(request, 'This booking cannot be cancelled.')
         return redirect('bookings:detail', pk=pk)
 
     if request.method == 'POST':
-        booking.status = 'cancelled'
-        booking.save()
+        transition_bookings(
+            Booking.objects.filter(pk=booking.pk), Booking.Status.CANCELLED,
+            BookingTransition.Source.STUDENT, actor=request.user, reason='Cancelled by student',
+        )
         messages.success(request, 'Booking cancelled successfully.')
-        # TODO: Process refund if payment was made
         return redirect('dashboard:my_bookings')
 
     return render(request, 'bookings/cancel.html', {'booking': booking})
 
 
+@login_required
+def topic_options(request):
+    """Topic <option> list for the chosen course (for HTMX)."""
+    course_id = request.GET.get('course', '')
+    topics = topics_for_course(course_id if course_id.isdigit() else None)
+    return render(request, 'bookings/partials/topic_options.html', {'topics': topics})
+
+
 def availability_calendar(request):
     """Show availability calendar."""
-    # Get available time slots
-    time_slots = TimeSlot.objects.filter(is_available=True)
-
-    # Get existing bookings for the next 4 weeks
     start_date = timezone.now().date()
     end_date = start_date + timedelta(weeks=4)
 
-    existing_bookings = Booking.objects.filter(
-        date__gte=start_date,
-        date__lte=end_date,
-        status__in=['confirmed', 'pending']
-    ).values('date', 'start_time')
+    availability = availability_for_range(start_date, end_date)
+    calendar_days = [
+        {'date': date, 'slots': slots}
+        for date, slots in availability.items()
+        if slots
+    ]
 
     context = {
-        'time_slots': time_slots,
-        'existing_bookings': list(existing_bookings),
+        'calendar_days': calendar_days,
         'start_date': start_date,
         'end_date': end_date,
     }
     return render(request, 'bookings/calendar.html', context)
 
 
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _slot_json(slot):
+    return {
+        'start_time': slot['start_time'].strftime('%H:%M'),
+        'end_time': slot['end_time'].strftime('%H:%M'),
+        'remaining': slot['remaining'],
+    }
+
+
 def available_slots(request):
     """API endpoint for available time slots (for HTMX)."""
     date_str = request.GET.get('date')
@@ -120,30 +146,36 @@ def available_slots(request):
         return JsonResponse({'error': 'Date required'}, status=400)
 
     try:
-        date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        date = _parse_date(date_str)
     except ValueError:
         return JsonResponse({'error': 'Invalid date format'}, status=400)
 
-    day_of_week = date.weekday()
+    available = [_slot_json(slot) for slot in free_slots(availability_for_date(date))]
 
-    # Get time slots for this day
-    time_slots = TimeSlot.objects.filter(
-        day_of_week=day_of_week,
-        is_available=True
-    )
+    return JsonResponse({'slots': available})
 
-    # Get booked slots for this date
-    booked_times = Booking.objects.filter(
-        date=date,
-        status__in=['confirmed', 'pending']
-    ).values_list('start_time', flat=True)
 
-    available = []
-    for slot in time_slots:
-        if slot.start_time not in booked_times:
-            available.append({
-                'start_time': slot.start_time.strftime('%H:%M'),
-                'end_time': slot.end_time.strftime('%H:%M'),
-            })
+def available_slots_range(request):
+    """API endpoint for available time slots across a date range (for HTMX)."""
+    start_str = request.GET.get('start')
+    end_str = request.GET.get('end')
+    if not start_str or not end_str:
+        return JsonResponse({'error': 'Start and end dates required'}, status=400)
 
-    return JsonResponse({'slots': available})
+    try:
+        start_date = _parse_date(start_str)
+        end_date = _parse_date(end_str)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid date format'}, status=400)
+
+    if end_date < start_date:
+        return JsonResponse({'error': 'End date is before start date'}, status=400)
+    if (end_date - start_date).days >= MAX_RANGE_DAYS:
+        return JsonResponse({'error': f'Date range cannot exceed {MAX_RANGE_DAYS} days'}, status=400)
+
+    days = {
+        date.isoformat(): [_slot_json(slot) for slot in free_slots(slots)]
+        for date, slots in availability_for_range(start_date, end_date).items()
+    }
+
+    return JsonResponse({'days': days})
@@ -4,6 +4,8 @@ Django settings for TuitionHub - CS Tuition Platform
 
 from pathlib import Path
 import os
+import sys
+import tempfile
 import environ
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -117,7 +119,20 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# STATICFILES_STORAGE is ignored since Django 5.1, so hashed names need STORAGES
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+
+# Static copies of the public pages, written by manage.py prerender_public.
+# With SERVE_PRERENDERED on, anonymous visitors to those pages get the file
+# from disk instead of a render; missing pages fall back to the view. Deploy
+# step: run collectstatic, then prerender_public (or keep prerender_public
+# --interval 60 running beside the web process). No restart is needed, as
+# each request reads the current file.
+PRERENDER_ROOT = Path(env('PRERENDER_ROOT', default=str(BASE_DIR / 'prerendered')))
+SERVE_PRERENDERED = env.bool('SERVE_PRERENDERED', default=False)
 
 # Media files (uploads)
 MEDIA_URL = 'media/'
@@ -159,11 +174,22 @@ CRISPY_TEMPLATE_PACK = 'tailwind'
 
 # Email Configuration - Resend
 RESEND_API_KEY = env('RESEND_API_KEY', default='')
+RESEND_RATE_LIMIT = env.float('RESEND_RATE_LIMIT', default=2.0)  # API calls per second
+RESEND_MAX_WORKERS = env.int('RESEND_MAX_WORKERS', default=4)  # threads for emails with attachments
 
 if DEBUG:
-    EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+    EMAIL_DELIVERY_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+else:
+    EMAIL_DELIVERY_BACKEND = 'core.email_backend.ResendEmailBackend'
+
+# With the outbox on, mail is queued in the database and delivered by `manage.py send_outbox`.
+# Booking status emails always go through the outbox, so a send_outbox worker
+# must run in every deployment; EMAIL_OUTBOX=True sends all other mail that way too.
+if env.bool('EMAIL_OUTBOX', default=False):
+    EMAIL_BACKEND = 'core.email_backend.OutboxEmailBackend'
 else:
-    EMAIL_BACKEND = 'core.email_backend.ResendEmailBackend'
+    EMAIL_BACKEND = EMAIL_DELIVERY_BACKEND
+EMAIL_OUTBOX_MAX_ATTEMPTS = env.int('EMAIL_OUTBOX_MAX_ATTEMPTS', default=6)
 
 DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default='TuitionHub <noreply@tuitionhub.co.uk>')
 
@@ -171,6 +197,13 @@ DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default='TuitionHub <noreply@tuit
 SUMUP_API_KEY = env('SUMUP_API_KEY', default='')
 SUMUP_MERCHANT_CODE = env('SUMUP_MERCHANT_CODE', default='')
 SUMUP_API_URL = 'https://api.sumup.com/v0.1'
+SUMUP_CONNECT_TIMEOUT = env.float('SUMUP_CONNECT_TIMEOUT', default=3.05)
+SUMUP_READ_TIMEOUT = env.float('SUMUP_READ_TIMEOUT', default=10.0)
+SUMUP_MAX_RETRIES = env.int('SUMUP_MAX_RETRIES', default=2)
+SUMUP_POOL_SIZE = env.int('SUMUP_POOL_SIZE', default=10)
+SUMUP_CIRCUIT_FAILURES = env.int('SUMUP_CIRCUIT_FAILURES', default=5)  # consecutive failures before failing fast
+SUMUP_CIRCUIT_RESET = env.float('SUMUP_CIRCUIT_RESET', default=30.0)  # seconds before a probe request
+REFUND_MAX_ATTEMPTS = env.int('REFUND_MAX_ATTEMPTS', default=6)  # transient failures before a refund is marked failed
 PAYMENTS_ENABLED = env.bool('PAYMENTS_ENABLED', default=False)
 
 # Pricing Configuration (in pence for precision)
@@ -180,6 +213,23 @@ PRICING = {
     'three_students': 12000, # £120.00 (£40 each)
 }
 
+# Unpaid pending bookings are cancelled by `manage.py sweep_bookings` after this long
+BOOKING_PENDING_TTL_HOURS = env.float('BOOKING_PENDING_TTL_HOURS', default=48)
+
+# Cache: a shared file cache by default; set CACHE_URL to e.g. redis://localhost:6379/1
+CACHES = {
+    'default': env.cache('CACHE_URL', default=f"filecache://{os.path.join(tempfile.gettempdir(), 'tuitionhub-cache')}"),
+}
+if CACHES['default']['BACKEND'].endswith(('FileBasedCache', 'LocMemCache')):
+    # Django's default of 300 entries is soon filled by per-date availability,
+    # pages and fragments, after which every write culls part of the cache
+    CACHES['default'].setdefault('OPTIONS', {}).setdefault(
+        'MAX_ENTRIES', env.int('CACHE_MAX_ENTRIES', default=20000),
+    )
+if sys.argv[1:2] == ['test']:
+    # Keep test runs apart from each other and from the development cache
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
 # Session settings
 SESSION_COOKIE_AGE = 86400 * 7  # 1 week
 SESSION_COOKIE_SECURE = not DEBUG
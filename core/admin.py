@@ -1,3 +1,72 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.contrib.auth.forms import UserCreationForm, UserChangeForm
+from django.utils import timezone
 
-# Register your models here.
+from .admin_utils import LargeTableAdminMixin
+from .models import OutboundEmail, User
+
+
+class UserCreationAdminForm(UserCreationForm):
+    class Meta(UserCreationForm.Meta):
+        model = User
+        fields = ('email', 'first_name', 'last_name')
+
+
+class UserChangeAdminForm(UserChangeForm):
+    class Meta(UserChangeForm.Meta):
+        model = User
+
+
+@admin.register(User)
+class UserAdmin(LargeTableAdminMixin, BaseUserAdmin):
+    # Registered with search_fields so other admins can autocomplete users
+    form = UserChangeAdminForm
+    add_form = UserCreationAdminForm
+    list_display = ('email', 'first_name', 'last_name', 'role', 'is_staff', 'created_at')
+    list_filter = ('role', 'is_staff', 'is_active')
+    search_fields = ('email', 'first_name', 'last_name')
+    ordering = ('-created_at',)
+    readonly_fields = ('last_login', 'date_joined', 'created_at', 'updated_at')
+
+    fieldsets = (
+        (None, {
+            'fields': ('email', 'password')
+        }),
+        ('Personal Info', {
+            'fields': ('first_name', 'last_name', 'phone', 'role')
+        }),
+        ('Student', {
+            'fields': ('parent_name', 'parent_email', 'parent_phone', 'school', 'year_group')
+        }),
+        ('Profile', {
+            'fields': ('bio', 'profile_image', 'preferred_delivery')
+        }),
+        ('Permissions', {
+            'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions'),
+            'classes': ('collapse',)
+        }),
+        ('Timestamps', {
+            'fields': ('last_login', 'date_joined', 'created_at', 'updated_at'),
+            'classes': ('collapse',)
+        }),
+    )
+    add_fieldsets = (
+        (None, {
+            'classes': ('wide',),
+            'fields': ('email', 'first_name', 'last_name', 'password1', 'password2')
+        }),
+    )
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('subject', 'to', 'provider_id')
+    readonly_fields = ('provider_id', 'last_error', 'created_at', 'sent_at')
+    actions = ['requeue']
+
+    def requeue(self, request, queryset):
+        queryset.update(status=OutboundEmail.Status.QUEUED, attempts=0, next_attempt_at=timezone.now())
+    requeue.short_description = "Requeue selected emails"
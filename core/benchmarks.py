@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def throwaway_database(verbosity=0):
+    """Run benchmarks against a freshly migrated copy of the default database.
+
+    Works like the test runner: the test environment is set up (locmem email,
+    'testserver' allowed) and the database is destroyed on exit. SQLite copies
+    live in a temporary file rather than in memory so several threads or
+    processes can open their own connections to it.
+    """
+    connection = connections[DEFAULT_DB_ALIAS]
+    tmpdir = None
+    if connection.vendor == 'sqlite':
+        tmpdir = tempfile.mkdtemp(prefix='tuitionhub-bench-')
+        connection.settings_dict['TEST']['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, serialize=False,
+    )
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+class Timer:
+    """Context manager recording elapsed wall time in seconds."""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self.start
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of samples (nearest-rank)."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
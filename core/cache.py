@@ -0,0 +1,174 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+
+# Cache tags and the models whose changes invalidate them. Anything cached
+# under a tag includes the tag's version in its key, so bumping the version
+# retires every entry at once.
+CACHE_TAGS = {
+    # Topics and lessons feed course search results
+    'catalogue': ['courses.Course', 'courses.Level', 'courses.Subject', 'courses.Topic', 'courses.Lesson'],
+    'testimonials': ['core.Testimonial'],
+    'availability': ['bookings.Booking', 'bookings.TimeSlot'],
+}
+
+PUBLIC_PAGE_TIMEOUT = 60 * 15
+# Fragments are invalidated by their tags, so the timeout only bounds staleness if a bump is missed
+FRAGMENT_TIMEOUT = 60 * 60
+
+# Query parameters that never change what a public page renders. Ad click ids
+# are unique per visit, so keeping them in the key would make every ad click a miss.
+TRACKING_PARAM_PREFIXES = ('utm_', 'gclid', 'fbclid', 'msclkid')
+
+
+def tag_key(tag):
+    return f'cache:tag:{tag}'
+
+
+def _new_version():
+    # Seed from the clock so an evicted counter never reuses an old version
+    return time.time_ns()
+
+
+def tag_versions(tags, cached=None):
+    """Return {tag: version}, starting a version for tags that have none.
+
+    cached may hold tag keys already read (for example in the same get_many
+    as the entries themselves) to save a round trip.
+    """
+    keys = {tag: tag_key(tag) for tag in tags}
+    if cached is None:
+        cached = cache.get_many(keys.values())
+
+    versions = {}
+    for tag, key in keys.items():
+        version = cached.get(key)
+        if version is None:
+            version = _new_version()
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key, version)
+        versions[tag] = version
+    return versions
+
+
+def bump_tags(*tags):
+    """Invalidate everything cached under the given tags, immediately."""
+    for tag in tags:
+        try:
+            cache.incr(tag_key(tag))
+        except ValueError:
+            cache.set(tag_key(tag), _new_version(), timeout=None)
+
+
+def invalidate_tags(*tags):
+    """Bump tag versions once the current transaction commits.
+
+    Bumping before commit would let a concurrent request cache the old rows
+    under the new version.
+    """
+    transaction.on_commit(lambda: bump_tags(*tags))
+
+
+_tags_by_model = {}
+
+
+def _model_changed(sender, **kwargs):
+    invalidate_tags(*_tags_by_model[sender])
+
+
+def connect_invalidation_signals():
+    """Bump each model's tags whenever one of its rows is saved or deleted."""
+    for tag, labels in CACHE_TAGS.items():
+        for label in labels:
+            _tags_by_model.setdefault(apps.get_model(label), []).append(tag)
+
+    for model in _tags_by_model:
+        uid = f'cache-tags:{model._meta.label}'
+        post_save.connect(_model_changed, sender=model, dispatch_uid=f'{uid}:save')
+        post_delete.connect(_model_changed, sender=model, dispatch_uid=f'{uid}:delete')
+
+
+def _fingerprint(*parts, versions):
+    parts = [*parts, *(f'{tag}={version}' for tag, version in sorted(versions.items()))]
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def fragment_key(name, versions):
+    """Return the cache key for a template fragment at the given tag versions."""
+    return f'cache:fragment:{name}:{_fingerprint(name, versions=versions)}'
+
+
+def _page_path(request):
+    params = request.GET.copy()
+    for param in list(params):
+        if param.startswith(TRACKING_PARAM_PREFIXES):
+            del params[param]
+    return f'{request.path}?{params.urlencode()}' if params else request.path
+
+
+def _is_cacheable(request):
+    if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+        return False
+    # Pending flash messages are rendered into the page, so it is unique to this visitor
+    storage = getattr(request, '_messages', None)
+    return not storage or not len(storage)
+
+
+def cache_public_page(*tags, timeout=PUBLIC_PAGE_TIMEOUT):
+    """Serve a public view from the cache for anonymous visitors.
+
+    The key covers the path and query string (minus tracking parameters), whether the request came from HTMX and the
+    versions of the given tags. Logged-in users, visitors with pending
+    messages and responses that set cookies or use a CSRF token always get
+    a fresh render. With SERVE_PRERENDERED on, pages written by
+    prerender_public are read from disk first, so a new render is served as
+    soon as it lands.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _is_cacheable(request):
+                return view(request, *args, **kwargs)
+
+            page_path = _page_path(request)
+            if settings.SERVE_PRERENDERED and page_path == request.path and not request.headers.get('HX-Request'):
+                from .prerender import read_prerendered
+                content = read_prerendered(request.path)
+                if content is not None:
+                    response = HttpResponse(content)
+                    patch_vary_headers(response, ('Cookie', 'HX-Request'))
+                    return response
+
+            versions = tag_versions(tags) if tags else {}
+            fingerprint = _fingerprint(page_path, request.headers.get('HX-Request', ''), versions=versions)
+            key = f'cache:page:{view.__module__}.{view.__name__}:{fingerprint}'
+
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+            else:
+                response = view(request, *args, **kwargs)
+                if (
+                    response.status_code == 200
+                    and not response.streaming
+                    and not response.cookies
+                    and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+                ):
+                    if hasattr(response, 'render') and callable(response.render):
+                        response.render()
+                    cache.set(key, (response.content, response['Content-Type']), timeout)
+
+            patch_vary_headers(response, ('Cookie', 'HX-Request'))
+            return response
+        return wrapper
+    return decorator
@@ -1,58 +1,199 @@
+import base64
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.base import MIMEBase
+
 import resend
 from django.conf import settings
 from django.core.mail.backends.base import BaseEmailBackend
 
 
+logger = logging.getLogger(__name__)
+
+# Resend accepts at most 100 emails per batch call, and batches cannot carry attachments
+BATCH_SIZE = 100
+RATE_LIMIT_RETRIES = 2
+
+
+class TokenBucket:
+    """Thread-safe token bucket: rate tokens per second, up to capacity."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# Shared by every backend instance in the process, since the limit is per API key
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def _bucket(rate):
+    with _buckets_lock:
+        if rate not in _buckets:
+            _buckets[rate] = TokenBucket(rate)
+        return _buckets[rate]
+
+
 class ResendEmailBackend(BaseEmailBackend):
-    """Custom email backend for Resend."""
+    """Custom email backend for Resend.
+
+    Messages without attachments go out through the batch endpoint, up to
+    100 per API call. Messages with attachments are sent individually from a
+    small thread pool. Every API call waits for a token from a per-process
+    rate limiter. After sending, each message has resend_id set on success
+    or send_error set on failure.
+    """
 
     def __init__(self, fail_silently=False, **kwargs):
         super().__init__(fail_silently=fail_silently, **kwargs)
         resend.api_key = settings.RESEND_API_KEY
+        self.bucket = _bucket(settings.RESEND_RATE_LIMIT)
+        self.max_workers = settings.RESEND_MAX_WORKERS
+
+    def _params(self, message):
+        params = {
+            "from": message.from_email or settings.DEFAULT_FROM_EMAIL,
+            "to": list(message.to),
+            "subject": message.subject,
+        }
+
+        # Handle HTML content
+        if hasattr(message, 'alternatives') and message.alternatives:
+            for content, mimetype in message.alternatives:
+                if mimetype == 'text/html':
+                    params["html"] = content
+                    break
+        params["text"] = message.body
+
+        # Add CC and BCC if present
+        if message.cc:
+            params["cc"] = list(message.cc)
+        if message.bcc:
+            params["bcc"] = list(message.bcc)
+
+        # Add reply-to if present
+        if message.reply_to:
+            params["reply_to"] = list(message.reply_to)
+
+        if message.attachments:
+            params["attachments"] = [self._attachment(attachment) for attachment in message.attachments]
+
+        return params
+
+    def _attachment(self, attachment):
+        if isinstance(attachment, MIMEBase):
+            content = attachment.get_payload(decode=True)
+            filename = attachment.get_filename() or 'attachment'
+        else:
+            filename, content, _ = attachment
+            if isinstance(content, str):
+                content = content.encode()
+        return {"filename": filename, "content": base64.b64encode(content).decode('ascii')}
+
+    def _call(self, send, *args):
+        """Make one rate-limited API call, retrying briefly if Resend still says 429."""
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            self.bucket.acquire()
+            try:
+                return send(*args)
+            except resend.exceptions.RateLimitError:
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise
+                time.sleep(2 ** attempt)
+
+    def _send_batch(self, messages, params):
+        try:
+            response = self._call(resend.Batch.send, params, {"batch_validation": "permissive"})
+        except Exception as e:
+            for message in messages:
+                message.send_error = e
+            return
+
+        errors = {error['index']: error.get('message', 'Rejected') for error in response.get('errors') or []}
+        sent = iter(response.get('data') or [])
+        for index, message in enumerate(messages):
+            if index in errors:
+                message.send_error = resend.exceptions.ValidationError(errors[index], 'validation_error', '422')
+            else:
+                message.resend_id = next(sent, {}).get('id')
+
+    def _send_one(self, message, params):
+        try:
+            message.resend_id = self._call(resend.Emails.send, params).get('id')
+        except Exception as e:
+            message.send_error = e
 
     def send_messages(self, email_messages):
-        """Send one or more EmailMessage objects and return the number sent."""
+        """Send one or more EmailMessage objects and return the number sent.
+
+        Every message is attempted before any error is raised, so one bad
+        message cannot stop the rest of a blast.
+        """
         if not email_messages:
             return 0
 
-        num_sent = 0
+        batchable = []
+        individual = []
         for message in email_messages:
+            message.resend_id = None
+            message.send_error = None
             try:
-                params = {
-                    "from": message.from_email or settings.DEFAULT_FROM_EMAIL,
-                    "to": list(message.to),
-                    "subject": message.subject,
-                }
-
-                # Handle HTML content
-                if hasattr(message, 'alternatives') and message.alternatives:
-                    for content, mimetype in message.alternatives:
-                        if mimetype == 'text/html':
-                            params["html"] = content
-                            break
-                    params["text"] = message.body
-                else:
-                    params["text"] = message.body
-
-                # Add CC and BCC if present
-                if message.cc:
-                    params["cc"] = list(message.cc)
-                if message.bcc:
-                    params["bcc"] = list(message.bcc)
-
-                # Add reply-to if present
-                if message.reply_to:
-                    params["reply_to"] = list(message.reply_to)
-
-                resend.Emails.send(params)
-                num_sent += 1
-
+                params = self._params(message)
             except Exception as e:
-                if not self.fail_silently:
-                    raise
-                # Log the error in production
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f"Failed to send email via Resend: {e}")
+                message.send_error = e
+                continue
+            if "attachments" in params:
+                individual.append((message, params))
+            else:
+                batchable.append((message, params))
 
-        return num_sent
+        # Threads only start when work is submitted, so this is free without attachments
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(individual)))) as pool:
+            futures = [pool.submit(self._send_one, message, params) for message, params in individual]
+            for start in range(0, len(batchable), BATCH_SIZE):
+                chunk = batchable[start:start + BATCH_SIZE]
+                self._send_batch([message for message, _ in chunk], [params for _, params in chunk])
+            for future in futures:
+                future.result()
+
+        failed = [message for message in email_messages if message.send_error is not None]
+        for message in failed:
+            logger.error('Failed to send email %r via Resend: %s', message.subject, message.send_error)
+        if failed and not self.fail_silently:
+            raise failed[0].send_error
+
+        return len(email_messages) - len(failed)
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Write messages to the OutboundEmail table for send_outbox to deliver.
+
+    Rows are written in the caller's transaction, so an email is only sent
+    if the work that triggered it commits, and requests never wait on the
+    email provider.
+    """
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+        from .outbox import enqueue_messages
+        return enqueue_messages(email_messages)
@@ -0,0 +1,132 @@
+import gc
+from datetime import date, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, RequestFactory
+from django.test.client import ClientHandler
+from django.test.utils import CaptureQueriesContext
+
+from bookings.models import Booking
+from core.benchmarks import Timer, percentile, throwaway_database
+from core.models import User
+from courses.models import Course, Lesson, Level, StudentProgress, Subject, Topic
+from payments.models import Payment
+
+
+# Changelists to time, with the query strings staff actually use
+PAGES = [
+    ('Bookings', '/admin/bookings/booking/'),
+    ('Bookings, confirmed', '/admin/bookings/booking/?status__exact=confirmed'),
+    ('Bookings, one course', '/admin/bookings/booking/?course__id__exact={course_id}'),
+    ('Bookings, page 50', '/admin/bookings/booking/?p=50'),
+    ('Payments', '/admin/payments/payment/'),
+    ('Payments, completed', '/admin/payments/payment/?status__exact=completed'),
+    ('Student progress', '/admin/courses/studentprogress/'),
+    ('Booking autocomplete', '/admin/autocomplete/?app_label=bookings&model_name=booking&field_name=student&term=stud'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Seed a large dataset and time the busiest admin changelists'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Bookings (and payments) to seed')
+        parser.add_argument('--runs', type=int, default=10, help='Timed requests per page')
+        parser.add_argument('--budget-ms', type=float, default=300.0, help='Fail if a page p95 exceeds this')
+
+    def handle(self, *args, **options):
+        failures = []
+        with throwaway_database():
+            self.stdout.write(f"Seeding {options['rows']} bookings and payments...")
+            with Timer() as seeding:
+                fixtures = self._seed(options['rows'])
+            self.stdout.write(f'Seeded in {seeding.elapsed:.1f} s')
+            # Seeding leaves a large heap behind; collect it now rather than mid-measurement
+            gc.collect()
+
+            admin = User.objects.create_superuser('bench-admin@example.com', 'bench-password')
+            client = Client()
+            client.force_login(admin)
+            # Call the handler directly: the test Client copies every template
+            # context it renders, which costs more than a 100-row changelist
+            handler = ClientHandler()
+            factory = RequestFactory(HTTP_COOKIE=f'{settings.SESSION_COOKIE_NAME}={client.session.session_key}')
+
+            self.stdout.write(f"{'Page':<24} {'status':>6} {'queries':>7} {'p50 ms':>8} {'p95 ms':>8}")
+            for name, url in PAGES:
+                url = url.format(**fixtures)
+                cache.clear()
+                handler(factory.get(url, secure=True).environ)  # Warm filter choices and the session
+                timings = []
+                for _ in range(options['runs']):
+                    with CaptureQueriesContext(connection) as queries, Timer() as timer:
+                        response = handler(factory.get(url, secure=True).environ)
+                    timings.append(timer.elapsed * 1000)
+                p95 = percentile(timings, 95)
+                self.stdout.write(
+                    f'{name:<24} {response.status_code:>6} {len(queries):>7} '
+                    f'{percentile(timings, 50):>8.1f} {p95:>8.1f}'
+                )
+                if response.status_code != 200:
+                    failures.append(f'{name}: status {response.status_code}')
+                elif p95 > options['budget_ms']:
+                    failures.append(f"{name}: p95 {p95:.0f} ms, budget is {options['budget_ms']:.0f} ms")
+
+        if failures:
+            raise CommandError('\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('All admin pages within budget'))
+
+    def _seed(self, rows, batch_size=5000):
+        students = User.objects.bulk_create(
+            User(email=f'student{i}@example.com', first_name='Student', last_name=str(i), password='!')
+            for i in range(max(1, rows // 50))
+        )
+        level = Level.objects.create(name='GCSE', slug='gcse', order=1)
+        courses = []
+        lessons = []
+        for i in range(20):
+            subject = Subject.objects.create(name=f'Subject {i}', slug=f'subject-{i}')
+            course = Course.objects.create(
+                title=f'Course {i}', slug=f'course-{i}', subject=subject, level=level,
+                description='Seeded course', is_published=True,
+            )
+            topic = Topic.objects.create(course=course, title='Topic', order=1)
+            lessons += Lesson.objects.bulk_create(Lesson(topic=topic, title=f'Lesson {n}', order=n) for n in range(5))
+            courses.append(course)
+
+        statuses = list(Booking.Status.values)
+        start = date.today() - timedelta(days=3 * 365)
+        for offset in range(0, rows, batch_size):
+            bookings = Booking.objects.bulk_create(
+                Booking(
+                    student=students[i % len(students)], course=courses[i % len(courses)],
+                    date=start + timedelta(days=i % 1460), start_time=time(9 + i % 10, 0),
+                    end_time=time(10 + i % 10, 0), status=statuses[i % len(statuses)], price=6000,
+                )
+                for i in range(offset, min(offset + batch_size, rows))
+            )
+            Payment.objects.bulk_create(
+                Payment(
+                    user=booking.student, booking=booking, amount=booking.price,
+                    status=Payment.Status.COMPLETED if i % 4 else Payment.Status.PENDING,
+                )
+                for i, booking in enumerate(bookings)
+            )
+
+        progress_rows = min(rows, len(students) * len(lessons))
+        for offset in range(0, progress_rows, batch_size):
+            StudentProgress.objects.bulk_create(
+                StudentProgress(
+                    user=students[i // len(lessons)], lesson=lessons[i % len(lessons)],
+                    course_id=lessons[i % len(lessons)].topic.course_id, completed=bool(i % 2),
+                )
+                for i in range(offset, min(offset + batch_size, progress_rows))
+            )
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        return {'course_id': courses[0].pk}
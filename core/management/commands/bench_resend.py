@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import resend
+from django.core.mail import EmailMessage
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from core.benchmarks import Timer
+from core.email_backend import ResendEmailBackend
+
+
+class FakeResendHandler(BaseHTTPRequestHandler):
+    """Accepts /emails and /emails/batch like Resend, after a fixed delay."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    delay = 0.0
+    calls = []
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        with self.lock:
+            self.calls.append((time.monotonic(), self.path))
+        time.sleep(self.delay)
+
+        if self.path == '/emails/batch':
+            data = {'data': [{'id': str(uuid.uuid4())} for _ in body]}
+        else:
+            data = {'id': str(uuid.uuid4())}
+        payload = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Compare serial and batched Resend sending against a local fake Resend API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=300, help='Plain messages to send')
+        parser.add_argument('--attachments', type=int, default=20, help='Messages with attachments to send')
+        parser.add_argument('--delay', type=float, default=20.0, help='Fake API latency in ms')
+        parser.add_argument('--rate', type=float, default=10.0, help='Rate limit to verify, in calls per second')
+
+    def handle(self, *args, **options):
+        FakeResendHandler.delay = options['delay'] / 1000
+        server = ThreadingHTTPServer(('127.0.0.1', 0), FakeResendHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        api_url = resend.api_url
+        resend.api_url = f'http://127.0.0.1:{server.server_port}'
+
+        try:
+            messages = self._messages(options['messages'], options['attachments'])
+            with override_settings(RESEND_API_KEY='re_fake'):
+                resend.api_key = 're_fake'
+                with Timer() as serial:
+                    for message in messages:
+                        resend.Emails.send(ResendEmailBackend()._params(message))
+                serial_calls = self._reset_calls()
+
+                with override_settings(RESEND_RATE_LIMIT=1000.0):
+                    with Timer() as batched:
+                        sent = ResendEmailBackend().send_messages(messages)
+                batched_calls = self._reset_calls()
+
+                if sent != len(messages) or any(message.resend_id is None for message in messages):
+                    raise CommandError(f'Only {sent}/{len(messages)} messages were sent')
+                self.stdout.write(
+                    f'Serial:  {len(messages)} messages, {len(serial_calls)} API calls, {serial.elapsed:.2f}s'
+                )
+                self.stdout.write(
+                    f'Batched: {len(messages)} messages, {len(batched_calls)} API calls, {batched.elapsed:.2f}s '
+                    f'({serial.elapsed / batched.elapsed:.1f}x faster)'
+                )
+
+                self._check_rate_limit(options['rate'])
+        finally:
+            resend.api_url = api_url
+            server.shutdown()
+            server.server_close()
+
+        self.stdout.write(self.style.SUCCESS('Resend benchmark passed'))
+
+    def _messages(self, plain, with_attachments):
+        messages = [
+            EmailMessage(f'Reminder {i}', 'Your session is tomorrow.', 'TuitionHub <noreply@example.com>',
+                         [f'student{i}@example.com'])
+            for i in range(plain)
+        ]
+        for i in range(with_attachments):
+            message = EmailMessage(f'Invoice {i}', 'Your invoice is attached.', 'TuitionHub <noreply@example.com>',
+                                   [f'parent{i}@example.com'])
+            message.attach(f'invoice-{i}.pdf', b'%PDF-1.4 fake', 'application/pdf')
+            messages.append(message)
+        return messages
+
+    def _reset_calls(self):
+        with FakeResendHandler.lock:
+            calls = list(FakeResendHandler.calls)
+            FakeResendHandler.calls.clear()
+        return calls
+
+    def _check_rate_limit(self, rate):
+        # Enough attachment messages to need several seconds at this rate
+        messages = self._messages(0, int(rate * 3))
+        with override_settings(RESEND_RATE_LIMIT=rate):
+            ResendEmailBackend().send_messages(messages)
+        times = [at for at, _ in self._reset_calls()]
+
+        # A bucket allows a burst of `rate` calls, then `rate` per second
+        busiest = max(sum(1 for t in times if start <= t < start + 1) for start in times)
+        self.stdout.write(f'Rate limit {rate:g}/s: busiest one-second window had {busiest} calls')
+        if busiest > 2 * rate:
+            raise CommandError('Rate limit was not respected')
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import throwaway_database
+from core.query_budget import check_query_budgets, payments_enabled
+
+
+class Command(BaseCommand):
+    help = 'Check every named route stays within its query budget as data grows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=3, help='Rows per collection in the small dataset')
+        parser.add_argument('--growth-rows', type=int, default=12, help='Rows per collection added for the growth check')
+
+    def handle(self, *args, **options):
+        with throwaway_database(), payments_enabled():
+            results, failures = check_query_budgets(options['rows'], options['growth_rows'])
+
+        self.stdout.write(f"{'route':<32} {'status':>6} {'queries':>8} {'large':>6} {'ms':>8}")
+        for name, (small, large) in results.items():
+            self.stdout.write(
+                f"{name:<32} {large['status']:>6} {small['queries']:>8} {large['queries']:>6} {large['ms']:>8.1f}"
+            )
+
+        if failures:
+            for failure in failures:
+                self.stderr.write(failure)
+            raise CommandError(f'{len(failures)} route(s) over budget')
+        self.stdout.write(self.style.SUCCESS('All routes within their query budgets'))
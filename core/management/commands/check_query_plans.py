@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import throwaway_database
+from core.query_plans import PLAN_CHECKS, check_query_plans
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot booking and payment queries and check they use their indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every query plan')
+
+    def handle(self, *args, **options):
+        with throwaway_database() as connection:
+            results, failures = check_query_plans()
+
+        for description, _, expected in PLAN_CHECKS:
+            plan = results[description]
+            if plan is None:
+                self.stdout.write(f'{description}: skipped on {connection.vendor}')
+                continue
+            if options['verbose_plans']:
+                self.stdout.write(plan)
+            if expected[connection.vendor] in plan:
+                self.stdout.write(f'{description}: uses {expected[connection.vendor]}')
+
+        if failures:
+            raise CommandError('\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('All query plans use their indexes'))
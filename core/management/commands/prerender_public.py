@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestFilesMixin, staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from core.prerender import PrerenderError, load_manifest, page_versions, prerender
+
+
+class Command(BaseCommand):
+    help = 'Render the public marketing and course pages to static HTML in PRERENDER_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None, help='Directory to write to (default: PRERENDER_ROOT)')
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help='Keep running, re-rendering whenever courses or testimonials change (checked every N seconds)',
+        )
+
+    def handle(self, *args, **options):
+        root = options['output'] or settings.PRERENDER_ROOT
+
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING('DEBUG is on, so asset URLs will not be hashed'))
+        elif isinstance(staticfiles_storage, ManifestFilesMixin) and not staticfiles_storage.hashed_files:
+            raise CommandError('No staticfiles manifest found. Run collectstatic first.')
+
+        self.render(root)
+        if options['interval'] is None:
+            return
+
+        while True:
+            time.sleep(options['interval'])
+            if load_manifest(root).get('versions') != page_versions():
+                self.render(root)
+
+    def render(self, root):
+        try:
+            counts = prerender(root)
+        except PrerenderError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Pre-rendered into {root}: {counts['written']} written, "
+            f"{counts['unchanged']} unchanged, {counts['removed']} removed"
+        ))
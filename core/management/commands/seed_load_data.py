@@ -0,0 +1,414 @@
+import random
+from collections import defaultdict
+from datetime import date, time, timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bookings.availability import MINUTES_PER_DAY, bump_version, to_interval
+from bookings.models import Booking, TimeSlot
+from core.models import Testimonial, User
+from courses.models import Course, Lesson, Level, Resource, StudentProgress, Subject, Topic
+from courses.search import index_courses
+from payments.models import Invoice, Payment
+from payments.numbering import allocate_invoice_numbers
+
+
+LEVELS = ['KS3', 'GCSE', 'A-Level', 'University Prep']
+SUBJECTS = [
+    'Computer Science', 'Programming', 'Algorithms', 'Data Structures', 'Databases',
+    'Networking', 'Cyber Security', 'Web Development', 'Computational Thinking', 'Digital Literacy',
+]
+WORDS = [
+    'recursion', 'iteration', 'algorithm', 'binary', 'search', 'sort', 'stack', 'queue',
+    'tree', 'graph', 'hash', 'table', 'network', 'protocol', 'database', 'query', 'boolean',
+    'logic', 'compiler', 'memory', 'processor', 'function', 'variable', 'loop', 'array',
+    'object', 'class', 'encryption', 'packet', 'complexity', 'abstraction', 'decomposition',
+]
+
+SESSION_TYPES = [Booking.SessionType.ONE_TO_ONE, Booking.SessionType.TWO_STUDENTS, Booking.SessionType.THREE_STUDENTS]
+SESSION_WEIGHTS = [70, 20, 10]
+DURATIONS = ['1.0', '1.5', '2.0']
+DURATION_WEIGHTS = [60, 25, 15]
+PAST_STATUSES = [Booking.Status.COMPLETED, Booking.Status.CANCELLED, Booking.Status.NO_SHOW]
+PAST_WEIGHTS = [85, 8, 7]
+FUTURE_STATUSES = [Booking.Status.CONFIRMED, Booking.Status.PENDING, Booking.Status.CANCELLED]
+FUTURE_WEIGHTS = [70, 22, 8]
+
+# Bookings that hold a place in their slots
+PLACE_HOLDING = {Booking.Status.PENDING, Booking.Status.CONFIRMED, Booking.Status.COMPLETED, Booking.Status.NO_SHOW}
+# Placements tried per booking before giving up on it
+PLACEMENT_ATTEMPTS = 50
+# Upcoming sessions are spread over this many days after the anchor
+FUTURE_DAYS = 56
+
+
+def batched(iterable, size):
+    """Yield lists of up to size items without materialising the iterable."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create a large, deterministic synthetic dataset for benchmarks'
+
+    # Every name, slug and reference is derived from --seed and a running
+    # index, never from row counts or primary keys, and each phase draws from
+    # its own random stream. Rerunning with the same seed finds its rows
+    # already present and skips them.
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=1, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--anchor', type=date.fromisoformat, default=None,
+                            help='Date bookings are spread around (YYYY-MM-DD, default today). History reaches '
+                                 'back at least a year, further when the slots cannot hold --bookings otherwise')
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--subjects', type=int, default=5, help=f'Up to {len(SUBJECTS)}')
+        parser.add_argument('--topics', type=int, default=12, help='Topics per course')
+        parser.add_argument('--lessons', type=int, default=6, help='Lessons per topic')
+        parser.add_argument('--resources', type=int, default=2, help='Resources per lesson')
+        parser.add_argument('--bookings', type=int, default=100000)
+        parser.add_argument('--progress', type=int, default=50000, help='Student progress rows')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.seed = options['seed']
+        self.anchor = options['anchor'] or timezone.localdate()
+        self.batch_size = options['batch_size']
+
+        self.create_time_slots()
+        user_ids = self.create_users(options['users'])
+        course_ids = self.create_catalogue(options['subjects'])
+        lessons_by_course = self.create_curriculum(course_ids, options['topics'], options['lessons'], options['resources'])
+        self.create_testimonials()
+        self.create_bookings(options['bookings'], user_ids, course_ids)
+        self.create_progress(options['progress'], user_ids, lessons_by_course)
+
+        index_courses(course_ids)
+        bump_version()
+        self.stdout.write(self.style.SUCCESS('Load data created'))
+
+    def _rng(self, phase):
+        """Return the random stream for one phase of the seed."""
+        return random.Random(f'{self.seed}:{phase}')
+
+    def _bulk_create(self, model, objects):
+        """Insert a stream of objects in batches, returning the number created."""
+        created = 0
+        for batch in batched(objects, self.batch_size):
+            model.objects.bulk_create(batch, batch_size=self.batch_size)
+            created += len(batch)
+        self.stdout.write(f'{model._meta.verbose_name_plural}: {created}')
+        return created
+
+    def create_time_slots(self):
+        existing = set(TimeSlot.objects.values_list('day_of_week', 'start_time'))
+        hours = {day: range(16, 21) for day in range(5)} | {5: range(9, 18), 6: range(9, 18)}
+        self._bulk_create(TimeSlot, (
+            TimeSlot(day_of_week=day, start_time=time(hour), end_time=time(hour + 1), max_students=3)
+            for day, day_hours in hours.items()
+            for hour in day_hours
+            if (day, time(hour)) not in existing
+        ))
+
+    def create_users(self, count):
+        rng = self._rng('users')
+        # Hash once: hashing per user would dominate the run time
+        password = make_password(f'load-{self.seed}')
+        emails = [f'load{self.seed}-{i}@example.com' for i in range(count)]
+        existing = set(User.objects.filter(email__startswith=f'load{self.seed}-').values_list('email', flat=True))
+        users = [
+            User(
+                email=email,
+                first_name=f'Student{i}',
+                last_name=rng.choice(WORDS).title(),
+                password=password,
+                year_group=f'Year {rng.randint(7, 13)}',
+                preferred_delivery=rng.choice(['online', 'face_to_face', 'both']),
+            )
+            for i, email in enumerate(emails)
+        ]
+        self._bulk_create(User, (user for user in users if user.email not in existing))
+        ids = dict(User.objects.filter(email__in=emails).values_list('email', 'pk'))
+        return [ids[email] for email in emails]
+
+    def create_catalogue(self, subject_count):
+        rng = self._rng('catalogue')
+        levels = []
+        for order, name in enumerate(LEVELS):
+            level, _ = Level.objects.get_or_create(
+                slug=f'load-{self.seed}-{order}', defaults={'name': name, 'order': order},
+            )
+            levels.append(level)
+        subjects = []
+        for index, name in enumerate(SUBJECTS[:subject_count]):
+            subject, _ = Subject.objects.get_or_create(slug=f'load-{self.seed}-{index}', defaults={'name': name})
+            subjects.append(subject)
+
+        courses = [
+            Course(
+                title=f'{level.name} {subject.name}',
+                slug=f'load-{self.seed}-{level_index}-{subject_index}',
+                subject=subject,
+                level=level,
+                description=self._sentence(rng, 40),
+                learning_outcomes=self._sentence(rng, 20),
+                syllabus_reference=f'OCR H{rng.randint(100, 999)}',
+                duration_weeks=rng.choice([8, 12, 24, 36]),
+                is_published=rng.random() < 0.9,
+                is_featured=rng.random() < 0.2,
+            )
+            for level_index, level in enumerate(levels)
+            for subject_index, subject in enumerate(subjects)
+        ]
+        existing = set(Course.objects.values_list('subject_id', 'level_id'))
+        self._bulk_create(Course, (
+            course for course in courses if (course.subject_id, course.level_id) not in existing
+        ))
+        return list(
+            Course.objects.filter(slug__startswith=f'load-{self.seed}-').order_by('slug').values_list('pk', flat=True)
+        )
+
+    def create_curriculum(self, course_ids, topics, lessons, resources):
+        # Content is generated for every course, topic and lesson in a fixed
+        # order and only the missing rows are inserted, so a partial earlier
+        # run does not shift the random streams
+        rng = self._rng('topics')
+        with_topics = set(Topic.objects.filter(course_id__in=course_ids).values_list('course_id', flat=True))
+        self._bulk_create(Topic, (
+            topic
+            for course_id in course_ids
+            for topic in [
+                Topic(
+                    course_id=course_id, order=order, title=self._sentence(rng, 3).title(),
+                    description=self._sentence(rng, 15),
+                    spec_reference=f'{order // 4 + 1}.{order % 4 + 1}.{rng.randint(1, 5)}',
+                )
+                for order in range(topics)
+            ]
+            if course_id not in with_topics
+        ))
+
+        rng = self._rng('lessons')
+        topic_ids = list(
+            Topic.objects.filter(course_id__in=course_ids).order_by('course__slug', 'order').values_list('pk', flat=True)
+        )
+        with_lessons = set(Lesson.objects.filter(topic__course_id__in=course_ids).values_list('topic_id', flat=True))
+        self._bulk_create(Lesson, (
+            lesson
+            for topic_id in topic_ids
+            for lesson in [
+                Lesson(
+                    topic_id=topic_id, order=order, title=self._sentence(rng, 4).title(),
+                    description=self._sentence(rng, 12), content=self._sentence(rng, 120),
+                    duration_minutes=rng.choice([30, 45, 60, 60, 90]),
+                )
+                for order in range(lessons)
+            ]
+            if topic_id not in with_lessons
+        ))
+
+        rng = self._rng('resources')
+        lesson_ids = list(
+            Lesson.objects.filter(topic__course_id__in=course_ids)
+            .order_by('topic__course__slug', 'topic__order', 'order').values_list('pk', flat=True)
+        )
+        with_resources = set(
+            Resource.objects.filter(lesson__topic__course_id__in=course_ids).values_list('lesson_id', flat=True)
+        )
+        resource_types = [choice for choice, _ in Resource.ResourceType.choices]
+        self._bulk_create(Resource, (
+            resource
+            for lesson_id in lesson_ids
+            for resource in [
+                Resource(
+                    lesson_id=lesson_id, title=self._sentence(rng, 3).title(),
+                    resource_type=rng.choice(resource_types), url='https://example.com/resource',
+                )
+                for _ in range(resources)
+            ]
+            if lesson_id not in with_resources
+        ))
+
+        lessons_by_course = {}
+        for lesson_id, course_id in Lesson.objects.filter(
+            topic__course_id__in=course_ids,
+        ).order_by('topic__course__slug', 'topic__order', 'order').values_list('pk', 'topic__course_id'):
+            lessons_by_course.setdefault(course_id, []).append(lesson_id)
+        return lessons_by_course
+
+    def create_testimonials(self):
+        rng = self._rng('testimonials')
+        testimonials = [
+            Testimonial(
+                name=f'{rng.choice(WORDS).title()} Parent', role=rng.choice(['Parent', 'A-Level Student', 'GCSE Student']),
+                content=self._sentence(rng, 30), rating=rng.choice([4, 5, 5, 5]), is_featured=i < 3,
+            )
+            for i in range(20)
+        ]
+        existing = set(Testimonial.objects.values_list('content', flat=True))
+        self._bulk_create(Testimonial, (testimonial for testimonial in testimonials if testimonial.content not in existing))
+
+    def create_bookings(self, count, user_ids, course_ids):
+        tag = f'Load data {self.seed}'
+        if Booking.objects.filter(notes=tag).exists():
+            self.stdout.write('bookings: already present, skipped')
+            return
+        slots_by_day = {}
+        for day, start_time, end_time, max_students in TimeSlot.objects.filter(is_available=True).order_by(
+            'day_of_week', 'start_time',
+        ).values_list('day_of_week', 'start_time', 'end_time', 'max_students'):
+            slots_by_day.setdefault(day, []).append((*to_interval(start_time, end_time), max_students, start_time))
+        if not user_ids or not slots_by_day or count <= 0:
+            return
+
+        # Reach back far enough that the slots can hold every booking: sessions
+        # average about 1.4 slot-hours, and two thirds full leaves room to place them
+        places_per_week = sum(slot[2] for slots in slots_by_day.values() for slot in slots)
+        weeks = -(-count * 1.4 // (places_per_week * 2 / 3))
+        first_day = self.anchor - timedelta(days=max(365, int(weeks) * 7 - FUTURE_DAYS))
+        days = (self.anchor - first_day).days + FUTURE_DAYS
+
+        # Places already taken, per (date, slot start), including bookings
+        # that were in the database before this run
+        occupancy = defaultdict(int)
+        for session_date, start_time, end_time in Booking.objects.filter(
+            date__gte=first_day, date__lt=first_day + timedelta(days=days), status__in=PLACE_HOLDING,
+        ).values_list('date', 'start_time', 'end_time'):
+            for slot in self._covering(slots_by_day.get(session_date.weekday(), []), *to_interval(start_time, end_time)):
+                occupancy[session_date, slot[0]] += 1
+
+        # A few regulars book most sessions: Zipf-like weights over students
+        user_weights = []
+        total = 0.0
+        for rank in range(1, len(user_ids) + 1):
+            total += 1 / rank ** 0.8
+            user_weights.append(total)
+
+        now = timezone.now()
+        booked = paid = 0
+        self.unplaced = 0
+        stream = self._booking_stream(count, user_ids, user_weights, course_ids, slots_by_day, first_day, days, occupancy)
+        for batch in batched(stream, self.batch_size):
+            for booking in batch:
+                booking.notes = tag
+            Booking.objects.bulk_create(batch)
+
+            payments = [
+                Payment(
+                    user_id=booking.student_id, booking_id=booking.pk, amount=booking.price,
+                    status=Payment.Status.COMPLETED, paid_at=now, description='Load data payment',
+                    sumup_checkout_id=f'load-{self.seed}-{booked + index}',
+                )
+                for index, booking in enumerate(batch)
+                if booking.status in (Booking.Status.CONFIRMED, Booking.Status.COMPLETED, Booking.Status.NO_SHOW)
+            ]
+            Payment.objects.bulk_create(payments)
+            Invoice.objects.bulk_create(
+                Invoice(
+                    payment_id=payment.pk, invoice_number=number,
+                    billing_name='Load Data', billing_email='load@example.com',
+                )
+                for payment, number in zip(payments, allocate_invoice_numbers(len(payments), now))
+            )
+            booked += len(batch)
+            paid += len(payments)
+            self.stdout.write(f'bookings: {booked}/{count}', ending='\r')
+        self.stdout.write(f'bookings: {booked}, payments and invoices: {paid}')
+        if self.unplaced:
+            self.stdout.write(self.style.WARNING(f'bookings: {self.unplaced} could not be placed in a free slot'))
+
+    @staticmethod
+    def _covering(day_slots, start, end):
+        """Return the slots covering [start, end) minutes without a gap, or []."""
+        covering = []
+        covered_until = start
+        for slot in day_slots:
+            slot_start, slot_end = slot[0], slot[1]
+            if slot_end <= start or slot_start >= end:
+                continue
+            if slot_start > covered_until:
+                return []
+            covering.append(slot)
+            covered_until = max(covered_until, slot_end)
+        return covering if covered_until >= end else []
+
+    def _booking_stream(self, count, user_ids, user_weights, course_ids, slots_by_day, first_day, days, occupancy):
+        rng = self._rng('bookings')
+        for _ in range(count):
+            for _ in range(PLACEMENT_ATTEMPTS):
+                session_date = first_day + timedelta(days=rng.randrange(days))
+                day_slots = slots_by_day.get(session_date.weekday())
+                if not day_slots:
+                    continue
+                start, _, _, start_time = rng.choice(day_slots)
+                duration = rng.choices(DURATIONS, DURATION_WEIGHTS)[0]
+                end = start + int(float(duration) * 60)
+                covering = self._covering(day_slots, start, end)
+                if not covering:
+                    continue
+                if session_date < self.anchor:
+                    status = rng.choices(PAST_STATUSES, PAST_WEIGHTS)[0]
+                else:
+                    status = rng.choices(FUTURE_STATUSES, FUTURE_WEIGHTS)[0]
+                if status in PLACE_HOLDING:
+                    # Respect max_students in every slot the session covers
+                    if any(occupancy[session_date, slot[0]] >= slot[2] for slot in covering):
+                        continue
+                    for slot in covering:
+                        occupancy[session_date, slot[0]] += 1
+                break
+            else:
+                self.unplaced += 1
+                continue
+
+            session_type = rng.choices(SESSION_TYPES, SESSION_WEIGHTS)[0]
+            yield Booking(
+                student_id=rng.choices(user_ids, cum_weights=user_weights)[0],
+                course_id=rng.choice(course_ids) if course_ids and rng.random() < 0.8 else None,
+                date=session_date,
+                start_time=start_time,
+                end_time=time(0) if end >= MINUTES_PER_DAY else time(end // 60, end % 60),
+                duration_hours=duration,
+                session_type=session_type,
+                delivery_mode=rng.choice([Booking.DeliveryMode.ONLINE, Booking.DeliveryMode.FACE_TO_FACE]),
+                price=int(settings.PRICING[session_type] * float(duration)),
+                status=status,
+            )
+
+    def create_progress(self, count, user_ids, lessons_by_course):
+        if not user_ids or not lessons_by_course:
+            return
+        existing = StudentProgress.objects.filter(user_id__in=user_ids).exists()
+        if existing:
+            self.stdout.write('student progress: already present, skipped')
+            return
+        rng = self._rng('progress')
+        now = timezone.now()
+        course_ids = list(lessons_by_course)
+
+        def progress_stream():
+            created = 0
+            for user_id in user_ids:
+                if created >= count:
+                    return
+                course_id = rng.choice(course_ids)
+                lessons = lessons_by_course[course_id]
+                # Students work through a course in order and stop somewhere along it
+                done = int(len(lessons) * rng.betavariate(2, 3))
+                for lesson_id in lessons[:max(done, 1)][:count - created]:
+                    created += 1
+                    yield StudentProgress(
+                        user_id=user_id, course_id=course_id, lesson_id=lesson_id,
+                        completed=True, completed_at=now,
+                    )
+
+        self._bulk_create(StudentProgress, progress_stream())
+
+    @staticmethod
+    def _sentence(rng, words):
+        return ' '.join(rng.choices(WORDS, k=words)).capitalize() + '.'
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.outbox import deliver_batch
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbox emails in batches, retrying failures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Emails claimed per transaction')
+        parser.add_argument('--once', action='store_true', help='Send everything due and exit instead of polling')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep when nothing is due')
+
+    def handle(self, *args, **options):
+        while True:
+            counts = deliver_batch(options['batch_size'])
+            if counts:
+                self.stdout.write(
+                    f"Outbox batch: {counts['sent']} sent, {counts['retry']} to retry, {counts['dead']} dead-lettered"
+                )
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS('Outbox drained'))
@@ -1,12 +1,25 @@
-from django.core.management.base import BaseCommand
+import json
+
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.sites.models import Site
-from bookings.models import TimeSlot
-from datetime import time
+from bookings.schedule import DEFAULT_SCHEDULE, apply_schedule
 
 
 class Command(BaseCommand):
     help = 'Set up initial data for TuitionHub'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--schedule', nargs='*', default=[],
+            help='JSON schedule files (lists of {days, start, end, slot_minutes, capacity} blocks); '
+                 'later files override earlier ones. Defaults to the built-in schedule.',
+        )
+        parser.add_argument(
+            '--prune', action='store_true',
+            help='Delete existing time slots that are not in the schedule, or mark them unavailable '
+                 'while upcoming bookings use them',
+        )
+
     def handle(self, *args, **options):
         # Update site
         site, created = Site.objects.get_or_create(pk=1)
@@ -15,39 +28,24 @@ class Command(BaseCommand):
         site.save()
         self.stdout.write(self.style.SUCCESS(f'Site updated: {site.domain}'))
 
-        # Create time slots (weekday evenings and weekends)
-        slots_created = 0
-
-        # Weekday slots (Monday to Friday: 16:00-21:00)
-        for day in range(5):  # 0-4 is Monday-Friday
-            for hour in range(16, 21):  # 4pm to 8pm (last slot starts at 8pm)
-                slot, created = TimeSlot.objects.get_or_create(
-                    day_of_week=day,
-                    start_time=time(hour, 0),
-                    defaults={
-                        'end_time': time(hour + 1, 0),
-                        'is_available': True,
-                        'max_students': 3
-                    }
-                )
-                if created:
-                    slots_created += 1
-
-        # Weekend slots (Saturday and Sunday: 9:00-18:00)
-        for day in [5, 6]:  # 5=Saturday, 6=Sunday
-            for hour in range(9, 18):  # 9am to 5pm
-                slot, created = TimeSlot.objects.get_or_create(
-                    day_of_week=day,
-                    start_time=time(hour, 0),
-                    defaults={
-                        'end_time': time(hour + 1, 0),
-                        'is_available': True,
-                        'max_students': 3
-                    }
-                )
-                if created:
-                    slots_created += 1
-
-        self.stdout.write(self.style.SUCCESS(f'Created {slots_created} time slots'))
+        schedule = []
+        for path in options['schedule']:
+            try:
+                with open(path) as f:
+                    blocks = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Could not read schedule {path}: {e}')
+            if not isinstance(blocks, list) or not all(isinstance(block, dict) for block in blocks):
+                raise CommandError(f'Schedule {path} must be a JSON list of schedule blocks')
+            schedule.extend(blocks)
+
+        try:
+            created, updated, pruned = apply_schedule(schedule or DEFAULT_SCHEDULE, prune=options['prune'])
+        except (KeyError, TypeError, ValueError) as e:
+            raise CommandError(f'Invalid schedule: {e}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Time slots: {created} created, {updated} updated, {pruned} pruned'
+        ))
 
         self.stdout.write(self.style.SUCCESS('Initial data setup complete!'))
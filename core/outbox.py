@@ -0,0 +1,131 @@
+import base64
+import logging
+from datetime import timedelta
+from email.mime.base import MIMEBase
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+
+logger = logging.getLogger(__name__)
+
+
+def _attachment(attachment):
+    if isinstance(attachment, MIMEBase):
+        return {
+            'filename': attachment.get_filename() or 'attachment',
+            'content': base64.b64encode(attachment.get_payload(decode=True) or b'').decode('ascii'),
+            'mimetype': attachment.get_content_type(),
+        }
+    filename, content, mimetype = attachment
+    if isinstance(content, str):
+        content = content.encode()
+    return {'filename': filename, 'content': base64.b64encode(content).decode('ascii'), 'mimetype': mimetype}
+
+
+def enqueue_messages(messages):
+    """Write EmailMessages to the outbox in the current transaction."""
+    rows = []
+    for message in messages:
+        html = ''
+        for content, mimetype in getattr(message, 'alternatives', None) or []:
+            if mimetype == 'text/html':
+                html = content
+                break
+        rows.append(OutboundEmail(
+            from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+            to=list(message.to),
+            cc=list(message.cc),
+            bcc=list(message.bcc),
+            reply_to=list(message.reply_to),
+            subject=message.subject,
+            body=message.body,
+            html_body=html,
+            headers=dict(message.extra_headers),
+            attachments=[_attachment(attachment) for attachment in message.attachments],
+        ))
+    OutboundEmail.objects.bulk_create(rows)
+    return len(rows)
+
+
+def to_message(row):
+    message = EmailMultiAlternatives(
+        subject=row.subject,
+        body=row.body,
+        from_email=row.from_email,
+        to=row.to,
+        cc=row.cc,
+        bcc=row.bcc,
+        reply_to=row.reply_to,
+        headers=row.headers,
+    )
+    if row.html_body:
+        message.attach_alternative(row.html_body, 'text/html')
+    for attachment in row.attachments:
+        message.attach(attachment['filename'], base64.b64decode(attachment['content']), attachment['mimetype'])
+    return message
+
+
+def retry_delay(attempts):
+    """Exponential backoff: 1, 2, 4 ... minutes, capped at an hour."""
+    return timedelta(seconds=min(60 * 2 ** (attempts - 1), 3600))
+
+
+def deliver_batch(batch_size=100):
+    """Claim one batch of due outbox rows and hand them to the delivery backend.
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several
+    workers can run at once, and stay locked while they are sent. If the
+    worker dies mid-batch the transaction rolls back and the rows are sent
+    again later: delivery is at-least-once. Failed rows are retried with
+    backoff and become dead letters after EMAIL_OUTBOX_MAX_ATTEMPTS.
+    Returns a dict of row counts by outcome.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboundEmail.Status.QUEUED, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not rows:
+            return {}
+
+        messages = [to_message(row) for row in rows]
+        batch_error = None
+        try:
+            connection = get_connection(settings.EMAIL_DELIVERY_BACKEND, fail_silently=True)
+            connection.send_messages(messages)
+        except Exception as e:
+            # Backends without per-message results fail the whole batch
+            logger.exception('Outbox delivery backend failed')
+            batch_error = e
+
+        counts = {'sent': 0, 'retry': 0, 'dead': 0}
+        for row, message in zip(rows, messages):
+            error = batch_error or getattr(message, 'send_error', None)
+            row.attempts += 1
+            if error is None:
+                row.status = OutboundEmail.Status.SENT
+                row.sent_at = now
+                row.provider_id = getattr(message, 'resend_id', None) or ''
+                row.last_error = ''
+                counts['sent'] += 1
+            elif row.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                row.status = OutboundEmail.Status.DEAD
+                row.last_error = str(error)
+                counts['dead'] += 1
+                logger.error('Outbox email %s dead-lettered after %d attempts: %s', row.id, row.attempts, error)
+            else:
+                row.next_attempt_at = now + retry_delay(row.attempts)
+                row.last_error = str(error)
+                counts['retry'] += 1
+
+        OutboundEmail.objects.bulk_update(
+            rows, ['status', 'attempts', 'next_attempt_at', 'last_error', 'provider_id', 'sent_at'],
+        )
+    return counts
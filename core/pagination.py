@@ -0,0 +1,121 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+from django.shortcuts import render
+from django.utils.cache import patch_vary_headers
+
+
+PER_PAGE = 25
+
+# Orderings with a unique last column, so every row has exactly one position
+BOOKING_ORDERING = ('-date', '-start_time', 'id')
+PAYMENT_ORDERING = ('-created_at', 'id')
+
+
+class KeysetPage:
+    """One page of rows plus the cursor for the page after it."""
+
+    def __init__(self, items, next_cursor, next_url=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.next_url = next_url
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+class KeysetPaginator:
+    """Paginate a queryset by seeking past the last row shown.
+
+    Each page filters on the ordering columns of the previous page's last
+    row and fetches per_page + 1 rows to learn whether another page
+    exists. There is no OFFSET and no COUNT, so with an index matching the
+    ordering every page costs the same as the first.
+    """
+
+    def __init__(self, queryset, ordering, per_page=PER_PAGE):
+        self.queryset = queryset.order_by(*ordering)
+        self.per_page = per_page
+        self.fields = [
+            (queryset.model._meta.get_field(name.lstrip('-')), name.startswith('-'))
+            for name in ordering
+        ]
+
+    def encode_cursor(self, obj):
+        values = [str(getattr(obj, field.attname)) for field, _ in self.fields]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Return the ordering values stored in cursor, raising ValueError if it is malformed."""
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError('Cursor does not match the ordering')
+            # encode_cursor writes every value as a string
+            if not all(isinstance(value, str) for value in values):
+                raise ValueError('Cursor values must be strings')
+            return [field.to_python(value) for (field, _), value in zip(self.fields, values)]
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValidationError) as e:
+            raise ValueError(f'Malformed cursor: {e}') from e
+
+    def _after(self, values):
+        # (a, b, c) after (x, y, z): a past x, or a = x and b past y, or ...
+        condition = Q()
+        for i, (field, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending else 'gt'
+            step = Q(**{f'{field.name}__{lookup}': values[i]})
+            for (previous, _), value in zip(self.fields[:i], values[:i]):
+                step &= Q(**{previous.name: value})
+            condition |= step
+        return condition
+
+    def page_queryset(self, cursor=None):
+        """Return the query for the page after cursor, one row longer than a page."""
+        queryset = self.queryset
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor)))
+        return queryset[:self.per_page + 1]
+
+    def page(self, cursor=None):
+        rows = list(self.page_queryset(cursor))
+        items = rows[:self.per_page]
+        next_cursor = self.encode_cursor(items[-1]) if len(rows) > self.per_page else None
+        return KeysetPage(items, next_cursor)
+
+
+def paginate(request, queryset, ordering, per_page=PER_PAGE):
+    """Return the page named by ?cursor=, with next_url keeping the other query parameters."""
+    paginator = KeysetPaginator(queryset, ordering, per_page)
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except ValueError:
+        raise Http404('Invalid page cursor')
+
+    if page.has_next:
+        params = request.GET.copy()
+        params['cursor'] = page.next_cursor
+        page.next_url = f'{request.path}?{params.urlencode()}'
+    return page
+
+
+def render_paginated(request, template_name, partial_template_name, context):
+    """Render the full page, or only the rows when HTMX asks for the next page."""
+    template = partial_template_name if request.htmx else template_name
+    response = render(request, template, context)
+    # Full page and rows share a URL, so browsers must not mix up their caches
+    patch_vary_headers(response, ('HX-Request',))
+    return response
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.test import Client
+from django.urls import reverse
+
+from courses.models import Course
+
+from .cache import tag_versions
+
+
+MANIFEST_NAME = '.prerender-manifest.json'
+
+# Tags whose changes can alter a pre-rendered page
+PAGE_TAGS = ('catalogue', 'testimonials')
+
+
+class PrerenderError(Exception):
+    pass
+
+
+def public_pages():
+    """Return the URL of every page to pre-render."""
+    urls = [reverse('core:home'), reverse('core:about'), reverse('core:pricing')]
+    slugs = Course.objects.filter(is_published=True).order_by('slug').values_list('slug', flat=True)
+    urls += [reverse('courses:detail', args=[slug]) for slug in slugs]
+    return urls
+
+
+def output_name(url):
+    """Map a URL to the file a static server would look up for it."""
+    return '/'.join([*url.strip('/').split('/'), 'index.html']).lstrip('/')
+
+
+def read_prerendered(url):
+    """Return the pre-rendered HTML for url from PRERENDER_ROOT, or None."""
+    try:
+        return (Path(settings.PRERENDER_ROOT) / output_name(url)).read_bytes()
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def page_versions():
+    return tag_versions(PAGE_TAGS)
+
+
+def _client():
+    host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+    return Client(HTTP_HOST=host)
+
+
+def render_page(client, url):
+    """Render url as an anonymous visitor and return the HTML bytes."""
+    response = client.get(url, secure=True)
+    if response.status_code != 200:
+        raise PrerenderError(f'{url} returned {response.status_code}')
+    if response.cookies:
+        # A cookie (usually CSRF) means the page is specific to one visitor
+        raise PrerenderError(f'{url} sets cookies ({", ".join(response.cookies)}), so it cannot be static')
+    return response.content
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+def load_manifest(root):
+    try:
+        return json.loads((Path(root) / MANIFEST_NAME).read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def prerender(root):
+    """Render every public page into root, touching only files that changed.
+
+    A manifest of content hashes in root records what was written, so pages
+    that render identically are skipped and pages that are no longer public
+    (for example an unpublished course) are removed. Returns a dict of page
+    counts: written, unchanged and removed.
+    """
+    root = Path(root)
+    manifest = load_manifest(root)
+    files = dict(manifest.get('files', {}))
+    counts = {'written': 0, 'unchanged': 0, 'removed': 0}
+
+    versions = page_versions()
+    client = _client()
+    current = set()
+    for url in public_pages():
+        name = output_name(url)
+        current.add(name)
+        content = render_page(client, url)
+        digest = hashlib.sha256(content).hexdigest()
+        path = root / name
+        if files.get(name) == digest and path.exists():
+            counts['unchanged'] += 1
+            continue
+        _write_atomic(path, content)
+        files[name] = digest
+        counts['written'] += 1
+
+    for name in sorted(set(files) - current):
+        path = root / name
+        path.unlink(missing_ok=True)
+        try:
+            path.parent.rmdir()
+        except OSError:
+            pass
+        del files[name]
+        counts['removed'] += 1
+
+    data = json.dumps({'versions': versions, 'files': files}, indent=2, sort_keys=True)
+    _write_atomic(root / MANIFEST_NAME, data.encode())
+    return counts
@@ -0,0 +1,256 @@
+import importlib
+from contextlib import contextmanager
+from datetime import time, timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, clear_url_caches, get_resolver, reverse
+from django.utils import timezone
+
+from bookings.models import Booking, TimeSlot
+from core.benchmarks import Timer
+from core.models import Testimonial, User
+from courses.models import Course, Lesson, Level, Subject, Topic
+from payments.models import Invoice, Payment
+
+
+# URLconfs whose named routes must all declare a budget
+WATCHED_URLCONFS = [
+    'core.urls',
+    'core.urls_dashboard',
+    'courses.urls',
+    'bookings.urls',
+    'payments.urls',
+]
+
+# Maximum queries per view, measured with a cold cache for a logged-in
+# student. Includes the session and user lookups (2 queries).
+BUDGETS = {
+    'core:home': 4,
+    'core:about': 2,
+    'core:pricing': 2,
+    'core:contact': 2,
+    'core:contact_success': 2,
+    'dashboard:home': 4,
+    'dashboard:profile': 2,
+    'dashboard:profile_edit': 2,
+    'dashboard:my_courses': 3,
+    'dashboard:my_bookings': 3,
+    'dashboard:payments': 3,
+    'courses:list': 6,
+    'courses:by_level': 5,
+    'courses:detail': 6,
+    'courses:enroll': 3,
+    'bookings:list': 3,
+    'bookings:create': 3,
+    'bookings:create_for_course': 4,
+    'bookings:detail': 4,
+    'bookings:cancel': 3,
+    'bookings:calendar': 4,
+    'bookings:api_slots': 2,
+    'bookings:api_slots_range': 2,
+    'bookings:api_topics': 3,
+    'payments:checkout': 9,
+    # Confirms the booking through bookings.transitions (lock, update, log,
+    # queue the email in the outbox), then locks the payment to queue its invoice
+    'payments:success': 17,
+    'payments:cancel': 5,
+    # Stores the raw event for process_webhooks with one INSERT
+    'payments:sumup_webhook': 3,
+    'payments:invoice': 3,
+}
+
+# Query strings for routes that need them to do real work
+QUERY_STRINGS = {
+    'bookings:api_slots': 'date={date}',
+    'bookings:api_slots_range': 'start={date}&end={end_date}',
+    'bookings:api_topics': 'course={course_id}',
+    'courses:list': 'q=Course',
+}
+
+# JSON bodies POSTed to routes that only accept POST
+POST_BODIES = {
+    'payments:sumup_webhook': '{{"event_type": "checkout.completed", "id": "{checkout_id}"}}',
+}
+
+
+@contextmanager
+def payments_enabled():
+    """Mount the payments URLs for the duration of a run."""
+    import config.urls
+    import core.urls_dashboard
+
+    def reload_urls():
+        clear_url_caches()
+        importlib.reload(core.urls_dashboard)
+        importlib.reload(config.urls)
+
+    try:
+        with override_settings(PAYMENTS_ENABLED=True):
+            reload_urls()
+            yield
+    finally:
+        reload_urls()
+
+
+def watched_routes(resolver=None, namespace=None):
+    """Yield (route name, URL parameter names) for every watched named route."""
+    resolver = resolver or get_resolver()
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            module = getattr(pattern.urlconf_name, '__name__', pattern.urlconf_name)
+            child_namespace = pattern.namespace or namespace
+            if module in WATCHED_URLCONFS or namespace:
+                yield from watched_routes(pattern, child_namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name and namespace:
+            params = list(getattr(pattern.pattern, 'converters', {}))
+            yield f'{namespace}:{pattern.name}', params
+
+
+def seed_dataset(student, rows, tag):
+    """Create `rows` of everything a student's pages list, tagging names with tag.
+
+    Returns the URL parameters for the detail routes.
+    """
+    level = Level.objects.create(name=f'Level {tag}', slug=f'level-{tag}', order=len(tag))
+    courses = []
+    for i in range(rows):
+        subject = Subject.objects.create(name=f'Subject {tag}{i}', slug=f'subject-{tag}{i}')
+        course = Course.objects.create(
+            title=f'Course {tag}{i}', slug=f'course-{tag}{i}', subject=subject, level=level,
+            description='Seeded course', is_published=True, is_featured=True,
+        )
+        for t in range(rows):
+            topic = Topic.objects.create(course=course, title=f'Topic {t}', order=t, spec_reference=f'1.{t}')
+            for n in range(3):
+                Lesson.objects.create(topic=topic, title=f'Lesson {n}', order=n)
+        courses.append(course)
+
+    Testimonial.objects.bulk_create(
+        Testimonial(name=f'Parent {tag}{i}', role='Parent', content='Great', is_featured=True)
+        for i in range(rows)
+    )
+
+    start_date = timezone.now().date() + timedelta(days=7)
+    bookings = []
+    statuses = [Booking.Status.PENDING, Booking.Status.CONFIRMED, Booking.Status.COMPLETED]
+    for i in range(rows * 3):
+        booking = Booking.objects.create(
+            student=student, course=courses[i % rows], topic=courses[i % rows].topics.first(),
+            date=start_date + timedelta(days=i % 14), start_time=time(16 + i % 4, 0),
+            end_time=time(17 + i % 4, 0), status=statuses[i % 3], price=6000,
+        )
+        bookings.append(booking)
+
+    payments = []
+    for i, booking in enumerate(bookings):
+        payment = Payment.objects.create(
+            user=student, booking=booking, amount=booking.price,
+            status=Payment.Status.COMPLETED, description='Seeded payment',
+            sumup_checkout_id=f'checkout-{tag}{i}',
+        )
+        payments.append(payment)
+    Invoice.objects.create(payment=payments[0], billing_name='Seed', billing_email=student.email)
+
+    return {
+        'slug': courses[0].slug,
+        'level_slug': level.slug,
+        'course_slug': courses[0].slug,
+        'course_id': courses[0].pk,
+        'pk': bookings[1].pk,
+        'booking_id': bookings[0].pk,
+        'payment_id': payments[0].pk,
+        'checkout_id': payments[0].sumup_checkout_id,
+        'date': start_date.isoformat(),
+        'end_date': (start_date + timedelta(weeks=4)).isoformat(),
+    }
+
+
+def measure(client, url, body=None):
+    """Request url with a cold cache and return status, query count and time.
+
+    The request is a GET, or a JSON POST when body is given.
+    """
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries, Timer() as timer:
+        if body is None:
+            response = client.get(url, secure=True)
+        else:
+            response = client.post(url, body, content_type='application/json', secure=True)
+    return {
+        'status': response.status_code,
+        'queries': len(queries),
+        'ms': timer.elapsed * 1000,
+    }
+
+
+def route_url(name, params, fixtures):
+    url = reverse(name, kwargs={param: fixtures[param] for param in params})
+    if name in QUERY_STRINGS:
+        url += '?' + QUERY_STRINGS[name].format(**fixtures)
+    return url
+
+
+def route_body(name, fixtures):
+    body = POST_BODIES.get(name)
+    return body.format(**fixtures) if body else None
+
+
+def check_query_budgets(rows=3, growth_rows=12, budgets=None):
+    """Measure every watched route at two dataset sizes.
+
+    Returns (results, failures): results maps route name to the small and
+    large measurements; failures lists human-readable budget violations.
+    A route fails when it has no budget, errors, exceeds its budget, or runs
+    more queries once more rows exist.
+    """
+    budgets = BUDGETS if budgets is None else budgets
+
+    for day in range(7):
+        TimeSlot.objects.bulk_create(
+            TimeSlot(day_of_week=day, start_time=time(hour, 0), end_time=time(hour + 1, 0))
+            for hour in range(16, 21)
+        )
+    student = User.objects.create_user('budget@example.com', 'budget-password')
+    fixtures = seed_dataset(student, rows, 'a')
+
+    client = Client(raise_request_exception=False)
+    client.force_login(student)
+
+    routes = list(watched_routes())
+    small = {
+        name: measure(client, route_url(name, params, fixtures), route_body(name, fixtures))
+        for name, params in routes
+    }
+    seed_dataset(student, growth_rows, 'b')
+    large = {
+        name: measure(client, route_url(name, params, fixtures), route_body(name, fixtures))
+        for name, params in routes
+    }
+
+    results = {}
+    failures = []
+    for name, params in routes:
+        results[name] = (small[name], large[name])
+        budget = budgets.get(name)
+        if budget is None:
+            failures.append(f'{name}: no query budget declared')
+        elif large[name]['status'] >= 500 or small[name]['status'] >= 500:
+            failures.append(f'{name}: server error')
+        elif large[name]['status'] == 405 or small[name]['status'] == 405:
+            failures.append(f'{name}: method not allowed, so nothing was measured')
+        elif max(small[name]['queries'], large[name]['queries']) > budget:
+            worst = max(small[name]['queries'], large[name]['queries'])
+            failures.append(f'{name}: {worst} queries, budget is {budget}')
+        elif large[name]['queries'] > small[name]['queries']:
+            failures.append(
+                f"{name}: queries grow with rows ({small[name]['queries']} -> {large[name]['queries']})"
+            )
+
+    for name in budgets:
+        if name not in small:
+            failures.append(f'{name}: budget declared for a route that does not exist')
+
+    return results, failures
@@ -0,0 +1,136 @@
+from datetime import date, time, timedelta
+
+from django.db import connection
+
+from bookings.availability import ACTIVE_STATUSES
+from bookings.models import Booking
+from bookings.sweep import SWEEP_ORDERING, sweep_rules
+from core.models import User
+from core.pagination import BOOKING_ORDERING, PAYMENT_ORDERING, KeysetPaginator
+from payments.models import Payment, WebhookEvent
+
+
+# (description, queryset builder, index expected per database vendor). Without
+# statistics SQLite takes the first index that leads with the filtered column,
+# so its choices between indexes on the same prefix are recorded as observed.
+PLAN_CHECKS = [
+    (
+        'Availability for a date range',
+        lambda f: Booking.objects.filter(
+            date__range=(f['date'], f['date'] + timedelta(days=28)), status__in=ACTIVE_STATUSES,
+        ).values_list('date', 'start_time', 'end_time'),
+        {'postgresql': 'bookings_active_date_idx', 'sqlite': 'bookings_date_status_idx'},
+    ),
+    (
+        'Capacity check for one day',
+        lambda f: Booking.objects.filter(
+            date=f['date'], status__in=ACTIVE_STATUSES,
+        ).values_list('start_time', 'end_time'),
+        {'postgresql': 'bookings_active_date_idx', 'sqlite': 'bookings_date_status_idx'},
+    ),
+    (
+        'Dashboard upcoming bookings',
+        lambda f: Booking.objects.filter(
+            student=f['student'], status__in=['confirmed', 'pending'],
+        ).order_by('date', 'start_time')[:5],
+        # SQLite prefers walking the listing index backwards to sorting two IN branches
+        {'postgresql': 'bookings_student_status_idx', 'sqlite': 'bookings_student_listing_idx'},
+    ),
+    (
+        'Dashboard recent bookings',
+        lambda f: Booking.objects.filter(student=f['student'], status='completed').order_by('-date')[:5],
+        {'postgresql': 'bookings_student_status_idx', 'sqlite': 'bookings_student_status_idx'},
+    ),
+    (
+        'Booking history, later page',
+        lambda f: KeysetPaginator(
+            Booking.objects.filter(student=f['student']), BOOKING_ORDERING,
+        ).page_queryset(f['booking_cursor']),
+        {'postgresql': 'bookings_student_listing_idx', 'sqlite': 'bookings_student_listing_idx'},
+    ),
+    (
+        'Payment history, later page',
+        lambda f: KeysetPaginator(
+            Payment.objects.filter(user=f['student']), PAYMENT_ORDERING,
+        ).page_queryset(f['payment_cursor']),
+        {'postgresql': 'payments_user_listing_idx', 'sqlite': 'payments_user_listing_idx'},
+    ),
+    (
+        'Sweep of finished bookings, later batch',
+        lambda f: KeysetPaginator(
+            sweep_rules()[0][1].only(*SWEEP_ORDERING), SWEEP_ORDERING,
+        ).page_queryset(f['sweep_cursor']),
+        {'postgresql': 'bookings_active_date_idx', 'sqlite': 'bookings_date_status_idx'},
+    ),
+    (
+        'Webhook checkout lookup',
+        lambda f: Payment.objects.filter(sumup_checkout_id__in=['chk-1', 'chk-2']).exclude(sumup_checkout_id=''),
+        {'postgresql': 'payments_unique_checkout_id', 'sqlite': 'payments_unique_checkout_id'},
+    ),
+    (
+        'Webhook queue',
+        lambda f: WebhookEvent.objects.filter(status=WebhookEvent.Status.PENDING).order_by('id')[:100],
+        {'postgresql': 'payments_webhook_queue_idx', 'sqlite': 'payments_webhook_queue_idx'},
+    ),
+]
+
+
+def seed_plan_data():
+    """Create a student with enough bookings and payments to page through."""
+    student = User.objects.create_user('plans@example.com', 'plans-password')
+    session_date = date.today() + timedelta(days=7)
+    statuses = list(Booking.Status.values)
+    bookings = Booking.objects.bulk_create(
+        Booking(
+            student=student, date=session_date + timedelta(days=i % 28),
+            start_time=time(16 + i % 4, 0), end_time=time(17 + i % 4, 0),
+            status=statuses[i % len(statuses)], price=6000,
+        )
+        for i in range(200)
+    )
+    Payment.objects.bulk_create(
+        Payment(
+            user=student, booking=booking, amount=booking.price,
+            sumup_checkout_id=f'chk-{i}' if i % 2 else '',
+        )
+        for i, booking in enumerate(bookings)
+    )
+    return {
+        'student': student,
+        'date': session_date,
+        'booking_cursor': KeysetPaginator(
+            Booking.objects.filter(student=student), BOOKING_ORDERING,
+        ).page().next_cursor,
+        'sweep_cursor': KeysetPaginator(
+            Booking.objects.filter(student=student), SWEEP_ORDERING,
+        ).page().next_cursor,
+        'payment_cursor': KeysetPaginator(
+            Payment.objects.filter(user=student), PAYMENT_ORDERING,
+        ).page().next_cursor,
+    }
+
+
+def check_query_plans():
+    """EXPLAIN every PLAN_CHECKS query against freshly seeded data.
+
+    Returns (results, failures): results maps each description to its plan,
+    or None when the database vendor has no expectation; failures lists the
+    checks whose plan does not use the expected index.
+    """
+    fixtures = seed_plan_data()
+    if connection.vendor == 'postgresql':
+        # Tiny tables are cheaper to scan; make the planner show its index choice
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+
+    results = {}
+    failures = []
+    for description, build, expected in PLAN_CHECKS:
+        index = expected.get(connection.vendor)
+        if index is None:
+            results[description] = None
+            continue
+        plan = results[description] = build(fixtures).explain()
+        if index not in plan:
+            failures.append(f'{description}: expected {index}, plan was:\n{plan}')
+    return results, failures
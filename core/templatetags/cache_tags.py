@@ -0,0 +1,52 @@
+from django import template
+from django.core.cache import cache
+
+from core.cache import FRAGMENT_TIMEOUT, fragment_key, tag_versions
+
+
+register = template.Library()
+
+
+class CacheFragmentNode(template.Node):
+    def __init__(self, nodelist, name, tags):
+        self.nodelist = nodelist
+        self.name = name
+        self.tags = tags
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        tags = [tag.resolve(context) for tag in self.tags]
+
+        # Look each tag up once per page, however many fragments share it
+        known = context.render_context.setdefault('cache_tag_versions', {})
+        missing = [tag for tag in tags if tag not in known]
+        if missing:
+            known.update(tag_versions(missing))
+
+        key = fragment_key(name, {tag: known[tag] for tag in tags})
+        content = cache.get(key)
+        if content is None:
+            content = self.nodelist.render(context)
+            cache.set(key, content, FRAGMENT_TIMEOUT)
+        return content
+
+
+@register.tag
+def cachefragment(parser, token):
+    """Cache the enclosed block until one of the given cache tags changes.
+
+    Usage: {% cachefragment 'home-levels' 'catalogue' %} ... {% endcachefragment %}
+
+    Querysets used only inside the block are never evaluated on a hit. The
+    block must not contain anything specific to the visitor.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name")
+    nodelist = parser.parse(('endcachefragment',))
+    parser.delete_first_token()
+    return CacheFragmentNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
@@ -1,3 +1,360 @@
-from django.test import TestCase
+import base64
+import json
+import tempfile
+from datetime import date, time, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import resend
+from django.contrib import messages
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from bookings.models import Booking, TimeSlot
+from core.cache import bump_tags, cache_public_page
+from core.email_backend import ResendEmailBackend, TokenBucket
+from core.models import OutboundEmail, User
+from core.outbox import deliver_batch, retry_delay
+from core.prerender import output_name
+from core.pagination import BOOKING_ORDERING, KeysetPaginator
+from core.query_budget import check_query_budgets, payments_enabled
+from core.query_plans import check_query_plans
+
+
+def encode(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+class QueryBudgetTests(TransactionTestCase):
+    # Not a TestCase: its wrapping transaction would turn every atomic block
+    # into extra SAVEPOINT queries and skew the counts
+
+    def test_routes_within_budgets(self):
+        with payments_enabled():
+            results, failures = check_query_budgets()
+        self.assertEqual(failures, [])
+        self.assertEqual(results['payments:sumup_webhook'][0]['status'], 200)
+
+
+class QueryPlanTests(TestCase):
+
+    def test_hot_queries_use_their_indexes(self):
+        results, failures = check_query_plans()
+        self.assertEqual(failures, [])
+        self.assertTrue(any(results.values()))
+
+
+class KeysetPaginatorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('student@example.com', 'password')
+        start = date(2026, 3, 2)
+        # Several bookings share a date and time, so the id tie-break matters
+        Booking.objects.bulk_create(
+            Booking(
+                student=cls.student, date=start + timedelta(days=i % 3),
+                start_time=time(16 + i % 2), end_time=time(17 + i % 2), price=6000,
+            )
+            for i in range(11)
+        )
+
+    def paginator(self, per_page=3):
+        return KeysetPaginator(Booking.objects.filter(student=self.student), BOOKING_ORDERING, per_page=per_page)
+
+    def test_pages_cover_every_row_once_in_order(self):
+        paginator = self.paginator()
+        seen = []
+        cursor = None
+        while True:
+            page = paginator.page(cursor)
+            seen.extend(booking.id for booking in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        expected = list(Booking.objects.order_by(*BOOKING_ORDERING).values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_exact_multiple_has_no_empty_last_page(self):
+        paginator = self.paginator(per_page=11)
+        page = paginator.page()
+        self.assertEqual(len(page), 11)
+        self.assertFalse(page.has_next)
+
+    def test_malformed_cursors_are_rejected(self):
+        paginator = self.paginator()
+        for cursor in [
+            'not base64!',
+            encode({'date': '2026-03-02'}),
+            encode(['2026-03-02', '16:00:00']),
+            encode([{'a': 1}, '16:00:00', '1']),
+            encode(['2026-03-02', '16:00:00', 1]),
+            encode(['2026-03-02', '16:00:00', 'x']),
+        ]:
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                paginator.decode_cursor(cursor)
+
+
+class CachePublicPageTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.calls = 0
+
+        @cache_public_page('testimonials')
+        def view(request):
+            self.calls += 1
+            return HttpResponse(f'render {self.calls}')
+        self.view = view
+
+    def get(self, path='/page/', **headers):
+        request = self.factory.get(path, headers=headers)
+        request.user = AnonymousUser()
+        return request
+
+    def test_anonymous_page_is_served_from_cache(self):
+        first = self.view(self.get())
+        second = self.view(self.get('/page/?utm_source=mail'))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(second.content, first.content)
+
+    def test_htmx_requests_are_cached_apart(self):
+        self.view(self.get())
+        response = self.view(self.get(HX_Request='true'))
+        self.assertEqual(self.calls, 2)
+        self.assertIn('HX-Request', response['Vary'])
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_tag_bump_renders_again(self):
+        self.view(self.get())
+        bump_tags('testimonials')
+        self.view(self.get())
+        self.assertEqual(self.calls, 2)
+
+    def test_pending_messages_bypass_the_cache(self):
+        self.view(self.get())
+        request = self.get()
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        messages.success(request, 'Thanks for getting in touch')
+
+        response = self.view(request)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(response.content, b'render 2')
+        # Nor is that render stored for the next visitor
+        self.assertEqual(self.view(self.get()).content, b'render 1')
+
+    def test_logged_in_users_bypass_the_cache(self):
+        self.view(self.get())
+        request = self.get()
+        request.user = User(email='student@example.com')
+        self.view(request)
+        self.assertEqual(self.calls, 2)
+
+
+class ServePrerenderedTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.root = Path(tmpdir.name)
+        prerendered = override_settings(SERVE_PRERENDERED=True, PRERENDER_ROOT=self.root)
+        prerendered.enable()
+        self.addCleanup(prerendered.disable)
+
+    def write(self, url, content):
+        path = self.root / output_name(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+
+    def test_current_file_is_served_to_anonymous_visitors(self):
+        self.write('/about/', b'first render')
+        self.assertEqual(self.client.get('/about/').content, b'first render')
+        self.write('/about/', b'second render')
+        self.assertEqual(self.client.get('/about/').content, b'second render')
+
+    def test_missing_file_falls_back_to_the_view(self):
+        response = self.client.get('/about/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'core/about.html')
+
+    def test_logged_in_and_htmx_requests_are_rendered(self):
+        self.write('/about/', b'prerendered')
+        self.assertNotEqual(self.client.get('/about/', headers={'HX-Request': 'true'}).content, b'prerendered')
+        self.client.force_login(User.objects.create_user('student@example.com', 'password'))
+        self.assertNotEqual(self.client.get('/about/').content, b'prerendered')
+
+
+class SetupInitialDataTests(TestCase):
+
+    def call_with_schedule(self, content):
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as f:
+            json.dump(content, f)
+            f.flush()
+            call_command('setup_initial_data', schedule=[f.name], stdout=StringIO())
+
+    def test_schedule_file_must_be_a_list(self):
+        for content in [{'days': [0], 'start': '16:00', 'end': '17:00'}, ['16:00']]:
+            with self.subTest(content=content), self.assertRaisesMessage(CommandError, 'must be a JSON list'):
+                self.call_with_schedule(content)
+
+    def test_schedule_file_is_applied(self):
+        self.call_with_schedule([{'days': [0], 'start': '16:00', 'end': '18:00'}])
+        self.assertEqual(TimeSlot.objects.count(), 2)
+
+
+@override_settings(RESEND_API_KEY='re_test', RESEND_RATE_LIMIT=1000.0)
+class ResendEmailBackendTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch('core.email_backend.resend')
+        self.resend = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.resend.exceptions = resend.exceptions
+        self.resend.Batch.send.side_effect = lambda params, options: {
+            'data': [{'id': f'email-{i}'} for i in range(len(params))],
+        }
+        self.resend.Emails.send.return_value = {'id': 'single'}
+        self.backend = ResendEmailBackend()
+
+    def message(self, i=0, attachment=False):
+        message = EmailMessage(f'Lesson {i}', 'See you soon', to=[f'student{i}@example.com'])
+        if attachment:
+            message.attach('invoice.pdf', b'%PDF', 'application/pdf')
+        return message
+
+    def test_batches_hold_at_most_one_hundred_messages(self):
+        messages = [self.message(i) for i in range(250)]
+        self.assertEqual(self.backend.send_messages(messages), 250)
+        sizes = [len(call.args[0]) for call in self.resend.Batch.send.call_args_list]
+        self.assertEqual(sizes, [100, 100, 50])
+        self.assertEqual(self.resend.Batch.send.call_args.args[1], {'batch_validation': 'permissive'})
+        self.assertEqual(messages[100].resend_id, 'email-0')
+
+    def test_attachments_are_sent_individually(self):
+        messages = [self.message(0), self.message(1, attachment=True)]
+        self.assertEqual(self.backend.send_messages(messages), 2)
+        self.assertEqual(len(self.resend.Batch.send.call_args.args[0]), 1)
+        self.assertEqual(self.resend.Emails.send.call_count, 1)
+        self.assertEqual(messages[1].resend_id, 'single')
+
+    def test_rejected_messages_do_not_stop_the_batch(self):
+        self.resend.Batch.send.side_effect = None
+        self.resend.Batch.send.return_value = {
+            'data': [{'id': 'email-0'}, {'id': 'email-2'}],
+            'errors': [{'index': 1, 'message': 'Invalid to address'}],
+        }
+        messages = [self.message(i) for i in range(3)]
+        self.backend.fail_silently = True
+        with self.assertLogs('core.email_backend', 'ERROR'):
+            self.assertEqual(self.backend.send_messages(messages), 2)
+        self.assertEqual([m.resend_id for m in messages], ['email-0', None, 'email-2'])
+        self.assertIn('Invalid to address', str(messages[1].send_error))
+
+    @mock.patch('core.email_backend.time.sleep')
+    def test_rate_limited_calls_are_retried(self, sleep):
+        rate_limited = resend.exceptions.RateLimitError('Too many requests', 'rate_limit_exceeded', 429)
+        self.resend.Batch.send.side_effect = [rate_limited, {'data': [{'id': 'email-0'}]}]
+        message = self.message()
+        self.assertEqual(self.backend.send_messages([message]), 1)
+        self.assertEqual(message.resend_id, 'email-0')
+        sleep.assert_called_once_with(1)
+
+    @mock.patch('core.email_backend.time.sleep')
+    def test_rate_limit_gives_up_after_retries(self, sleep):
+        rate_limited = resend.exceptions.RateLimitError('Too many requests', 'rate_limit_exceeded', 429)
+        self.resend.Batch.send.side_effect = rate_limited
+        with self.assertLogs('core.email_backend', 'ERROR'), self.assertRaises(resend.exceptions.RateLimitError):
+            self.backend.send_messages([self.message()])
+        self.assertEqual(self.resend.Batch.send.call_count, 3)
+
+
+class TokenBucketTests(SimpleTestCase):
+
+    @mock.patch('core.email_backend.time')
+    def test_waits_for_a_token_once_the_burst_is_spent(self, clock):
+        clock.monotonic.return_value = 100.0
+        clock.sleep.side_effect = lambda seconds: setattr(clock.monotonic, 'return_value', 100.0 + seconds)
+        bucket = TokenBucket(rate=2)
+
+        bucket.acquire()
+        bucket.acquire()
+        clock.sleep.assert_not_called()
+        bucket.acquire()
+        clock.sleep.assert_called_once_with(0.5)
+
+
+class BouncingBackend(BaseEmailBackend):
+    """Delivery backend that fails every message sent to a bounce address."""
+
+    def send_messages(self, email_messages):
+        for i, message in enumerate(email_messages):
+            if 'bounce@example.com' in message.to:
+                message.send_error = ValueError('Mailbox unavailable')
+            else:
+                message.resend_id = f'email-{i}'
+        return len(email_messages)
+
+
+@override_settings(EMAIL_DELIVERY_BACKEND='core.tests.BouncingBackend', EMAIL_OUTBOX_MAX_ATTEMPTS=3)
+class OutboxTests(TestCase):
+
+    def queue(self, *recipients):
+        connection = get_connection('core.email_backend.OutboxEmailBackend')
+        connection.send_messages([EmailMessage('Lesson booked', 'See you soon', to=[to]) for to in recipients])
+
+    def make_due(self):
+        OutboundEmail.objects.update(next_attempt_at=timezone.now())
+
+    def test_backoff_doubles_up_to_an_hour(self):
+        self.assertEqual([retry_delay(n).total_seconds() for n in (1, 2, 3, 7, 8)], [60, 120, 240, 3600, 3600])
+
+    def test_delivered_rows_are_marked_sent(self):
+        self.queue('student@example.com')
+        self.assertEqual(deliver_batch(), {'sent': 1, 'retry': 0, 'dead': 0})
+        row = OutboundEmail.objects.get()
+        self.assertEqual((row.status, row.attempts, row.provider_id), (OutboundEmail.Status.SENT, 1, 'email-0'))
+        self.assertEqual(deliver_batch(), {})
+
+    def test_failed_row_backs_off_without_holding_up_the_rest(self):
+        self.queue('bounce@example.com', 'student@example.com')
+        before = timezone.now()
+        self.assertEqual(deliver_batch(), {'sent': 1, 'retry': 1, 'dead': 0})
+
+        row = OutboundEmail.objects.get(status=OutboundEmail.Status.QUEUED)
+        self.assertEqual((row.attempts, row.last_error), (1, 'Mailbox unavailable'))
+        self.assertGreaterEqual(row.next_attempt_at, before + timedelta(minutes=1))
+        # Not due again until the backoff has passed
+        self.assertEqual(deliver_batch(), {})
+
+    def test_row_is_dead_lettered_after_max_attempts(self):
+        self.queue('bounce@example.com')
+        for _ in range(2):
+            self.make_due()
+            self.assertEqual(deliver_batch(), {'sent': 0, 'retry': 1, 'dead': 0})
+        self.make_due()
+        with self.assertLogs('core.outbox', 'ERROR'):
+            self.assertEqual(deliver_batch(), {'sent': 0, 'retry': 0, 'dead': 1})
+
+        row = OutboundEmail.objects.get()
+        self.assertEqual((row.status, row.attempts), (OutboundEmail.Status.DEAD, 3))
+        self.make_due()
+        self.assertEqual(deliver_batch(), {})
+
+    def test_backend_error_retries_the_whole_batch(self):
+        self.queue('student@example.com', 'parent@example.com')
+        failing = mock.patch.object(BouncingBackend, 'send_messages', side_effect=ConnectionError('API down'))
+        with failing, self.assertLogs('core.outbox', 'ERROR'):
+            self.assertEqual(deliver_batch(), {'sent': 0, 'retry': 2, 'dead': 0})
+        self.assertEqual(set(OutboundEmail.objects.values_list('last_error', flat=True)), {'API down'})
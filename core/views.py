@@ -4,15 +4,22 @@ from django.contrib import messages
 from django.conf import settings
 from django.http import HttpResponse
 
+from .cache import cache_public_page
+from .pagination import BOOKING_ORDERING, PAYMENT_ORDERING, paginate, render_paginated
 from .models import Testimonial, ContactMessage
 from .forms import ContactForm, ProfileForm
 from courses.models import Course, Level
 from bookings.models import Booking
 
 
+@cache_public_page('catalogue', 'testimonials')
 def home(request):
-    """Landing page."""
-    featured_courses = Course.objects.filter(is_published=True, is_featured=True)[:3]
+    """Landing page.
+
+    The querysets are lazy and the template renders them inside cached
+    fragments, so a warm cache serves the page without touching the database.
+    """
+    featured_courses = Course.objects.filter(is_published=True, is_featured=True).select_related('level')[:3]
     testimonials = Testimonial.objects.filter(is_featured=True)[:3]
     levels = Level.objects.all()
 
@@ -24,11 +31,13 @@ def home(request):
     return render(request, 'core/home.html', context)
 
 
+@cache_public_page()
 def about(request):
     """About page with tutor credentials."""
     return render(request, 'core/about.html')
 
 
+@cache_public_page('catalogue')
 def pricing(request):
     """Pricing page."""
     levels = Level.objects.all()
@@ -63,12 +72,12 @@ def contact_success(request):
 @login_required
 def dashboard(request):
     """Student dashboard."""
-    upcoming_bookings = Booking.objects.filter(
+    upcoming_bookings = Booking.objects.for_listing().filter(
         student=request.user,
         status__in=['confirmed', 'pending']
     ).order_by('date', 'start_time')[:5]
 
-    recent_bookings = Booking.objects.filter(
+    recent_bookings = Booking.objects.for_listing().filter(
         student=request.user,
         status='completed'
     ).order_by('-date')[:5]
@@ -109,15 +118,15 @@ def my_courses(request):
         student=request.user
     ).values_list('course_id', flat=True).distinct()
 
-    courses = Course.objects.filter(id__in=course_ids)
+    courses = Course.objects.filter(id__in=course_ids).select_related('level')
 
     return render(request, 'dashboard/my_courses.html', {'courses': courses})
 
 
 @login_required
 def my_bookings(request):
-    """Student's bookings."""
-    bookings = Booking.objects.filter(student=request.user)
+    """Student's bookings, a page at a time."""
+    bookings = Booking.objects.for_listing().filter(student=request.user)
 
     # Filter by status if provided
     status = request.GET.get('status')
@@ -125,18 +134,20 @@ def my_bookings(request):
         bookings = bookings.filter(status=status)
 
     context = {
-        'bookings': bookings,
+        'bookings': paginate(request, bookings, BOOKING_ORDERING),
         'current_status': status,
     }
-    return render(request, 'dashboard/my_bookings.html', context)
+    return render_paginated(request, 'dashboard/my_bookings.html', 'dashboard/partials/booking_rows.html', context)
 
 
 @login_required
 def payment_history(request):
-    """Payment history."""
+    """Payment history, a page at a time."""
     if not settings.PAYMENTS_ENABLED:
         return redirect('dashboard:home')
     from payments.models import Payment
-    payments = Payment.objects.filter(user=request.user)
+    payments = paginate(request, Payment.objects.filter(user=request.user), PAYMENT_ORDERING)
 
-    return render(request, 'dashboard/payments.html', {'payments': payments})
+    return render_paginated(
+        request, 'dashboard/payments.html', 'dashboard/partials/payment_rows.html', {'payments': payments}
+    )
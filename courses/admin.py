@@ -1,4 +1,7 @@
 from django.contrib import admin
+
+from core.admin_utils import CachedRelatedFieldListFilter, LargeTableAdminMixin
+
 from .models import Level, Subject, Course, Topic, Lesson, Resource, StudentProgress
 
 
@@ -25,7 +28,11 @@ class TopicInline(admin.TabularInline):
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
     list_display = ('title', 'level', 'subject', 'delivery_mode', 'is_published', 'is_featured')
-    list_filter = ('level', 'subject', 'is_published', 'is_featured', 'delivery_mode')
+    list_filter = (
+        ('level', CachedRelatedFieldListFilter), ('subject', CachedRelatedFieldListFilter),
+        'is_published', 'is_featured', 'delivery_mode',
+    )
+    list_select_related = ('level', 'subject')
     prepopulated_fields = {'slug': ('title',)}
     search_fields = ('title', 'description')
     list_editable = ('is_published', 'is_featured')
@@ -56,7 +63,9 @@ class LessonInline(admin.TabularInline):
 @admin.register(Topic)
 class TopicAdmin(admin.ModelAdmin):
     list_display = ('title', 'course', 'order', 'spec_reference')
-    list_filter = ('course__level', 'course')
+    list_filter = (('course__level', CachedRelatedFieldListFilter), ('course', CachedRelatedFieldListFilter))
+    list_select_related = ('course__level',)
+    autocomplete_fields = ('course',)
     search_fields = ('title', 'description', 'spec_reference')
     inlines = [LessonInline]
 
@@ -69,7 +78,11 @@ class ResourceInline(admin.TabularInline):
 @admin.register(Lesson)
 class LessonAdmin(admin.ModelAdmin):
     list_display = ('title', 'topic', 'order', 'duration_minutes')
-    list_filter = ('topic__course__level', 'topic__course')
+    list_filter = (
+        ('topic__course__level', CachedRelatedFieldListFilter), ('topic__course', CachedRelatedFieldListFilter),
+    )
+    list_select_related = ('topic__course',)
+    autocomplete_fields = ('topic',)
     search_fields = ('title', 'description', 'content')
     inlines = [ResourceInline]
 
@@ -78,11 +91,15 @@ class LessonAdmin(admin.ModelAdmin):
 class ResourceAdmin(admin.ModelAdmin):
     list_display = ('title', 'lesson', 'resource_type')
     list_filter = ('resource_type',)
+    list_select_related = ('lesson__topic',)
+    autocomplete_fields = ('lesson',)
     search_fields = ('title', 'description')
 
 
 @admin.register(StudentProgress)
-class StudentProgressAdmin(admin.ModelAdmin):
+class StudentProgressAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('user', 'course', 'lesson', 'completed', 'completed_at')
-    list_filter = ('completed', 'course')
+    list_filter = ('completed', ('course', CachedRelatedFieldListFilter))
+    list_select_related = ('user', 'course__level', 'lesson__topic')
+    autocomplete_fields = ('user', 'course', 'lesson')
     search_fields = ('user__email', 'user__first_name', 'user__last_name')
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Lesson
+
+
+CURRICULUM_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def curriculum_cache_key(course_id):
+    return f'courses:curriculum:{course_id}'
+
+
+def build_curriculum(course):
+    """Load a course's Topic -> Lesson tree as plain data in two queries.
+
+    Each topic carries its lesson count and total minutes, and each lesson
+    its resource count, so templates never need to query per row.
+    """
+    topics = []
+    topics_by_id = {}
+    for topic in course.topics.values('id', 'title', 'description', 'spec_reference', 'order'):
+        topic.update(lessons=[], lesson_count=0, total_minutes=0)
+        topics.append(topic)
+        topics_by_id[topic['id']] = topic
+
+    lessons = Lesson.objects.filter(topic__course=course).annotate(
+        resource_count=Count('resources'),
+    ).values('id', 'topic_id', 'title', 'duration_minutes', 'order', 'resource_count')
+    for lesson in lessons:
+        topic = topics_by_id[lesson.pop('topic_id')]
+        topic['lessons'].append(lesson)
+        topic['lesson_count'] += 1
+        topic['total_minutes'] += lesson['duration_minutes']
+
+    return {
+        'topics': topics,
+        'lesson_count': sum(topic['lesson_count'] for topic in topics),
+        'total_minutes': sum(topic['total_minutes'] for topic in topics),
+    }
+
+
+def get_curriculum(course):
+    """Return the cached curriculum tree for a course, building it if needed."""
+    key = curriculum_cache_key(course.pk)
+    curriculum = cache.get(key)
+    if curriculum is None:
+        curriculum = build_curriculum(course)
+        cache.set(key, curriculum, CURRICULUM_CACHE_TIMEOUT)
+    return curriculum
+
+
+def invalidate_curriculum(course_id):
+    """Drop a course's cached curriculum once the current transaction commits."""
+    if course_id:
+        transaction.on_commit(lambda: cache.delete(curriculum_cache_key(course_id)))
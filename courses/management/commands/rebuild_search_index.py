@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from courses.search import index_courses
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the course search index from courses, topics and lessons'
+
+    def handle(self, *args, **options):
+        indexed = index_courses()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} courses'))
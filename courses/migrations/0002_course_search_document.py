@@ -0,0 +1,104 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:50
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import OperationalError, migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX courses_search_vector_gin '
+            'ON courses_coursesearchdocument USING gin (search_vector)'
+        )
+    elif connection.vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                'CREATE VIRTUAL TABLE courses_search_fts USING fts5('
+                'heading, summary, topics, lessons, '
+                "tokenize = 'porter unicode61')"
+            )
+        except OperationalError:
+            # SQLite built without FTS5: searches fall back to substring matching
+            pass
+
+
+def _join(*parts):
+    return '\n'.join(part for part in parts if part)
+
+
+def backfill_documents(apps, schema_editor):
+    # Index the courses that already exist, so search works straight after
+    # deploy. A frozen copy of courses.search.build_document, as migrations
+    # must not depend on code that changes later.
+    Course = apps.get_model('courses', 'Course')
+    CourseSearchDocument = apps.get_model('courses', 'CourseSearchDocument')
+    connection = schema_editor.connection
+
+    documents = []
+    for course in Course.objects.select_related('subject', 'level').prefetch_related('topics__lessons'):
+        topics = sorted(course.topics.all(), key=lambda topic: topic.order)
+        documents.append(CourseSearchDocument(
+            course=course,
+            heading=_join(course.title, course.subject.name, course.level.name, course.syllabus_reference),
+            summary=_join(course.description, course.learning_outcomes, course.prerequisites),
+            topics='\n'.join(_join(topic.spec_reference, topic.title, topic.description) for topic in topics),
+            lessons='\n'.join(
+                _join(lesson.title, lesson.description, lesson.content)
+                for topic in topics
+                for lesson in sorted(topic.lessons.all(), key=lambda lesson: lesson.order)
+            ),
+        ))
+    CourseSearchDocument.objects.bulk_create(documents, batch_size=500)
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchVector
+        vector = (
+            SearchVector('heading', weight='A', config='english')
+            + SearchVector('summary', weight='B', config='english')
+            + SearchVector('topics', weight='B', config='english')
+            + SearchVector('lessons', weight='C', config='english')
+        )
+        CourseSearchDocument.objects.update(search_vector=vector)
+    elif connection.vendor == 'sqlite' and 'courses_search_fts' in connection.introspection.table_names():
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT INTO courses_search_fts (rowid, heading, summary, topics, lessons) VALUES (%s, %s, %s, %s, %s)',
+                [
+                    [document.course_id, document.heading, document.summary, document.topics, document.lessons]
+                    for document in documents
+                ],
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS courses_search_vector_gin')
+    elif connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS courses_search_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseSearchDocument',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='courses.course')),
+                ('heading', models.TextField(blank=True, help_text='Title, subject, level and syllabus')),
+                ('summary', models.TextField(blank=True, help_text='Description, outcomes and prerequisites')),
+                ('topics', models.TextField(blank=True, help_text='Topic titles, descriptions and spec references')),
+                ('lessons', models.TextField(blank=True, help_text='Lesson titles, descriptions and content')),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.text import slugify
 from django.urls import reverse
@@ -177,3 +178,28 @@ class StudentProgress(models.Model):
 
     def __str__(self):
         return f"{self.user} - {self.lesson}"
+
+
+class CourseSearchDocument(models.Model):
+    """Denormalised search text for a course, its topics and its lessons.
+
+    Kept up to date by courses.search on save. PostgreSQL searches the
+    weighted search_vector through a GIN index; SQLite mirrors the text
+    columns into an FTS5 table.
+    """
+
+    course = models.OneToOneField(
+        Course,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document'
+    )
+    heading = models.TextField(blank=True, help_text="Title, subject, level and syllabus")
+    summary = models.TextField(blank=True, help_text="Description, outcomes and prerequisites")
+    topics = models.TextField(blank=True, help_text="Topic titles, descriptions and spec references")
+    lessons = models.TextField(blank=True, help_text="Lesson titles, descriptions and content")
+    search_vector = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Search document for {self.course_id}"
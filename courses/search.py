@@ -0,0 +1,155 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Prefetch, Q, Value, When
+
+from .models import Course, CourseSearchDocument, Lesson, Topic
+
+
+FTS_TABLE = 'courses_search_fts'
+SEARCH_CONFIG = 'english'
+
+# Column weights, most to least important
+DOCUMENT_FIELDS = ['heading', 'summary', 'topics', 'lessons']
+PG_WEIGHTS = {'heading': 'A', 'summary': 'B', 'topics': 'B', 'lessons': 'C'}
+BM25_WEIGHTS = [10.0, 4.0, 4.0, 1.0]
+
+# Most SQLite FTS matches ranked per search
+MAX_RESULTS = 200
+
+
+def _join(*parts):
+    return '\n'.join(part for part in parts if part)
+
+
+def build_document(course):
+    """Return the search text for a course with topics and lessons prefetched."""
+    topics = []
+    lessons = []
+    for topic in course.topics.all():
+        topics.append(_join(topic.spec_reference, topic.title, topic.description))
+        for lesson in topic.lessons.all():
+            lessons.append(_join(lesson.title, lesson.description, lesson.content))
+
+    return {
+        'heading': _join(course.title, course.subject.name, course.level.name, course.syllabus_reference),
+        'summary': _join(course.description, course.learning_outcomes, course.prerequisites),
+        'topics': '\n'.join(topics),
+        'lessons': '\n'.join(lessons),
+    }
+
+
+def has_fts_table():
+    return connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names()
+
+
+def index_courses(course_ids=None):
+    """Rebuild the search documents for the given courses (all when None)."""
+    courses = Course.objects.select_related('subject', 'level').prefetch_related(
+        Prefetch('topics', queryset=Topic.objects.order_by('order')),
+        Prefetch('topics__lessons', queryset=Lesson.objects.order_by('order')),
+    )
+    if course_ids is not None:
+        courses = courses.filter(pk__in=course_ids)
+
+    documents = [
+        CourseSearchDocument(course=course, **build_document(course))
+        for course in courses
+    ]
+    indexed_ids = [document.course_id for document in documents]
+
+    with transaction.atomic():
+        CourseSearchDocument.objects.bulk_create(
+            documents,
+            update_conflicts=True,
+            unique_fields=['course'],
+            update_fields=DOCUMENT_FIELDS + ['updated_at'],
+        )
+
+        if connection.vendor == 'postgresql':
+            vector = None
+            for field in DOCUMENT_FIELDS:
+                part = SearchVector(field, weight=PG_WEIGHTS[field], config=SEARCH_CONFIG)
+                vector = part if vector is None else vector + part
+            CourseSearchDocument.objects.filter(course_id__in=indexed_ids).update(search_vector=vector)
+        elif has_fts_table():
+            with connection.cursor() as cursor:
+                _delete_fts_rows(cursor, indexed_ids)
+                cursor.executemany(
+                    f'INSERT INTO {FTS_TABLE} (rowid, {", ".join(DOCUMENT_FIELDS)}) VALUES (%s, %s, %s, %s, %s)',
+                    [
+                        [document.course_id] + [getattr(document, field) for field in DOCUMENT_FIELDS]
+                        for document in documents
+                    ],
+                )
+
+    return len(documents)
+
+
+def _delete_fts_rows(cursor, course_ids):
+    if course_ids:
+        placeholders = ', '.join(['%s'] * len(course_ids))
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', list(course_ids))
+
+
+def remove_courses(course_ids):
+    """Drop deleted courses from the SQLite FTS table.
+
+    Search documents themselves go with the course through the cascade.
+    """
+    if has_fts_table():
+        with connection.cursor() as cursor:
+            _delete_fts_rows(cursor, course_ids)
+
+
+def schedule_reindex(course_id):
+    """Reindex a course after the current transaction commits."""
+    if course_id:
+        transaction.on_commit(lambda: index_courses([course_id]))
+
+
+def _fts_query(query):
+    # Quote every term so punctuation such as "1.4.2" is matched as a phrase,
+    # and prefix-match the last term for search-as-you-type.
+    terms = ['"{}"'.format(term.replace('"', '""')) for term in query.split()]
+    if terms:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_courses(queryset, query):
+    """Filter a Course queryset to matches for query, best matches first."""
+    query = query.strip()
+    if not query:
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+        vector = F('search_document__search_vector')
+        return queryset.filter(search_document__search_vector=search_query).annotate(
+            search_rank=SearchRank(vector, search_query),
+        ).order_by('-search_rank')
+
+    if has_fts_table():
+        # Apply the caller's filters (level, published) inside the FTS query,
+        # so the LIMIT keeps the best matches that can actually be shown
+        candidates, candidate_params = queryset.order_by().values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid IN ({candidates}) '
+                f'ORDER BY bm25({FTS_TABLE}, {", ".join(map(str, BM25_WEIGHTS))}) LIMIT {MAX_RESULTS}',
+                [_fts_query(query), *candidate_params],
+            )
+            ranked_ids = [row[0] for row in cursor.fetchall()]
+        if not ranked_ids:
+            return queryset.none()
+        ranking = Case(
+            *[When(pk=course_id, then=Value(position)) for position, course_id in enumerate(ranked_ids)],
+            output_field=IntegerField(),
+        )
+        return queryset.filter(pk__in=ranked_ids).annotate(search_rank=ranking).order_by('search_rank')
+
+    # No full-text support: fall back to a substring match on the documents
+    matches = Q()
+    for field in DOCUMENT_FIELDS:
+        matches |= Q(**{f'search_document__{field}__icontains': query})
+    return queryset.filter(matches)
@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .curriculum import invalidate_curriculum
+from .models import Course, Lesson, Level, Resource, Subject, Topic
+from .search import remove_courses, schedule_reindex
+
+
+def _content_changed(course_id):
+    invalidate_curriculum(course_id)
+    schedule_reindex(course_id)
+
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, **kwargs):
+    schedule_reindex(instance.pk)
+
+
+@receiver(post_delete, sender=Course)
+def course_deleted(sender, instance, **kwargs):
+    remove_courses([instance.pk])
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_save, sender=Level)
+def course_labels_changed(sender, instance, **kwargs):
+    for course_id in instance.courses.values_list('pk', flat=True):
+        schedule_reindex(course_id)
+
+
+@receiver([post_save, post_delete], sender=Topic)
+def topic_changed(sender, instance, **kwargs):
+    _content_changed(instance.course_id)
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+def lesson_changed(sender, instance, **kwargs):
+    course_id = Topic.objects.filter(pk=instance.topic_id).values_list('course_id', flat=True).first()
+    _content_changed(course_id)
+
+
+@receiver([post_save, post_delete], sender=Resource)
+def resource_changed(sender, instance, **kwargs):
+    course_id = Lesson.objects.filter(pk=instance.lesson_id).values_list('topic__course_id', flat=True).first()
+    invalidate_curriculum(course_id)
@@ -1,3 +1,100 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
 
-# Create your tests here.
+from .curriculum import get_curriculum
+from .models import Course, Lesson, Level, Subject, Topic
+from .search import has_fts_table, index_courses, search_courses
+
+
+class CourseTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.gcse = Level.objects.create(name='GCSE', slug='gcse', order=1)
+        cls.a_level = Level.objects.create(name='A-Level', slug='a-level', order=2)
+
+    @classmethod
+    def make_course(cls, title, level=None):
+        slug = title.lower().replace(' ', '-')
+        subject = Subject.objects.create(name=title, slug=slug)
+        return Course.objects.create(
+            title=title, slug=slug, subject=subject, level=level or cls.gcse,
+            description='A course', is_published=True,
+        )
+
+
+class CurriculumCacheTests(CourseTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.course = self.make_course('Networks')
+        self.topic = Topic.objects.create(course=self.course, title='Protocols', order=1)
+        Lesson.objects.create(topic=self.topic, title='TCP/IP', order=1, duration_minutes=45)
+
+    def test_tree_is_cached(self):
+        with self.assertNumQueries(2):
+            curriculum = get_curriculum(self.course)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_curriculum(self.course), curriculum)
+        self.assertEqual((curriculum['lesson_count'], curriculum['total_minutes']), (1, 45))
+
+    def test_adding_a_lesson_refreshes_the_tree(self):
+        get_curriculum(self.course)
+        with self.captureOnCommitCallbacks(execute=True):
+            Lesson.objects.create(topic=self.topic, title='DNS', order=2, duration_minutes=30)
+
+        curriculum = get_curriculum(self.course)
+        self.assertEqual((curriculum['lesson_count'], curriculum['total_minutes']), (2, 75))
+        self.assertEqual([lesson['title'] for lesson in curriculum['topics'][0]['lessons']], ['TCP/IP', 'DNS'])
+
+
+class SearchTests(CourseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.algorithms = cls.make_course('Algorithms')
+        topic = Topic.objects.create(course=cls.algorithms, title='Searching', spec_reference='1.4.2')
+        Lesson.objects.create(topic=topic, title='Binary search', content='Written with recursion and loops.')
+
+        cls.recursion = cls.make_course('Recursion Deep Dive', level=cls.a_level)
+        cls.databases_course = cls.make_course('Databases')
+        Topic.objects.create(course=cls.databases_course, title='SQL', spec_reference='1.3.2')
+        index_courses()
+
+    def test_sqlite_uses_the_fts_index(self):
+        if connection.vendor == 'sqlite':
+            self.assertTrue(has_fts_table())
+
+    def search(self, query, queryset=None):
+        return list(search_courses(queryset or Course.objects.all(), query))
+
+    def test_spec_reference_matches_as_a_phrase(self):
+        self.assertEqual(self.search('1.4.2'), [self.algorithms])
+
+    def test_lesson_content_matches(self):
+        self.assertIn(self.algorithms, self.search('recursion'))
+
+    def test_heading_matches_rank_first(self):
+        self.assertEqual(self.search('recursion'), [self.recursion, self.algorithms])
+
+    def test_last_term_matches_as_a_prefix(self):
+        self.assertEqual(self.search('databa'), [self.databases_course])
+
+    def test_filters_apply_before_ranking(self):
+        queryset = Course.objects.filter(level=self.gcse)
+        self.assertEqual(self.search('recursion', queryset), [self.algorithms])
+
+    def test_operator_characters_are_searched_literally(self):
+        for query in ['"', 'NEAR(', '*', 'recursion AND', '-loops', '"recursion', '(1.4']:
+            with self.subTest(query=query):
+                self.search(query)
+
+    def test_blank_query_returns_everything(self):
+        self.assertEqual(len(self.search('  ')), 3)
+
+    def test_saving_a_lesson_reindexes_its_course(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Lesson.objects.create(topic=self.databases_course.topics.get(), title='Normalisation')
+        self.assertEqual(self.search('normalisation'), [self.databases_course])
@@ -1,14 +1,18 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
 
+from core.cache import cache_public_page
+
+from .curriculum import get_curriculum
 from .models import Course, Level, Subject, Topic
+from .search import search_courses
 
 
+@cache_public_page('catalogue')
 def course_list(request, level_slug=None):
     """List all courses, optionally filtered by level."""
-    courses = Course.objects.filter(is_published=True)
+    courses = Course.objects.filter(is_published=True).select_related('level')
     levels = Level.objects.all()
     current_level = None
 
@@ -19,11 +23,7 @@ def course_list(request, level_slug=None):
     # Search functionality
     query = request.GET.get('q')
     if query:
-        courses = courses.filter(
-            Q(title__icontains=query) |
-            Q(description__icontains=query) |
-            Q(subject__name__icontains=query)
-        )
+        courses = search_courses(courses, query)
 
     context = {
         'courses': courses,
@@ -36,18 +36,19 @@ def course_list(request, level_slug=None):
 
 def course_detail(request, slug):
     """Course detail page."""
-    course = get_object_or_404(Course, slug=slug, is_published=True)
-    topics = course.topics.prefetch_related('lessons')
+    course = get_object_or_404(Course.objects.select_related('level'), slug=slug, is_published=True)
+    curriculum = get_curriculum(course)
 
     # Related courses
     related_courses = Course.objects.filter(
         is_published=True,
-        subject=course.subject
-    ).exclude(id=course.id)[:3]
+        subject_id=course.subject_id
+    ).exclude(id=course.id).select_related('level')[:3]
 
     context = {
         'course': course,
-        'topics': topics,
+        'curriculum': curriculum,
+        'topics': curriculum['topics'],
         'related_courses': related_courses,
     }
     return render(request, 'courses/detail.html', context)
@@ -1,15 +1,24 @@
-from django.contrib import admin
-from .models import Payment, Refund, Invoice
+from django.contrib import admin, messages
+from django.utils import timezone
+
+from core.admin_utils import LargeTableAdminMixin
+
+from .models import Payment, Refund, Invoice, WebhookEvent
+from .refunds import LIVE_STATUSES
 
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = (
         'id', 'user', 'booking', 'amount_display',
         'payment_method', 'status', 'created_at', 'paid_at'
     )
     list_filter = ('status', 'payment_method', 'created_at')
+    list_select_related = ('user', 'booking__student')
     search_fields = ('user__email', 'sumup_checkout_id', 'sumup_transaction_id')
+    autocomplete_fields = ('user', 'booking')
+    # Matches payments_created_order_idx
+    ordering = ('-created_at', 'id')
     readonly_fields = ('created_at', 'updated_at', 'amount_display')
     date_hierarchy = 'created_at'
 
@@ -36,14 +45,65 @@ class PaymentAdmin(admin.ModelAdmin):
 
 @admin.register(Refund)
 class RefundAdmin(admin.ModelAdmin):
-    list_display = ('id', 'payment', 'amount', 'created_at', 'processed_at')
-    list_filter = ('created_at',)
+    list_display = ('id', 'payment', 'amount', 'status', 'attempts', 'error', 'created_at', 'processed_at')
+    list_filter = ('status', 'created_at')
+    list_select_related = ('payment__user',)
+    autocomplete_fields = ('payment',)
     search_fields = ('payment__user__email', 'reason')
+    readonly_fields = ('error', 'attempts', 'next_attempt_at', 'sumup_refund_id', 'created_at', 'processed_at')
+    actions = ['requeue']
+
+    def requeue(self, request, queryset):
+        # Processing refunds are only left behind by a worker that died: check
+        # SumUp has not paid them before sending them again
+        refunds = queryset.filter(status__in=[Refund.Status.FAILED, Refund.Status.PROCESSING]).order_by('-id')
+        live = set(
+            Refund.objects.filter(status__in=LIVE_STATUSES)
+            .exclude(id__in=refunds.values('id'))
+            .values_list('payment_id', flat=True)
+        )
+        requeue = {}
+        for refund_id, payment_id in refunds.values_list('id', 'payment_id'):
+            # One refund per payment, and none where another is queued or paid
+            if payment_id not in live:
+                requeue.setdefault(payment_id, refund_id)
+        requeued = Refund.objects.filter(id__in=requeue.values()).update(
+            status=Refund.Status.PENDING, error='', attempts=0, next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f"{requeued} refund(s) requeued.")
+        skipped = queryset.count() - requeued
+        if skipped:
+            self.message_user(
+                request, f"{skipped} refund(s) skipped: not failed or processing, or their payment "
+                "already has a refund queued or paid.",
+                messages.WARNING,
+            )
+    requeue.short_description = "Requeue selected failed or stuck refunds"
 
 
 @admin.register(Invoice)
-class InvoiceAdmin(admin.ModelAdmin):
-    list_display = ('invoice_number', 'payment', 'billing_name', 'created_at', 'sent_at')
-    list_filter = ('created_at',)
+class InvoiceAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('invoice_number', 'payment', 'billing_name', 'pdf_status', 'created_at', 'sent_at')
+    list_filter = ('pdf_status', 'created_at')
+    list_select_related = ('payment__user',)
+    autocomplete_fields = ('payment',)
     search_fields = ('invoice_number', 'billing_name', 'billing_email')
-    readonly_fields = ('invoice_number', 'created_at')
+    readonly_fields = ('invoice_number', 'pdf_hash', 'pdf_rendered_at', 'pdf_claimed_at', 'created_at')
+    actions = ['rerender_pdf']
+
+    def rerender_pdf(self, request, queryset):
+        queryset.update(pdf_status=Invoice.PdfStatus.PENDING)
+    rerender_pdf.short_description = "Queue selected invoices for PDF rendering"
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('event_id', 'event_type', 'status', 'error', 'received_at', 'processed_at')
+    list_filter = ('status', 'event_type')
+    search_fields = ('event_id', 'payload')
+    readonly_fields = ('event_id', 'event_type', 'payload', 'received_at', 'processed_at')
+    actions = ['requeue']
+
+    def requeue(self, request, queryset):
+        queryset.update(status=WebhookEvent.Status.PENDING, error='', processed_at=None)
+    requeue.short_description = "Requeue selected events"
@@ -0,0 +1,157 @@
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Responses that mean the remote side is struggling rather than rejecting us
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+class CircuitOpen(requests.ConnectionError):
+    """Raised without touching the network while the circuit is open."""
+
+
+class CircuitBreaker:
+    """Fail fast after repeated failures, then let one probe through.
+
+    Closed: requests flow. After failure_threshold consecutive failures the
+    circuit opens and every call fails immediately for reset_timeout seconds.
+    The first call after that is a probe: success closes the circuit, failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.probing or time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info('Circuit closed after successful probe')
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+                logger.warning('Circuit opened after %d consecutive failures', self.failures)
+                self.opened_at = time.monotonic()
+                self.probing = False
+
+
+class HttpClient:
+    """Keep-alive HTTP client with timeouts, retries and a circuit breaker.
+
+    Connection errors are retried for every method, since the request never
+    reached the server. Read errors and retryable statuses are only retried
+    for idempotent methods, with jittered exponential backoff.
+    """
+
+    def __init__(self, base_url, timeout=(3.05, 10.0), retries=2, backoff=0.3,
+                 pool_size=10, breaker=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            other=0,
+            allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+            status_forcelist=RETRY_STATUSES,
+            backoff_factor=backoff,
+            backoff_jitter=backoff,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method, path, **kwargs):
+        if not self.breaker.allow():
+            raise CircuitOpen(f'{method} {path}: circuit open, not calling {self.base_url}')
+
+        kwargs.setdefault('timeout', self.timeout)
+        try:
+            response = self.session.request(method, f'{self.base_url}{path}', **kwargs)
+        except requests.RequestException as e:
+            self.breaker.record_failure()
+            logger.warning('%s %s failed: %s', method, path, e)
+            raise
+
+        if response.status_code >= 500 or response.status_code == 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def sumup_client():
+    """Return this process's shared SumUp client.
+
+    Clients are keyed by process id so forked workers never share a pooled
+    socket with their parent.
+    """
+    key = (os.getpid(), settings.SUMUP_API_URL)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = HttpClient(
+                    settings.SUMUP_API_URL,
+                    timeout=(settings.SUMUP_CONNECT_TIMEOUT, settings.SUMUP_READ_TIMEOUT),
+                    retries=settings.SUMUP_MAX_RETRIES,
+                    pool_size=settings.SUMUP_POOL_SIZE,
+                    breaker=CircuitBreaker(
+                        failure_threshold=settings.SUMUP_CIRCUIT_FAILURES,
+                        reset_timeout=settings.SUMUP_CIRCUIT_RESET,
+                    ),
+                )
+                _clients[key] = client
+    return client
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Q
+from django.template.defaultfilters import date as format_date
+from django.utils import timezone
+
+from core.context_processors import site_settings
+
+from .models import Invoice, Payment
+from .numbering import allocate_invoice_numbers
+from .pdf import render_invoice_pdf
+
+
+logger = logging.getLogger(__name__)
+
+# Bump when the PDF layout changes so stored documents are rendered again
+LAYOUT_VERSION = 1
+
+# How long a worker may hold invoices it claimed before others take them over
+RENDER_LEASE = timedelta(minutes=10)
+
+
+def queue_invoices(payment_ids):
+    """Create pending invoices for the given payments that have none yet.
+
+    The payment rows are locked with a no-op UPDATE before checking for an
+    existing invoice, so concurrent callers for the same payment run one
+    after the other and the second finds the first's invoice. Writing first,
+    as allocate_invoice_numbers does, also takes SQLite's write lock up
+    front. Invoice numbers are allocated as one block. Returns the invoices
+    created.
+    """
+    with transaction.atomic():
+        Payment.objects.filter(id__in=payment_ids).update(updated_at=F('updated_at'))
+        payments = list(
+            Payment.objects.filter(id__in=payment_ids, invoice__isnull=True).select_related('user').order_by('id')
+        )
+        if not payments:
+            return []
+
+        numbers = allocate_invoice_numbers(len(payments))
+        return Invoice.objects.bulk_create(
+            Invoice(
+                payment=payment,
+                invoice_number=number,
+                billing_name=payment.user.get_full_name(),
+                billing_email=payment.receipt_email or payment.user.email,
+            )
+            for payment, number in zip(payments, numbers)
+        )
+
+
+def invoice_document(invoice):
+    """Return everything printed on an invoice as a dict of plain strings."""
+    payment = invoice.payment
+    booking = payment.booking
+    site = site_settings(None)
+    hours = booking.duration_hours
+    return {
+        'site_name': site['SITE_NAME'],
+        'tagline': site['SITE_TAGLINE'],
+        'invoice_number': invoice.invoice_number,
+        'invoice_date': format_date(invoice.created_at, 'j F Y'),
+        'payment_date': format_date(payment.paid_at, 'j F Y'),
+        'billing_name': invoice.billing_name,
+        'billing_email': invoice.billing_email,
+        'billing_address': invoice.billing_address,
+        'items': [{
+            'description': booking.course.title if booking.course else 'Tutoring Session',
+            'detail': (
+                f"{format_date(booking.date, 'j F Y')} - {booking.get_session_type_display()} "
+                f"({hours} hour{'' if hours == 1 else 's'})"
+            ),
+            'amount': payment.amount_display,
+        }],
+        'total': payment.amount_display,
+        'footer': f"Thank you for your business!  {site['CONTACT_EMAIL']} | {site['CONTACT_PHONE']}",
+    }
+
+
+def document_hash(document):
+    data = json.dumps({'layout': LAYOUT_VERSION, 'document': document}, sort_keys=True)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def pdf_path(digest):
+    return f'invoices/{digest[:2]}/{digest}.pdf'
+
+
+def render_pending(batch_size=100, executor=None):
+    """Render one batch of pending invoices and store them by content hash.
+
+    The batch is claimed as rendering in a short transaction and rendered
+    outside it, so no row locks are held while PDFs are built. Claims older
+    than RENDER_LEASE are taken to belong to a worker that died and are
+    claimed again. Documents already in storage are not rendered again, and
+    identical documents in a batch are rendered once. Rendering runs in
+    executor (a process pool) when given, otherwise inline. Returns a dict
+    of invoice counts by resulting status.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        invoices = list(
+            Invoice.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(
+                Q(pdf_status=Invoice.PdfStatus.PENDING)
+                | Q(pdf_status=Invoice.PdfStatus.RENDERING, pdf_claimed_at__lt=now - RENDER_LEASE)
+            )
+            .select_related('payment__booking__course')
+            .order_by('id')[:batch_size]
+        )
+        if not invoices:
+            return {}
+        Invoice.objects.filter(id__in=[invoice.id for invoice in invoices]).update(
+            pdf_status=Invoice.PdfStatus.RENDERING, pdf_claimed_at=now,
+        )
+
+    digests = {}
+    to_render = {}
+    for invoice in invoices:
+        document = invoice_document(invoice)
+        digest = digests[invoice.id] = document_hash(document)
+        if digest not in to_render and not default_storage.exists(pdf_path(digest)):
+            to_render[digest] = document
+
+    failed = set()
+    if executor is None:
+        results = {digest: _render(document) for digest, document in to_render.items()}
+    else:
+        futures = {digest: executor.submit(render_invoice_pdf, document) for digest, document in to_render.items()}
+        results = {digest: _result(future) for digest, future in futures.items()}
+    for digest, data in results.items():
+        if data is None:
+            failed.add(digest)
+            continue
+        path = pdf_path(digest)
+        saved = default_storage.save(path, ContentFile(data))
+        if saved != path:
+            # Another worker stored the same document first
+            default_storage.delete(saved)
+
+    rendered_at = timezone.now()
+    counts = {}
+    with transaction.atomic():
+        # Skip invoices requeued or reclaimed by another worker meanwhile
+        claimed = set(
+            Invoice.objects.select_for_update()
+            .filter(
+                id__in=[invoice.id for invoice in invoices],
+                pdf_status=Invoice.PdfStatus.RENDERING, pdf_claimed_at=now,
+            )
+            .values_list('id', flat=True)
+        )
+        invoices = [invoice for invoice in invoices if invoice.id in claimed]
+        for invoice in invoices:
+            digest = digests[invoice.id]
+            if digest in failed:
+                invoice.pdf_status = Invoice.PdfStatus.FAILED
+            else:
+                invoice.pdf_status = Invoice.PdfStatus.READY
+                invoice.pdf_file.name = pdf_path(digest)
+                invoice.pdf_hash = digest
+                invoice.pdf_rendered_at = rendered_at
+            counts[invoice.pdf_status] = counts.get(invoice.pdf_status, 0) + 1
+        Invoice.objects.bulk_update(invoices, ['pdf_status', 'pdf_file', 'pdf_hash', 'pdf_rendered_at'])
+
+    counts['rendered'] = len(results) - len(failed)
+    return counts
+
+
+def _render(document):
+    try:
+        return render_invoice_pdf(document)
+    except Exception:
+        logger.exception('Rendering invoice %s failed', document.get('invoice_number'))
+        return None
+
+
+def _result(future):
+    try:
+        return future.result()
+    except Exception:
+        logger.exception('Rendering an invoice in the process pool failed')
+        return None
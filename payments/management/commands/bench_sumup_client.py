@@ -0,0 +1,123 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from core.benchmarks import Timer, percentile
+from payments.http import CircuitBreaker, CircuitOpen, HttpClient, sumup_client
+from payments.services import SumUpService
+
+
+class StubSumUpHandler(BaseHTTPRequestHandler):
+    """Answers like SumUp after a fixed delay; /slow hangs and /down fails."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    delay = 0.0
+
+    def do_GET(self):
+        if self.path.startswith('/slow'):
+            time.sleep(1.0)
+        if self.path.startswith('/down'):
+            self._reply(503, {'message': 'unavailable'})
+        else:
+            self._reply(200, {'id': self.path.rsplit('/', 1)[-1], 'status': 'PAID'})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._reply(200, {'id': 'stub-checkout', 'checkout_url': None})
+
+    def _reply(self, status, data):
+        time.sleep(self.delay)
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Measure SumUp client latency against a local stub, with and without connection pooling'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per run')
+        parser.add_argument('--delay', type=float, default=2.0, help='Stub response delay in ms')
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        StubSumUpHandler.delay = options['delay'] / 1000
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubSumUpHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+
+        try:
+            headers = {'Authorization': 'Bearer stub'}
+            unpooled = self._run(count, lambda i: requests.get(
+                f'{base_url}/checkouts/{i}', headers=headers, timeout=5,
+            ).json())
+
+            with override_settings(SUMUP_API_URL=base_url, SUMUP_API_KEY='stub'):
+                service = SumUpService()
+                pooled = self._run(count, lambda i: service.get_checkout_status(str(i)))
+                sumup_client().close()
+
+            for label, samples in (('requests.get', unpooled), ('pooled client', pooled)):
+                self.stdout.write(
+                    f'{label:>14}: p50 {percentile(samples, 50):.2f} ms, '
+                    f'p99 {percentile(samples, 99):.2f} ms over {len(samples)} requests'
+                )
+
+            self._check_timeout(base_url)
+            self._check_circuit(base_url)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.stdout.write(self.style.SUCCESS('SumUp client benchmark passed'))
+
+    def _run(self, count, call):
+        samples = []
+        for i in range(count):
+            with Timer() as timer:
+                call(i)
+            samples.append(timer.elapsed * 1000)
+        return samples
+
+    def _check_timeout(self, base_url):
+        client = HttpClient(base_url, timeout=(0.5, 0.2), retries=0)
+        with Timer() as timer:
+            try:
+                client.get('/slow/checkout')
+            except requests.RequestException:
+                pass
+            else:
+                raise CommandError('A hung response should time out')
+        client.close()
+        self.stdout.write(f'Hung response abandoned after {timer.elapsed * 1000:.0f} ms')
+        if timer.elapsed > 0.5:
+            raise CommandError('Read timeout was not enforced')
+
+    def _check_circuit(self, base_url):
+        client = HttpClient(
+            base_url, retries=0, breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60),
+        )
+        for _ in range(3):
+            client.get('/down/checkout')
+        with Timer() as timer:
+            try:
+                client.get('/down/checkout')
+            except CircuitOpen:
+                pass
+            else:
+                raise CommandError('Circuit should open after repeated failures')
+        client.close()
+        self.stdout.write(f'Open circuit failed fast in {timer.elapsed * 1000:.3f} ms')
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.refunds import process_refunds
+
+
+class Command(BaseCommand):
+    help = 'Send queued refunds to SumUp in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Refunds per transaction')
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit instead of polling')
+        parser.add_argument('--interval', type=float, default=30.0, help='Seconds to sleep when the queue is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            counts = process_refunds(options['batch_size'])
+            if counts:
+                summary = ', '.join(f'{count} {status}' for status, count in sorted(counts.items()))
+                self.stdout.write(f'Refund batch: {summary}')
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS('Refund queue drained'))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+
+from payments.webhooks import process_batch
+
+
+class Command(BaseCommand):
+    help = 'Process queued SumUp webhook events in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Events per transaction')
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit instead of polling')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep when the queue is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                counts = process_batch(options['batch_size'])
+            except DatabaseError as e:
+                # Claiming or marking the batch failed and nothing was committed,
+                # so the events are still pending: report it and try again
+                if options['once']:
+                    raise
+                self.stderr.write(f'Webhook batch failed, retrying: {e}')
+                time.sleep(options['interval'])
+                continue
+            if counts:
+                summary = ', '.join(f'{count} {status}' for status, count in sorted(counts.items()))
+                self.stdout.write(f'Webhook batch: {summary}')
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS('Webhook queue drained'))
@@ -0,0 +1,35 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import Timer
+from payments.invoices import render_pending
+
+
+class Command(BaseCommand):
+    help = 'Render queued invoice PDFs in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Invoices per batch')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Rendering processes')
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit instead of polling')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when the queue is empty')
+
+    def handle(self, *args, **options):
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            while True:
+                with Timer() as timer:
+                    counts = render_pending(options['batch_size'], executor=executor)
+                if counts:
+                    self.stdout.write(
+                        f"Invoices: {counts.get('ready', 0)} ready ({counts['rendered']} rendered, "
+                        f"rest already stored), {counts.get('failed', 0)} failed in {timer.elapsed:.2f}s"
+                    )
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS('Invoice queue drained'))
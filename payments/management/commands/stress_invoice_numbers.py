@@ -0,0 +1,89 @@
+import multiprocessing
+from datetime import date, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from bookings.models import Booking
+from core.benchmarks import Timer, throwaway_database
+from core.models import User
+from payments.invoices import queue_invoices
+from payments.models import Invoice, Payment
+from payments.numbering import NUMBER_PATTERN
+
+
+def create_invoices(payment_ids, block_size):
+    """Worker process: invoice each payment, one at a time or in blocks."""
+    connections.close_all()
+    try:
+        if block_size > 1:
+            for start in range(0, len(payment_ids), block_size):
+                queue_invoices(payment_ids[start:start + block_size])
+        else:
+            for payment in Payment.objects.filter(id__in=payment_ids).select_related('user'):
+                Invoice(payment=payment, billing_name='Stress', billing_email=payment.user.email).save()
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Create invoices from several processes at once and check every number is unique and gapless'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8, help='Concurrent worker processes')
+        parser.add_argument('--invoices', type=int, default=50, help='Invoices per process')
+        parser.add_argument('--block-size', type=int, default=10, help='Block size for the bulk-allocating half of the workers')
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        per_process = options['invoices']
+        total = processes * per_process
+
+        with throwaway_database():
+            student = User.objects.create_user('stress@example.com', 'stress-password')
+            bookings = Booking.objects.bulk_create(
+                Booking(student=student, date=date(2030, 1, 1), start_time=time(16, 0), end_time=time(17, 0), price=6000)
+                for _ in range(total)
+            )
+            payments = Payment.objects.bulk_create(
+                Payment(user=student, booking=booking, amount=booking.price) for booking in bookings
+            )
+            payment_ids = [payment.id for payment in payments]
+            connections.close_all()
+
+            context = multiprocessing.get_context('fork')
+            workers = [
+                context.Process(
+                    target=create_invoices,
+                    args=(
+                        payment_ids[i * per_process:(i + 1) * per_process],
+                        # Half the workers save invoices one by one, half allocate blocks
+                        options['block_size'] if i % 2 else 1,
+                    ),
+                )
+                for i in range(processes)
+            ]
+            with Timer() as timer:
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+
+            failed = [worker.exitcode for worker in workers if worker.exitcode]
+            if failed:
+                raise CommandError(f'{len(failed)} worker process(es) failed')
+
+            numbers = list(Invoice.objects.values_list('invoice_number', flat=True))
+            self.stdout.write(
+                f'{len(numbers)} invoices from {processes} processes in {timer.elapsed:.2f}s '
+                f'({len(numbers) / timer.elapsed:.0f}/s)'
+            )
+            if len(numbers) != total:
+                raise CommandError(f'Expected {total} invoices, found {len(numbers)}')
+            if len(set(numbers)) != len(numbers):
+                raise CommandError('Duplicate invoice numbers were allocated')
+            values = sorted(int(NUMBER_PATTERN.match(number).group(2)) for number in numbers)
+            if values != list(range(1, total + 1)):
+                raise CommandError('Invoice numbers are not a gapless sequence')
+
+        self.stdout.write(self.style.SUCCESS('Invoice numbers are unique and gapless'))
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_booking_indexes'),
+        ('payments', '0002_webhook_event'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['user', '-created_at'], name='payments_user_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(condition=models.Q(('sumup_checkout_id', ''), _negated=True), fields=('sumup_checkout_id',), name='payments_unique_checkout_id'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_payment_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_hash',
+            field=models.CharField(blank=True, help_text='SHA-256 of the rendered document', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_rendered_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['pdf_status', 'id'], name='payments_invoice_pdf_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:03
+
+import re
+
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    # Start each month after the highest number already issued in it, so
+    # numbers from the old random generator can never be handed out again.
+    Invoice = apps.get_model('payments', 'Invoice')
+    InvoiceSequence = apps.get_model('payments', 'InvoiceSequence')
+    pattern = re.compile(r'^TH-(\d{6})-(\d+)$')
+
+    highest = {}
+    for number in Invoice.objects.filter(invoice_number__startswith='TH-').values_list('invoice_number', flat=True).iterator():
+        match = pattern.match(number)
+        if match:
+            period, value = match.group(1), int(match.group(2))
+            highest[period] = max(highest.get(period, 0), value)
+
+    InvoiceSequence.objects.bulk_create(
+        InvoiceSequence(period=period, last_value=value) for period, value in highest.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_invoice_pdf'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(help_text='YYYYMM', max_length=6, unique=True)),
+                ('last_value', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_invoice_sequence'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payments_user_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['user', '-created_at', 'id'], name='payments_user_listing_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0006_payment_listing_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['-created_at', 'id'], name='payments_created_order_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def settle_existing_refunds(apps, schema_editor):
+    # Rows written before the queue existed must never be sent to SumUp again
+    Refund = apps.get_model('payments', 'Refund')
+    Refund.objects.filter(processed_at__isnull=False).update(status='processed')
+    Refund.objects.filter(processed_at__isnull=True).update(
+        status='failed', error='Recorded before the refund queue; check SumUp manually',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0007_payment_admin_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='refund',
+            name='error',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='refund',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('processed', 'Processed'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='refund',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='refund',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(settle_existing_refunds, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='refund',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='payments_refund_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0008_refund_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_claimed_at',
+            field=models.DateTimeField(blank=True, help_text='When a worker started rendering it', null=True),
+        ),
+        migrations.AlterField(
+            model_name='invoice',
+            name='pdf_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('rendering', 'Rendering'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class Payment(models.Model):
@@ -62,6 +63,19 @@ class Payment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset-paginated payment history, matching PAYMENT_ORDERING
+            models.Index(fields=['user', '-created_at', 'id'], name='payments_user_listing_idx'),
+            # Admin changelist, newest first
+            models.Index(fields=['-created_at', 'id'], name='payments_created_order_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['sumup_checkout_id'],
+                condition=~models.Q(sumup_checkout_id=''),
+                name='payments_unique_checkout_id',
+            ),
+        ]
 
     def __str__(self):
         return f"Payment {self.id} - {self.user} - {self.amount_display}"
@@ -73,11 +87,25 @@ class Payment(models.Model):
 
 
 class Refund(models.Model):
-    """Refund records."""
+    """Refund records, queued pending and sent to SumUp by process_refunds."""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        PROCESSING = 'processing', 'Processing'
+        PROCESSED = 'processed', 'Processed'
+        FAILED = 'failed', 'Failed'
 
     payment = models.ForeignKey(Payment, on_delete=models.CASCADE, related_name='refunds')
     amount = models.PositiveIntegerField(help_text='Refund amount in pence')
     reason = models.TextField()
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    error = models.CharField(max_length=200, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
 
     # SumUp specific
     sumup_refund_id = models.CharField(max_length=100, blank=True)
@@ -85,6 +113,11 @@ class Refund(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     processed_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='payments_refund_queue_idx'),
+        ]
+
     def __str__(self):
         return f"Refund {self.id} - {self.amount / 100:.2f}"
 
@@ -92,6 +125,12 @@ class Refund(models.Model):
 class Invoice(models.Model):
     """Invoice generation for payments."""
 
+    class PdfStatus(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RENDERING = 'rendering', 'Rendering'
+        READY = 'ready', 'Ready'
+        FAILED = 'failed', 'Failed'
+
     payment = models.OneToOneField(Payment, on_delete=models.CASCADE, related_name='invoice')
     invoice_number = models.CharField(max_length=50, unique=True)
 
@@ -100,14 +139,25 @@ class Invoice(models.Model):
     billing_email = models.EmailField()
     billing_address = models.TextField(blank=True)
 
-    # PDF
+    # PDF, rendered in the background by render_invoices
     pdf_file = models.FileField(upload_to='invoices/', blank=True, null=True)
+    pdf_status = models.CharField(
+        max_length=20,
+        choices=PdfStatus.choices,
+        default=PdfStatus.PENDING
+    )
+    pdf_hash = models.CharField(max_length=64, blank=True, help_text='SHA-256 of the rendered document')
+    pdf_rendered_at = models.DateTimeField(null=True, blank=True)
+    pdf_claimed_at = models.DateTimeField(null=True, blank=True, help_text='When a worker started rendering it')
 
     created_at = models.DateTimeField(auto_now_add=True)
     sent_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['pdf_status', 'id'], name='payments_invoice_pdf_idx'),
+        ]
 
     def __str__(self):
         return f"Invoice {self.invoice_number}"
@@ -115,8 +165,48 @@ class Invoice(models.Model):
     def save(self, *args, **kwargs):
         if not self.invoice_number:
             # Generate invoice number: TH-YYYYMM-XXXX
-            from django.utils import timezone
-            import random
-            now = timezone.now()
-            self.invoice_number = f"TH-{now.strftime('%Y%m')}-{random.randint(1000, 9999)}"
+            from .numbering import allocate_invoice_numbers
+            self.invoice_number = allocate_invoice_numbers(1)[0]
         super().save(*args, **kwargs)
+
+
+class InvoiceSequence(models.Model):
+    """Last invoice number handed out in each month."""
+
+    period = models.CharField(max_length=6, unique=True, help_text='YYYYMM')
+    last_value = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.period}: {self.last_value}"
+
+
+class WebhookEvent(models.Model):
+    """Raw webhook delivery, stored on receipt and processed by a worker."""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        PROCESSED = 'processed', 'Processed'
+        IGNORED = 'ignored', 'Ignored'
+        FAILED = 'failed', 'Failed'
+
+    event_id = models.CharField(max_length=100, unique=True)
+    event_type = models.CharField(max_length=100, blank=True)
+    payload = models.TextField()
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    error = models.CharField(max_length=200, blank=True)
+
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'id'], name='payments_webhook_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type or 'event'} {self.event_id} ({self.status})"
@@ -0,0 +1,38 @@
+import re
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import InvoiceSequence
+
+
+NUMBER_FORMAT = 'TH-{period}-{value:04d}'
+NUMBER_PATTERN = re.compile(r'^TH-(\d{6})-(\d+)$')
+
+
+def allocate_invoice_numbers(count, when=None):
+    """Reserve count consecutive invoice numbers for the month of when.
+
+    The counter row is incremented with a single UPDATE ... SET last_value =
+    last_value + count, which locks it until the surrounding transaction
+    commits, so concurrent callers always get disjoint blocks. Writing first
+    (rather than SELECT ... FOR UPDATE, then UPDATE) also lets SQLite take
+    its write lock up front instead of failing to upgrade a read lock.
+    """
+    if count < 1:
+        return []
+    period = timezone.localtime(when).strftime('%Y%m')
+    counter = InvoiceSequence.objects.filter(period=period)
+
+    with transaction.atomic():
+        if not counter.update(last_value=F('last_value') + count):
+            # First invoice of the month: create the row, then claim from it
+            InvoiceSequence.objects.bulk_create([InvoiceSequence(period=period)], ignore_conflicts=True)
+            counter.update(last_value=F('last_value') + count)
+        last_value = counter.values_list('last_value', flat=True).get()
+
+    return [
+        NUMBER_FORMAT.format(period=period, value=value)
+        for value in range(last_value - count + 1, last_value + 1)
+    ]
@@ -0,0 +1,136 @@
+import zlib
+
+
+# A4 in points
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 50
+
+FONTS = {
+    'regular': ('F1', 'Helvetica'),
+    'bold': ('F2', 'Helvetica-Bold'),
+}
+
+# Helvetica advance widths (per 1000 units) for the characters we right-align
+CHAR_WIDTHS = {'.': 278, ',': 278, ' ': 278, '-': 333}
+DEFAULT_CHAR_WIDTH = 556
+
+
+def _encode(text):
+    data = str(text).encode('cp1252', 'replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def text_width(text, size):
+    return sum(CHAR_WIDTHS.get(char, DEFAULT_CHAR_WIDTH) for char in str(text)) * size / 1000
+
+
+class Page:
+    """A single PDF page built from positioned text and rules.
+
+    Output is byte-for-byte deterministic for the same drawing calls: there
+    are no timestamps or random ids, so equal documents hash equally.
+    """
+
+    def __init__(self):
+        self.commands = []
+
+    def text(self, x, y, text, size=10, font='regular', align='left'):
+        if align == 'right':
+            x -= text_width(text, size)
+        name = FONTS[font][0]
+        self.commands.append(
+            b'BT /%s %d Tf %.2f %.2f Td (%s) Tj ET' % (name.encode(), size, x, y, _encode(text))
+        )
+
+    def rule(self, x1, y, x2, width=0.5, grey=0.8):
+        self.commands.append(b'%.2f G %.2f w %.2f %.2f m %.2f %.2f l S' % (grey, width, x1, y, x2, y))
+
+    def render(self):
+        content = zlib.compress(b'\n'.join(self.commands), 9)
+        font_refs = ' '.join(f'/{name} {4 + i} 0 R' for i, (name, _) in enumerate(FONTS.values()))
+        objects = [
+            b'<< /Type /Catalog /Pages 2 0 R >>',
+            b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+            (
+                f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+                f'/Resources << /Font << {font_refs} >> >> /Contents {4 + len(FONTS)} 0 R >>'
+            ).encode(),
+        ]
+        for _, base_font in FONTS.values():
+            objects.append(
+                f'<< /Type /Font /Subtype /Type1 /BaseFont /{base_font} /Encoding /WinAnsiEncoding >>'.encode()
+            )
+        objects.append(
+            b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(content), content)
+        )
+
+        output = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(output))
+            output += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+
+        xref = len(output)
+        output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+        for offset in offsets:
+            output += b'%010d 00000 n \n' % offset
+        output += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+        return bytes(output)
+
+
+def render_invoice_pdf(document):
+    """Lay out an invoice document (a dict of plain strings) as PDF bytes.
+
+    Runs in worker processes, so it must not touch Django or the database.
+    """
+    page = Page()
+    right = PAGE_WIDTH - MARGIN
+    y = PAGE_HEIGHT - MARGIN - 20
+
+    page.text(MARGIN, y, document['site_name'], size=20, font='bold')
+    page.text(right, y, 'INVOICE', size=20, font='bold', align='right')
+    y -= 18
+    page.text(MARGIN, y, document['tagline'], size=10)
+    page.text(right, y, document['invoice_number'], size=10, align='right')
+    y -= 20
+    page.rule(MARGIN, y, right)
+
+    y -= 30
+    page.text(MARGIN, y, 'BILL TO', size=9, font='bold')
+    details = [
+        ('Invoice Date:', document['invoice_date']),
+        ('Payment Date:', document['payment_date']),
+        ('Status:', 'Paid'),
+    ]
+    bill_to = [document['billing_name'], document['billing_email']]
+    bill_to += [line for line in document.get('billing_address', '').splitlines() if line.strip()]
+    for i in range(max(len(bill_to), len(details))):
+        y -= 15
+        if i < len(bill_to):
+            page.text(MARGIN, y, bill_to[i], size=10, font='bold' if i == 0 else 'regular')
+        if i < len(details):
+            label, value = details[i]
+            page.text(right - 110, y, label, size=9, align='right')
+            page.text(right, y, value, size=10, align='right')
+
+    y -= 40
+    page.text(MARGIN, y, 'Description', size=9, font='bold')
+    page.text(right, y, 'Amount', size=9, font='bold', align='right')
+    y -= 8
+    page.rule(MARGIN, y, right)
+    for item in document['items']:
+        y -= 18
+        page.text(MARGIN, y, item['description'], size=11, font='bold')
+        page.text(right, y, item['amount'], size=11, align='right')
+        y -= 14
+        page.text(MARGIN, y, item['detail'], size=9)
+        y -= 10
+        page.rule(MARGIN, y, right)
+
+    y -= 24
+    page.text(right - 110, y, 'Total', size=11, font='bold', align='right')
+    page.text(right, y, document['total'], size=14, font='bold', align='right')
+
+    page.text(MARGIN, MARGIN, document['footer'], size=8)
+    return page.render()
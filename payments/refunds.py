@@ -0,0 +1,125 @@
+import logging
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from bookings.models import Booking
+from core.outbox import retry_delay
+
+from .models import Payment, Refund
+from .services import RefundRejected, SumUpService
+
+
+logger = logging.getLogger(__name__)
+
+# Refunds that count against a payment: queued, with SumUp, or paid out
+LIVE_STATUSES = [Refund.Status.PENDING, Refund.Status.PROCESSING, Refund.Status.PROCESSED]
+
+
+def queue_refunds(booking_ids, reason):
+    """Queue a full refund for each completed payment on the given bookings.
+
+    Payments that already have a live refund are skipped, so cancelling a
+    booking twice never refunds it twice, while one whose refund failed can
+    be refunded again. Runs in the caller's transaction; process_refunds
+    sends the queued rows to SumUp. Returns the refunds created.
+    """
+    payments = Payment.objects.filter(
+        booking_id__in=booking_ids,
+        status=Payment.Status.COMPLETED,
+    ).exclude(refunds__status__in=LIVE_STATUSES).only('id', 'amount')
+    return Refund.objects.bulk_create(
+        Refund(payment=payment, amount=payment.amount, reason=reason) for payment in payments
+    )
+
+
+def refund_if_cancelled(booking_ids):
+    """Queue refunds for payments that completed after their booking was cancelled.
+
+    A checkout can finish after sweep_bookings has expired its booking, and
+    the booking is not revived, so the student gets their money back.
+    Returns the ids of the cancelled bookings.
+    """
+    cancelled = set(
+        Booking.objects.filter(id__in=booking_ids, status=Booking.Status.CANCELLED).values_list('id', flat=True)
+    )
+    if cancelled:
+        queue_refunds(cancelled, 'Paid after the booking was cancelled')
+    return cancelled
+
+
+def process_refunds(batch_size=50):
+    """Send one batch of due refunds to SumUp.
+
+    Refunds are claimed as processing with SKIP LOCKED in a short
+    transaction, so several workers can drain the queue together and no row
+    locks are held while SumUp is called. Refunds SumUp rejects are marked
+    failed. Timeouts and other transient errors are retried with backoff,
+    up to REFUND_MAX_ATTEMPTS. A refund left processing by a worker that
+    died is not retried automatically, as SumUp may already have paid it;
+    the admin requeue action sends it again once checked. Returns a dict of
+    refund counts by outcome.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        refunds = list(
+            Refund.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(status=Refund.Status.PENDING, next_attempt_at__lte=now)
+            .select_related('payment')
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not refunds:
+            return {}
+        for refund in refunds:
+            refund.status = Refund.Status.PROCESSING
+            refund.attempts += 1
+        Refund.objects.bulk_update(refunds, ['status', 'attempts'])
+
+    service = SumUpService()
+    results = {}
+    for refund in refunds:
+        try:
+            results[refund.id] = service.process_refund(refund.payment, refund.amount)
+        except (RefundRejected, requests.RequestException) as e:
+            results[refund.id] = e
+
+    now = timezone.now()
+    counts = {'processed': 0, 'retry': 0, 'failed': 0}
+    refunded = []
+    for refund in refunds:
+        result = results[refund.id]
+        if isinstance(result, RefundRejected) or (
+            isinstance(result, Exception) and refund.attempts >= settings.REFUND_MAX_ATTEMPTS
+        ):
+            refund.status = Refund.Status.FAILED
+            refund.error = str(result)[:200]
+            counts['failed'] += 1
+            logger.error('Refund %s failed after %d attempts: %s', refund.id, refund.attempts, result)
+        elif isinstance(result, Exception):
+            refund.status = Refund.Status.PENDING
+            refund.error = str(result)[:200]
+            refund.next_attempt_at = now + retry_delay(refund.attempts)
+            counts['retry'] += 1
+        else:
+            refund.status = Refund.Status.PROCESSED
+            refund.error = ''
+            refund.sumup_refund_id = str(result.get('id', ''))[:100]
+            refund.processed_at = now
+            payment = refund.payment
+            payment.status = (
+                Payment.Status.REFUNDED if refund.amount >= payment.amount
+                else Payment.Status.PARTIALLY_REFUNDED
+            )
+            payment.updated_at = now
+            refunded.append(payment)
+            counts['processed'] += 1
+
+    with transaction.atomic():
+        Refund.objects.bulk_update(
+            refunds, ['status', 'error', 'next_attempt_at', 'sumup_refund_id', 'processed_at'],
+        )
+        Payment.objects.bulk_update(refunded, ['status', 'updated_at'])
+
+    return counts
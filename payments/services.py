@@ -1,7 +1,18 @@
+import logging
+
 import requests
 from django.conf import settings
 from django.urls import reverse
 
+from .http import sumup_client
+
+
+logger = logging.getLogger(__name__)
+
+
+class RefundRejected(Exception):
+    """SumUp refused a refund, so sending it again will not help."""
+
 
 class SumUpService:
     """Service for SumUp payment integration."""
@@ -9,7 +20,7 @@ class SumUpService:
     def __init__(self):
         self.api_key = settings.SUMUP_API_KEY
         self.merchant_code = settings.SUMUP_MERCHANT_CODE
-        self.base_url = settings.SUMUP_API_URL
+        self.client = sumup_client()
 
     def _get_headers(self):
         return {
@@ -26,8 +37,6 @@ class SumUpService:
                 'checkout_url': None,  # Will use demo flow
             }
 
-        url = f'{self.base_url}/checkouts'
-
         # Build callback URLs
         from django.contrib.sites.models import Site
         try:
@@ -49,11 +58,11 @@ class SumUpService:
         }
 
         try:
-            response = requests.post(url, json=payload, headers=self._get_headers())
+            response = self.client.post('/checkouts', json=payload, headers=self._get_headers())
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
-            print(f"SumUp API error: {e}")
+            logger.error('SumUp checkout failed for payment %s: %s', payment.id, e)
             return None
 
     def get_checkout_status(self, checkout_id):
@@ -61,33 +70,43 @@ class SumUpService:
         if not self.api_key or checkout_id.startswith('demo-'):
             return 'PAID'  # Demo mode
 
-        url = f'{self.base_url}/checkouts/{checkout_id}'
-
         try:
-            response = requests.get(url, headers=self._get_headers())
+            response = self.client.get(f'/checkouts/{checkout_id}', headers=self._get_headers())
             response.raise_for_status()
             data = response.json()
             return data.get('status', 'UNKNOWN')
-        except requests.RequestException:
+        except requests.RequestException as e:
+            logger.warning('SumUp status check failed for checkout %s: %s', checkout_id, e)
             return 'UNKNOWN'
 
     def process_refund(self, payment, amount=None):
-        """Process a refund for a payment."""
+        """Process a refund for a payment.
+
+        Raises RefundRejected when SumUp refuses it with a 4xx (other than
+        429) or the payment has no transaction to refund. Other failures
+        raise requests.RequestException and may succeed if tried again.
+        """
         if not self.api_key:
             return {'status': 'refunded'}  # Demo mode
 
         if not payment.sumup_transaction_id:
-            return None
+            raise RefundRejected('Payment has no SumUp transaction')
 
-        url = f'{self.base_url}/me/refund'
         payload = {
             'transaction_id': payment.sumup_transaction_id,
             'amount': (amount or payment.amount) / 100,
         }
 
         try:
-            response = requests.post(url, json=payload, headers=self._get_headers())
+            response = self.client.post('/me/refund', json=payload, headers=self._get_headers())
             response.raise_for_status()
+        except requests.HTTPError as e:
+            status = e.response.status_code
+            if 400 <= status < 500 and status != 429:
+                raise RefundRejected(f'SumUp rejected the refund ({status})') from e
+            raise
+        try:
             return response.json()
-        except requests.RequestException:
-            return None
+        except ValueError:
+            # Accepted: an unreadable body must not get the refund sent again
+            return {}
@@ -1,3 +1,166 @@
-from django.test import TestCase
+import json
+from datetime import date, datetime, time
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from bookings.models import Booking
+from core.models import User
+
+from .invoices import queue_invoices
+from .models import Invoice, Payment, Refund, WebhookEvent
+from .numbering import allocate_invoice_numbers
+from .refunds import process_refunds, queue_refunds
+from .services import RefundRejected
+from .webhooks import enqueue_event, process_batch
+
+
+class PaymentTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('student@example.com', 'password')
+
+    def make_payment(self, hour=16, booking_status=Booking.Status.PENDING, **kwargs):
+        booking = Booking.objects.create(
+            student=self.student, date=date(2026, 3, 2), start_time=time(hour), end_time=time(hour + 1),
+            price=6000, status=booking_status,
+        )
+        return Payment.objects.create(user=self.student, booking=booking, amount=6000, **kwargs)
+
+
+class InvoiceNumberTests(TestCase):
+
+    def test_blocks_are_consecutive_within_a_month(self):
+        when = timezone.make_aware(datetime(2026, 3, 15))
+        self.assertEqual(
+            allocate_invoice_numbers(2, when), ['TH-202603-0001', 'TH-202603-0002'],
+        )
+        self.assertEqual(allocate_invoice_numbers(1, when), ['TH-202603-0003'])
+
+    def test_each_month_starts_again(self):
+        allocate_invoice_numbers(5, timezone.make_aware(datetime(2026, 3, 15)))
+        self.assertEqual(
+            allocate_invoice_numbers(1, timezone.make_aware(datetime(2026, 4, 1, 12))), ['TH-202604-0001'],
+        )
+
+    def test_nothing_allocated_for_zero(self):
+        self.assertEqual(allocate_invoice_numbers(0), [])
+
+
+class QueueInvoicesTests(PaymentTestCase):
+
+    def test_queues_once_per_payment(self):
+        payments = [self.make_payment(hour) for hour in (16, 17)]
+        created = queue_invoices([payment.id for payment in payments])
+
+        self.assertEqual(len(created), 2)
+        self.assertEqual(len({invoice.invoice_number for invoice in created}), 2)
+        self.assertEqual(queue_invoices([payment.id for payment in payments]), [])
+        self.assertEqual(Invoice.objects.count(), 2)
+
+
+@mock.patch('payments.refunds.SumUpService')
+class ProcessRefundsTests(PaymentTestCase):
+
+    def setUp(self):
+        self.payment = self.make_payment(status=Payment.Status.COMPLETED, sumup_transaction_id='txn-1')
+        self.refund, = queue_refunds([self.payment.booking_id], 'Booking cancelled')
+
+    def test_processed_refund_updates_payment(self, service):
+        service.return_value.process_refund.return_value = {'id': 'refund-1'}
+
+        self.assertEqual(process_refunds(), {'processed': 1, 'retry': 0, 'failed': 0})
+        self.refund.refresh_from_db()
+        self.payment.refresh_from_db()
+        self.assertEqual(self.refund.status, Refund.Status.PROCESSED)
+        self.assertEqual(self.refund.sumup_refund_id, 'refund-1')
+        self.assertEqual(self.payment.status, Payment.Status.REFUNDED)
+
+    def test_transient_failure_is_retried_later(self, service):
+        service.return_value.process_refund.side_effect = requests.Timeout('read timed out')
+
+        self.assertEqual(process_refunds(), {'processed': 0, 'retry': 1, 'failed': 0})
+        self.refund.refresh_from_db()
+        self.assertEqual(self.refund.status, Refund.Status.PENDING)
+        self.assertEqual(self.refund.attempts, 1)
+        self.assertGreater(self.refund.next_attempt_at, timezone.now())
+        # Not due yet
+        self.assertEqual(process_refunds(), {})
+
+    @override_settings(REFUND_MAX_ATTEMPTS=1)
+    def test_transient_failure_gives_up_after_max_attempts(self, service):
+        service.return_value.process_refund.side_effect = requests.ConnectionError('refused')
+
+        with self.assertLogs('payments.refunds', 'ERROR'):
+            self.assertEqual(process_refunds(), {'processed': 0, 'retry': 0, 'failed': 1})
+        self.refund.refresh_from_db()
+        self.assertEqual(self.refund.status, Refund.Status.FAILED)
+
+    def test_rejected_refund_fails_and_can_be_queued_again(self, service):
+        service.return_value.process_refund.side_effect = RefundRejected('SumUp rejected the refund (400)')
+
+        with self.assertLogs('payments.refunds', 'ERROR'):
+            self.assertEqual(process_refunds(), {'processed': 0, 'retry': 0, 'failed': 1})
+        self.refund.refresh_from_db()
+        self.assertEqual(self.refund.status, Refund.Status.FAILED)
+        self.assertEqual(self.refund.error, 'SumUp rejected the refund (400)')
+        self.assertEqual(len(queue_refunds([self.payment.booking_id], 'Try again')), 1)
+
+    def test_live_refund_is_not_queued_twice(self, service):
+        self.assertEqual(queue_refunds([self.payment.booking_id], 'Cancelled twice'), [])
+
+
+class ProcessWebhooksTests(PaymentTestCase):
+
+    def enqueue(self, checkout_id):
+        enqueue_event(json.dumps({'event_type': 'checkout.completed', 'id': checkout_id, 'transaction_id': 'txn'}))
+
+    def test_completed_checkout_confirms_and_invoices(self):
+        payment = self.make_payment(sumup_checkout_id='checkout-1')
+        self.enqueue('checkout-1')
+
+        self.assertEqual(process_batch(), {WebhookEvent.Status.PROCESSED: 1})
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, Payment.Status.COMPLETED)
+        self.assertEqual(payment.booking.status, Booking.Status.CONFIRMED)
+        self.assertTrue(Invoice.objects.filter(payment=payment).exists())
+
+    def test_expired_booking_is_refunded_not_invoiced(self):
+        payment = self.make_payment(booking_status=Booking.Status.CANCELLED, sumup_checkout_id='checkout-1')
+        self.enqueue('checkout-1')
+
+        process_batch()
+        self.assertFalse(Invoice.objects.filter(payment=payment).exists())
+        self.assertEqual(payment.refunds.get().status, Refund.Status.PENDING)
+
+    def test_unknown_payment_fails_alone(self):
+        self.make_payment(sumup_checkout_id='checkout-1')
+        self.enqueue('checkout-1')
+        self.enqueue('missing')
+
+        self.assertEqual(
+            process_batch(), {WebhookEvent.Status.PROCESSED: 1, WebhookEvent.Status.FAILED: 1},
+        )
+        self.assertEqual(WebhookEvent.objects.get(status=WebhookEvent.Status.FAILED).error, 'Payment not found')
+
+    def test_error_in_one_checkout_only_fails_its_event(self):
+        for hour, checkout_id in [(16, 'checkout-1'), (17, 'checkout-2')]:
+            self.make_payment(hour, sumup_checkout_id=checkout_id)
+            self.enqueue(checkout_id)
+
+        def queue_invoices(payment_ids):
+            if Payment.objects.filter(id__in=payment_ids, sumup_checkout_id='checkout-2').exists():
+                raise RuntimeError('boom')
+
+        with mock.patch('payments.webhooks.queue_invoices', queue_invoices), self.assertLogs('payments.webhooks'):
+            counts = process_batch()
+
+        self.assertEqual(counts, {WebhookEvent.Status.PROCESSED: 1, WebhookEvent.Status.FAILED: 1})
+        self.assertEqual(
+            list(Payment.objects.order_by('sumup_checkout_id').values_list('status', flat=True)),
+            [Payment.Status.COMPLETED, Payment.Status.PENDING],
+        )
+        self.assertEqual(WebhookEvent.objects.get(status=WebhookEvent.Status.FAILED).error, 'RuntimeError: boom')
@@ -1,16 +1,19 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import FileResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.conf import settings
 from django.utils import timezone
-import json
 
 from .models import Payment, Invoice
+from .invoices import queue_invoices
+from .refunds import refund_if_cancelled
 from .services import SumUpService
-from bookings.models import Booking
+from .webhooks import enqueue_event
+from bookings.models import Booking, BookingTransition
+from bookings.transitions import transition_bookings
 
 
 @login_required
@@ -62,6 +65,30 @@ def checkout(request, booking_id):
     return render(request, 'payments/checkout.html', context)
 
 
+def _confirm_booking(request, payment):
+    """Confirm the paid booking, returning False if it had expired and is being refunded."""
+    confirmed = transition_bookings(
+        Booking.objects.filter(pk=payment.booking_id), Booking.Status.CONFIRMED,
+        BookingTransition.Source.STUDENT, actor=request.user, reason='Payment completed',
+    )
+    return bool(confirmed) or payment.booking_id not in refund_if_cancelled([payment.booking_id])
+
+
+def _complete_payment(request, payment, message):
+    """Record a paid checkout and confirm and invoice its booking."""
+    payment.status = 'completed'
+    payment.paid_at = timezone.now()
+    payment.save()
+
+    if _confirm_booking(request, payment):
+        queue_invoices([payment.id])
+        messages.success(request, message)
+    else:
+        messages.warning(
+            request, 'Your booking expired before the payment went through. A full refund is on its way.'
+        )
+
+
 @login_required
 def payment_success(request, payment_id):
     """Payment success callback."""
@@ -72,25 +99,12 @@ def payment_success(request, payment_id):
     if payment.sumup_checkout_id and not payment.sumup_checkout_id.startswith('demo-'):
         status = sumup.get_checkout_status(payment.sumup_checkout_id)
         if status == 'PAID':
-            payment.status = 'completed'
-            payment.paid_at = timezone.now()
-            payment.save()
-
-            # Update booking status
-            payment.booking.status = 'confirmed'
-            payment.booking.save()
-
-            messages.success(request, 'Payment successful! Your booking is confirmed.')
+            _complete_payment(request, payment, 'Payment successful! Your booking is confirmed.')
         else:
             messages.warning(request, 'Payment is being processed. We will confirm shortly.')
     else:
         # Demo mode - mark as completed
-        payment.status = 'completed'
-        payment.paid_at = timezone.now()
-        payment.save()
-        payment.booking.status = 'confirmed'
-        payment.booking.save()
-        messages.success(request, 'Booking confirmed!')
+        _complete_payment(request, payment, 'Booking confirmed!')
 
     return render(request, 'payments/success.html', {'payment': payment})
 
@@ -110,48 +124,39 @@ def payment_cancel(request, payment_id):
 @csrf_exempt
 @require_POST
 def sumup_webhook(request):
-    """Handle SumUp webhook callbacks."""
+    """Queue SumUp webhook callbacks for the process_webhooks worker."""
     try:
-        data = json.loads(request.body)
-        event_type = data.get('event_type')
-        checkout_id = data.get('id')
-
-        if event_type == 'checkout.completed':
-            # Find payment by checkout ID
-            try:
-                payment = Payment.objects.get(sumup_checkout_id=checkout_id)
-                payment.status = 'completed'
-                payment.paid_at = timezone.now()
-                payment.sumup_transaction_id = data.get('transaction_id', '')
-                payment.save()
-
-                # Update booking
-                payment.booking.status = 'confirmed'
-                payment.booking.save()
-
-            except Payment.DoesNotExist:
-                return JsonResponse({'error': 'Payment not found'}, status=404)
-
-        return JsonResponse({'status': 'ok'})
-
-    except json.JSONDecodeError:
+        enqueue_event(request.body)
+    except (ValueError, UnicodeDecodeError):
         return JsonResponse({'error': 'Invalid JSON'}, status=400)
 
+    return JsonResponse({'status': 'ok'})
+
 
 @login_required
 def invoice_view(request, payment_id):
     """View/download invoice."""
-    payment = get_object_or_404(Payment, id=payment_id, user=request.user)
-
-    # Create invoice if it doesn't exist
-    invoice, created = Invoice.objects.get_or_create(
-        payment=payment,
-        defaults={
-            'billing_name': request.user.get_full_name(),
-            'billing_email': request.user.email,
-        }
+    payment = get_object_or_404(
+        Payment.objects.select_related('booking__course', 'invoice'), id=payment_id, user=request.user
     )
 
+    try:
+        invoice = payment.invoice
+    except Invoice.DoesNotExist:
+        # Payments from before invoices were queued on completion. Another
+        # request may queue it first, in which case nothing is created here.
+        created = queue_invoices([payment.id])
+        invoice = created[0] if created else Invoice.objects.get(payment=payment)
+
+    # Serve the rendered PDF once the render_invoices worker has stored it
+    if invoice.pdf_status == Invoice.PdfStatus.READY and invoice.pdf_file:
+        return FileResponse(
+            invoice.pdf_file.open('rb'),
+            as_attachment='download' in request.GET,
+            filename=f'{invoice.invoice_number}.pdf',
+            content_type='application/pdf',
+        )
+
     context = {
         'invoice': invoice,
         'payment': payment,
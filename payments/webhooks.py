@@ -0,0 +1,149 @@
+import hashlib
+import json
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from bookings.models import Booking, BookingTransition
+from bookings.transitions import transition_bookings
+
+from .invoices import queue_invoices
+from .models import Payment, WebhookEvent
+from .refunds import refund_if_cancelled
+
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_event(body):
+    """Durably store a raw webhook body, ignoring redeliveries.
+
+    Raises ValueError for bodies that are not a JSON object. The event id is
+    SumUp's own when the payload has one, otherwise a hash of the body, so a
+    retried delivery of the same payload is stored only once.
+    """
+    data = json.loads(body)
+    if not isinstance(data, dict):
+        raise ValueError('Webhook payload must be a JSON object')
+
+    raw = body.decode('utf-8') if isinstance(body, bytes) else body
+    event_id = str(data.get('event_id') or hashlib.sha256(raw.encode('utf-8')).hexdigest())
+    WebhookEvent.objects.bulk_create(
+        [WebhookEvent(event_id=event_id[:100], event_type=str(data.get('event_type', ''))[:100], payload=raw)],
+        ignore_conflicts=True,
+    )
+
+
+def _apply_checkouts(completed, payloads, now):
+    """Mark the payments for completed checkouts paid and confirm their bookings.
+
+    completed maps checkout ids to their event ids. Returns failure outcomes
+    for events whose payment does not exist.
+    """
+    outcomes = {}
+    payments = list(
+        Payment.objects.filter(sumup_checkout_id__in=completed).exclude(sumup_checkout_id='').only(
+            'id', 'booking_id', 'status', 'sumup_checkout_id', 'sumup_transaction_id',
+        )
+    )
+    found = {payment.sumup_checkout_id for payment in payments}
+    for checkout_id, event_ids in completed.items():
+        if checkout_id not in found:
+            for event_id in event_ids:
+                outcomes[event_id] = (WebhookEvent.Status.FAILED, 'Payment not found')
+
+    to_update = []
+    for payment in payments:
+        if payment.status == Payment.Status.COMPLETED:
+            continue
+        latest = payloads[completed[payment.sumup_checkout_id][-1]]
+        payment.status = Payment.Status.COMPLETED
+        payment.paid_at = now
+        payment.updated_at = now
+        payment.sumup_transaction_id = latest.get('transaction_id', '')
+        to_update.append(payment)
+
+    if to_update:
+        Payment.objects.bulk_update(
+            to_update, ['status', 'paid_at', 'updated_at', 'sumup_transaction_id'],
+        )
+        booking_ids = [payment.booking_id for payment in to_update]
+        confirmed = transition_bookings(
+            Booking.objects.filter(id__in=booking_ids), Booking.Status.CONFIRMED,
+            BookingTransition.Source.WEBHOOK, reason='SumUp checkout completed',
+        )
+        cancelled = refund_if_cancelled(booking_ids) if confirmed < len(booking_ids) else set()
+        # Bookings cancelled before payment are refunded, not invoiced
+        queue_invoices([payment.id for payment in to_update if payment.booking_id not in cancelled])
+    return outcomes
+
+
+def process_batch(batch_size=100):
+    """Apply one batch of pending webhook events.
+
+    Events are claimed with SKIP LOCKED where the database supports it, so
+    several workers can drain the queue together. All completed checkouts in
+    the batch are applied with one payment update and one booking update.
+    If that fails, the checkouts are applied one at a time so a single bad
+    event is marked failed with its error instead of sinking the batch.
+    Returns a dict of event counts by resulting status.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(status=WebhookEvent.Status.PENDING)
+            .order_by('id')[:batch_size]
+        )
+        if not events:
+            return {}
+
+        outcomes = {}
+        payloads = {}
+        completed = defaultdict(list)
+        for event in events:
+            try:
+                data = json.loads(event.payload)
+            except ValueError:
+                outcomes[event.id] = (WebhookEvent.Status.FAILED, 'Invalid JSON')
+                continue
+            if not isinstance(data, dict):
+                outcomes[event.id] = (WebhookEvent.Status.FAILED, 'Payload is not a JSON object')
+                continue
+            if data.get('event_type') != 'checkout.completed' or not data.get('id'):
+                outcomes[event.id] = (WebhookEvent.Status.IGNORED, '')
+                continue
+            # Several events for one checkout collapse into one update
+            completed[str(data['id'])].append(event.id)
+            payloads[event.id] = data
+            outcomes[event.id] = (WebhookEvent.Status.PROCESSED, '')
+
+        if completed:
+            try:
+                with transaction.atomic():
+                    outcomes.update(_apply_checkouts(completed, payloads, now))
+            except Exception:
+                logger.exception('Applying %d webhook checkouts together failed, retrying one by one', len(completed))
+                for checkout_id, event_ids in completed.items():
+                    try:
+                        with transaction.atomic():
+                            outcomes.update(_apply_checkouts({checkout_id: event_ids}, payloads, now))
+                    except Exception as e:
+                        logger.exception('Applying webhook checkout %s failed', checkout_id)
+                        for event_id in event_ids:
+                            outcomes[event_id] = (WebhookEvent.Status.FAILED, f'{type(e).__name__}: {e}'[:200])
+
+        grouped = defaultdict(list)
+        for event_id, outcome in outcomes.items():
+            grouped[outcome].append(event_id)
+        for (status, error), event_ids in grouped.items():
+            WebhookEvent.objects.filter(id__in=event_ids).update(
+                status=status, error=error, processed_at=now,
+            )
+
+    counts = defaultdict(int)
+    for status, _ in outcomes.values():
+        counts[status] += 1
+    return dict(counts)